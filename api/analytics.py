@@ -0,0 +1,135 @@
+"""
+Inspection analytics rollups.
+
+``inspectionRollup`` holds inspection counts per station, equipment type and
+month, so failure-rate dashboards read a few hundred rollup rows instead of
+scanning the whole inspection history:
+- ``add_inspections`` increments the affected buckets in the transaction
+  that inserts the inspections
+- ``backfill_rollups`` rebuilds every bucket from the inspection table with
+  one grouped query, for existing databases or after a bulk import
+
+Results are free text. "Pass"/"Passed" count as passed and "Fail"/"Failed"/
+"Needs Repair" as failed, case-insensitively; anything else (e.g. "Pending")
+only counts towards ``total``. Inspections without a date are not bucketed.
+"""
+import argparse
+import logging
+from collections import Counter
+from datetime import date
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import case, extract, func
+from sqlalchemy.orm import Session
+
+import models
+from counters import increment
+from database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+PASSED_RESULTS = ("pass", "passed")
+FAILED_RESULTS = ("fail", "failed", "needs repair")
+
+Bucket = Tuple[int, str, date]
+
+
+def classify(result: Optional[str]) -> Optional[str]:
+    """``"passed"``, ``"failed"`` or None for an inspection result"""
+    normalized = (result or "").strip().lower()
+    if normalized in PASSED_RESULTS:
+        return "passed"
+    if normalized in FAILED_RESULTS:
+        return "failed"
+    return None
+
+
+def month_of(day: date) -> date:
+    return day.replace(day=1)
+
+
+def add_inspections(db: Session, inspections: Iterable[models.Inspection]) -> None:
+    """Count new inspections into their rollup buckets; does not commit"""
+    inspections = [row for row in inspections if row.inspection_date is not None]
+    if not inspections:
+        return
+    gear = models.Gear
+    gears: Dict[int, tuple] = {
+        gear_id: (station_id, equipment_type or "")
+        for gear_id, station_id, equipment_type in db.query(gear.id, gear.station_id, gear.equipment_type)
+        .filter(gear.id.in_({row.gear_id for row in inspections}))
+    }
+    buckets: Dict[Bucket, Counter] = {}
+    for row in inspections:
+        station_id, equipment_type = gears[row.gear_id]
+        counts = buckets.setdefault((station_id, equipment_type, month_of(row.inspection_date)), Counter())
+        counts["total"] += 1
+        outcome = classify(row.result)
+        if outcome:
+            counts[outcome] += 1
+    # Sorted so concurrent writers touch buckets in the same order
+    for bucket in sorted(buckets):
+        station_id, equipment_type, month = bucket
+        counts = buckets[bucket]
+        increment(
+            db, models.InspectionRollup,
+            {"station_id": station_id, "equipment_type": equipment_type, "month": month},
+            total=counts["total"], passed=counts["passed"], failed=counts["failed"],
+        )
+
+
+def backfill_rollups(db: Session) -> int:
+    """Rebuild every rollup bucket from the inspections; returns the bucket count"""
+    inspection = models.Inspection
+    gear = models.Gear
+    result = func.lower(func.trim(inspection.result))
+    year = extract("year", inspection.inspection_date)
+    month = extract("month", inspection.inspection_date)
+    equipment_type = func.coalesce(gear.equipment_type, "")
+    rows = (
+        db.query(
+            gear.station_id,
+            equipment_type,
+            year,
+            month,
+            func.count(),
+            func.sum(case((result.in_(PASSED_RESULTS), 1), else_=0)),
+            func.sum(case((result.in_(FAILED_RESULTS), 1), else_=0)),
+        )
+        .join(gear, gear.id == inspection.gear_id)
+        .filter(inspection.inspection_date.isnot(None))
+        .group_by(gear.station_id, equipment_type, year, month)
+        .all()
+    )
+    db.query(models.InspectionRollup).delete(synchronize_session=False)
+    db.add_all(
+        models.InspectionRollup(
+            station_id=station_id,
+            equipment_type=equipment_type,
+            month=date(int(row_year), int(row_month), 1),
+            total=total,
+            passed=passed or 0,
+            failed=failed or 0,
+        )
+        for station_id, equipment_type, row_year, row_month, total, passed, failed in rows
+    )
+    db.commit()
+    return len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspection analytics rollups")
+    parser.add_argument("--backfill", action="store_true", help="rebuild the rollups from all inspections")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    db = SessionLocal()
+    try:
+        if args.backfill:
+            logger.info("Rebuilt %d rollup buckets", backfill_rollups(db))
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Startup benchmark.
+
+Measures, in fresh interpreters, how long a worker takes to import the app,
+run its startup, and answer its first requests. Run it from the api folder:
+
+    python bench_startup.py --runs 5
+
+Workers are measured as they start under the production profile, with the
+one-time schema check already done by the master, so no database is needed.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+_PROBE = r"""
+import json, time
+t0 = time.perf_counter()
+import main
+t1 = time.perf_counter()
+from fastapi.testclient import TestClient
+with TestClient(main.app) as client:
+    t2 = time.perf_counter()
+    client.get("/health")
+    t3 = time.perf_counter()
+    client.get("/openapi.json")
+    t4 = time.perf_counter()
+print(json.dumps({
+    "import": t1 - t0,
+    "startup": t2 - t1,
+    "first_request": t3 - t2,
+    "first_openapi": t4 - t3,
+}))
+"""
+
+
+def run_once() -> dict:
+    env = dict(os.environ, GEARMATE_PREPARED="1")
+    output = subprocess.run(
+        [sys.executable, "-c", _PROBE],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="number of fresh interpreters to sample")
+    args = parser.parse_args()
+
+    samples = [run_once() for _ in range(args.runs)]
+    print(f"{'phase':<15}{'median ms':>12}{'max ms':>12}")
+    for phase in ("import", "startup", "first_request", "first_openapi"):
+        values = [sample[phase] * 1000 for sample in samples]
+        print(f"{phase:<15}{statistics.median(values):>12.1f}{max(values):>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
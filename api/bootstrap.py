@@ -0,0 +1,32 @@
+"""
+One-time runtime preparation: database schema check and upload directories.
+
+Development servers run this from the app's startup. The production profile
+in ``gunicorn.conf.py`` runs it once in the master process before workers are
+forked, and sets ``GEARMATE_PREPARED`` so the workers skip it.
+"""
+import os
+from pathlib import Path
+
+import models
+from database import engine
+
+UPLOAD_DIR = Path("uploads")
+GEAR_UPLOAD_DIR = UPLOAD_DIR / "gears"
+
+PREPARED_ENV = "GEARMATE_PREPARED"
+
+
+def prepare_runtime():
+    """Create missing tables and the upload directories.
+
+    Tables that already exist are left as they are; new columns on them
+    come from the scripts in ``migrations/``.
+    """
+    models.Base.metadata.create_all(bind=engine)
+    GEAR_UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+    os.environ[PREPARED_ENV] = "1"
+
+
+def runtime_prepared() -> bool:
+    return os.getenv(PREPARED_ENV) == "1"
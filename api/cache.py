@@ -0,0 +1,187 @@
+"""
+In-process caching for reference data.
+
+Departments, stations and firefighters change rarely but are read on almost
+every request, either as lists or as foreign key lookups. They are kept in a
+small LRU cache with a TTL; the create routes invalidate the affected entity
+through the invalidation bus, so the next read on any worker reloads it from
+the database.
+
+Calendar buckets of past date ranges are cached the same way in
+``calendar_cache`` and dropped whenever a schedule or recurrence changes, as
+is the overdue report in ``compliance_cache`` whenever a gear or inspection
+changes. Station dashboards in ``dashboard_cache`` live only briefly and are
+also dropped on any write they summarize.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+from sqlalchemy.orm import Session
+
+import models
+from invalidation import ALL_ENTITIES
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire after ``ttl`` seconds.
+
+    Keys are tuples whose first element names the entity, e.g.
+    ``("station", 3)`` or ``("station", "all")``, so every entry of an entity
+    can be dropped at once with :meth:`invalidate`.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """Return the cached value, calling ``loader`` on a miss.
+
+        ``None`` results are not cached so that a row created later is seen
+        on the next lookup.
+        """
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = loader()
+            if value is not None:
+                self.set(key, value)
+        return value
+
+    def invalidate(self, entity: str) -> None:
+        """Drop every entry belonging to ``entity``"""
+        with self._lock:
+            for key in [k for k in self._data if isinstance(k, tuple) and k[0] == entity]:
+                del self._data[key]
+
+    def invalidate_all(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+            }
+
+
+reference_cache = TTLCache(
+    maxsize=int(os.getenv("REFERENCE_CACHE_SIZE", "2048")),
+    ttl=float(os.getenv("REFERENCE_CACHE_TTL", "300")),
+)
+
+calendar_cache = TTLCache(
+    maxsize=int(os.getenv("CALENDAR_CACHE_SIZE", "256")),
+    ttl=float(os.getenv("CALENDAR_CACHE_TTL", "3600")),
+)
+
+compliance_cache = TTLCache(
+    maxsize=int(os.getenv("COMPLIANCE_CACHE_SIZE", "256")),
+    ttl=float(os.getenv("COMPLIANCE_CACHE_TTL", "3600")),
+)
+
+dashboard_cache = TTLCache(
+    maxsize=int(os.getenv("DASHBOARD_CACHE_SIZE", "512")),
+    ttl=float(os.getenv("DASHBOARD_CACHE_TTL", "60")),
+)
+
+# Entities whose writes can change a calendar bucket
+CALENDAR_ENTITIES = {
+    models.MaintenanceSchedule.__tablename__,
+    models.MaintenanceRecurrence.__tablename__,
+}
+
+
+# Entities whose writes can change the overdue report
+COMPLIANCE_ENTITIES = {
+    models.Gear.__tablename__,
+    models.Inspection.__tablename__,
+}
+
+# Entities whose writes can change a station dashboard
+DASHBOARD_ENTITIES = {
+    models.Department.__tablename__,
+    models.Station.__tablename__,
+    models.Gear.__tablename__,
+    models.Inspection.__tablename__,
+    models.MaintenanceSchedule.__tablename__,
+    models.DamageReport.__tablename__,
+}
+
+
+def _load_row(db: Session, model, entity_id: int) -> Optional[Dict[str, Any]]:
+    row = db.query(*model.__table__.columns).filter(model.id == entity_id).first()
+    return row._asdict() if row is not None else None
+
+
+def get_reference(db: Session, model, entity_id: int) -> Optional[Dict[str, Any]]:
+    """Return a reference row as a dict, or None if it does not exist"""
+    return reference_cache.get_or_load(
+        (model.__tablename__, entity_id),
+        lambda: _load_row(db, model, entity_id),
+    )
+
+
+def list_reference(db: Session, model) -> List[Dict[str, Any]]:
+    """Return every row of a reference table as dicts"""
+    return reference_cache.get_or_load(
+        (model.__tablename__, "all"),
+        lambda: [row._asdict() for row in db.query(*model.__table__.columns).all()],
+    )
+
+
+def handle_invalidation(event) -> None:
+    """Invalidation bus handler evicting the entity named in ``event``"""
+    if event["entity"] == ALL_ENTITIES:
+        reference_cache.invalidate_all()
+        calendar_cache.invalidate_all()
+        compliance_cache.invalidate_all()
+        dashboard_cache.invalidate_all()
+        return
+    reference_cache.invalidate(event["entity"])
+    if event["entity"] in CALENDAR_ENTITIES:
+        calendar_cache.invalidate_all()
+    if event["entity"] in COMPLIANCE_ENTITIES:
+        compliance_cache.invalidate_all()
+    if event["entity"] in DASHBOARD_ENTITIES:
+        dashboard_cache.invalidate_all()
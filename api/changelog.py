@@ -0,0 +1,135 @@
+"""
+Server-side change log for delta sync.
+
+Every write appends a ``ChangeLog`` row in the same transaction, so the log
+and the data can never disagree. ``seq`` is monotonic; ``GET /sync`` returns
+the entities whose latest change is after the client's ``since``.
+
+The log is compacted in two ways:
+- at read time, an entity changed many times is returned once, so a device
+  offline for a week gets one upsert per changed entity, not every event
+- ``compact_change_log`` deletes rows superseded by a newer row for the same
+  entity, which keeps the table as large as the set of entities, not the
+  write history
+
+Maintenance commands, run from the api folder:
+
+    python changelog.py --seed      # log existing rows so since=0 returns them
+    python changelog.py --compact   # drop superseded rows
+"""
+import argparse
+import logging
+from typing import Iterable, List
+
+from sqlalchemy import func, insert, literal, select
+from sqlalchemy.orm import Session
+
+import models
+from database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# Entities the mobile client keeps in sync, by table name
+SYNCED_MODELS = (
+    models.Department,
+    models.Station,
+    models.Firefighter,
+    models.Gear,
+    models.Inspection,
+    models.MaintenanceSchedule,
+    models.MaintenanceReminder,
+    models.MaintenanceRecurrence,
+    models.DamageReport,
+)
+
+
+def record_change(db: Session, model, entity_id: int) -> None:
+    """Log a write to ``model``; call after flush and before commit"""
+    db.add(models.ChangeLog(entity_type=model.__tablename__, entity_id=entity_id))
+
+
+def record_changes(db: Session, model, entity_ids: Iterable[int]) -> None:
+    """Log writes to many rows of ``model`` with one batched INSERT"""
+    rows = [{"entity_type": model.__tablename__, "entity_id": entity_id} for entity_id in entity_ids]
+    if rows:
+        db.execute(insert(models.ChangeLog), rows)
+
+
+def read_changes(db: Session, since: int, limit: int) -> List:
+    """Latest change per entity after ``since``, ordered by that change.
+
+    Returns up to ``limit + 1`` rows of ``(entity_type, entity_id, seq,
+    changed_at)`` so callers can tell whether another page follows.
+    """
+    log = models.ChangeLog
+    latest_seq = func.max(log.seq).label("seq")
+    return (
+        db.query(
+            log.entity_type,
+            log.entity_id,
+            latest_seq,
+            func.max(log.changed_at).label("changed_at"),
+        )
+        .filter(log.seq > since)
+        .group_by(log.entity_type, log.entity_id)
+        .order_by(latest_seq)
+        .limit(limit + 1)
+        .all()
+    )
+
+
+def compact_change_log(db: Session) -> int:
+    """Delete every row that has a newer row for the same entity"""
+    log = models.ChangeLog
+    # Wrapped in a derived table so MySQL accepts a subquery on the same table
+    latest = (
+        select(func.max(log.seq).label("seq"))
+        .group_by(log.entity_type, log.entity_id)
+        .subquery()
+    )
+    deleted = (
+        db.query(log)
+        .filter(log.seq.notin_(select(latest.c.seq)))
+        .delete(synchronize_session=False)
+    )
+    db.commit()
+    return deleted
+
+
+def seed_change_log(db: Session) -> int:
+    """Log rows that predate the change log so a full sync includes them"""
+    log = models.ChangeLog
+    seeded = 0
+    for model in SYNCED_MODELS:
+        entity_type = model.__tablename__
+        logged = select(log.entity_id).where(log.entity_type == entity_type)
+        missing = select(literal(entity_type), model.id, literal(models.utcnow())).where(
+            model.id.notin_(logged)
+        )
+        result = db.execute(
+            insert(log).from_select(["entity_type", "entity_id", "changed_at"], missing)
+        )
+        seeded += result.rowcount or 0
+    db.commit()
+    return seeded
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Change log maintenance")
+    parser.add_argument("--seed", action="store_true", help="log rows that predate the change log")
+    parser.add_argument("--compact", action="store_true", help="delete superseded change rows")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    db = SessionLocal()
+    try:
+        if args.seed:
+            logger.info("Seeded %d change rows", seed_change_log(db))
+        if args.compact:
+            logger.info("Removed %d superseded change rows", compact_change_log(db))
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Overdue-inspection compliance.
+
+Each gear must be inspected within a number of days that depends on its
+``equipment_type``: ``INSPECTION_POLICY_DAYS`` is a JSON object such as
+``{"SCBA": 30, "Helmet": 180}`` and ``INSPECTION_DEFAULT_DAYS`` covers every
+other type. A gear is overdue when it has never been inspected or its latest
+inspection is older than that.
+
+The latest inspection date is kept on ``gear.last_inspected_at`` by every
+inspection insert (``mark_inspected``), so the report is one indexed query
+on the gear table instead of a latest-per-gear scan of all inspections.
+``python compliance.py --backfill`` fills the column for existing data.
+"""
+import argparse
+import json
+import logging
+import os
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.orm import Session
+
+import models
+from database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+def load_policy() -> Dict[str, int]:
+    """Days allowed between inspections, by equipment type"""
+    return {
+        equipment_type: int(days)
+        for equipment_type, days in json.loads(os.getenv("INSPECTION_POLICY_DAYS") or "{}").items()
+    }
+
+
+POLICY_DAYS = load_policy()
+DEFAULT_DAYS = int(os.getenv("INSPECTION_DEFAULT_DAYS", "365"))
+
+
+def mark_inspected(db: Session, inspections: Iterable[models.Inspection]) -> None:
+    """Move ``last_inspected_at`` forward for the inspected gears; does not commit"""
+    latest: Dict[int, date] = {}
+    for row in inspections:
+        if row.inspection_date is not None and row.inspection_date > latest.get(row.gear_id, date.min):
+            latest[row.gear_id] = row.inspection_date
+    gear = models.Gear
+    for gear_id in sorted(latest):
+        inspected = latest[gear_id]
+        (
+            db.query(gear)
+            .filter(gear.id == gear_id, or_(gear.last_inspected_at.is_(None), gear.last_inspected_at < inspected))
+            .update({gear.last_inspected_at: inspected}, synchronize_session=False)
+        )
+
+
+def overdue_filter(today: date, policy: Dict[str, int], default_days: int):
+    """Gears whose last inspection is older than their type allows, or missing"""
+    gear = models.Gear
+
+    def older_than(days: int):
+        return or_(gear.last_inspected_at.is_(None), gear.last_inspected_at < today - timedelta(days=days))
+
+    # One branch per configured type, each served by (equipment_type, last_inspected_at)
+    clauses = [
+        and_(gear.equipment_type == equipment_type, older_than(days))
+        for equipment_type, days in policy.items()
+    ]
+    other_types = or_(gear.equipment_type.is_(None), gear.equipment_type.notin_(list(policy)))
+    clauses.append(and_(other_types, older_than(default_days)))
+    return or_(*clauses)
+
+
+def overdue_by_station(
+    db: Session,
+    today: date,
+    station_id: Optional[int] = None,
+    policy: Optional[Dict[str, int]] = None,
+    default_days: Optional[int] = None,
+) -> List[dict]:
+    """Overdue gears grouped by station, longest overdue (or never inspected) first"""
+    policy = POLICY_DAYS if policy is None else policy
+    default_days = DEFAULT_DAYS if default_days is None else default_days
+    gear = models.Gear
+    query = (
+        db.query(
+            gear.id, gear.gear_name, gear.serial_number, gear.equipment_type, gear.last_inspected_at,
+            gear.station_id, models.Station.name.label("station_name"),
+        )
+        .join(models.Station, models.Station.id == gear.station_id)
+        .filter(overdue_filter(today, policy, default_days))
+    )
+    if station_id is not None:
+        query = query.filter(gear.station_id == station_id)
+
+    stations: Dict[int, dict] = {}
+    for row in query.order_by(gear.station_id, gear.id).all():
+        station = stations.setdefault(
+            row.station_id,
+            {"station_id": row.station_id, "station_name": row.station_name, "overdue": []},
+        )
+        due_date = None
+        if row.last_inspected_at is not None:
+            due_date = row.last_inspected_at + timedelta(days=policy.get(row.equipment_type, default_days))
+        station["overdue"].append({
+            "gear_id": row.id,
+            "gear_name": row.gear_name,
+            "serial_number": row.serial_number,
+            "equipment_type": row.equipment_type,
+            "last_inspected_at": row.last_inspected_at,
+            "due_date": due_date,
+            "days_overdue": (today - due_date).days if due_date else None,
+        })
+    for station in stations.values():
+        station["overdue"].sort(key=lambda item: (item["due_date"] is not None, item["due_date"] or date.min))
+    return list(stations.values())
+
+
+def backfill_last_inspected(db: Session) -> int:
+    """Set ``last_inspected_at`` of every gear from its inspections; returns the rows updated"""
+    inspection = models.Inspection
+    latest = (
+        select(func.max(inspection.inspection_date))
+        .where(inspection.gear_id == models.Gear.id)
+        .scalar_subquery()
+    )
+    updated = db.query(models.Gear).update({models.Gear.last_inspected_at: latest}, synchronize_session=False)
+    db.commit()
+    return updated
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspection compliance maintenance")
+    parser.add_argument("--backfill", action="store_true", help="set gear.last_inspected_at from all inspections")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    db = SessionLocal()
+    try:
+        if args.backfill:
+            logger.info("Updated last_inspected_at on %d gears", backfill_last_inspected(db))
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+"""
+Response compression middleware.
+
+Compresses response bodies with the best encoding the client accepts
+(zstd, brotli or gzip), skipping small bodies, streaming responses and
+content that is already compressed such as uploaded photos. Settings can be
+overridden per route prefix so hot JSON lists and static files are treated
+differently.
+"""
+import gzip
+import os
+from dataclasses import dataclass, replace
+from typing import Dict, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli  # optional: pip install brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard  # optional: pip install zstandard
+except ImportError:
+    zstandard = None
+
+
+# Content types that are already compressed or must be streamed unbuffered
+INCOMPRESSIBLE_TYPES = (
+    "image/",
+    "video/",
+    "audio/",
+    "application/zip",
+    "application/gzip",
+    "application/octet-stream",
+    "text/event-stream",
+)
+
+
+@dataclass(frozen=True)
+class CompressionSettings:
+    """Compression policy for a route prefix.
+
+    Lower levels trade ratio for CPU; the defaults favour fast compression
+    of JSON payloads over the best possible ratio.
+    """
+    enabled: bool = True
+    minimum_size: int = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+    gzip_level: int = int(os.getenv("GZIP_LEVEL", "6"))
+    brotli_quality: int = int(os.getenv("BROTLI_QUALITY", "4"))
+    zstd_level: int = int(os.getenv("ZSTD_LEVEL", "3"))
+
+    def with_options(self, **changes) -> "CompressionSettings":
+        return replace(self, **changes)
+
+
+DEFAULT_SETTINGS = CompressionSettings()
+DISABLED = CompressionSettings(enabled=False)
+
+
+def available_encodings():
+    """Encodings supported by this process, in order of preference"""
+    encodings = []
+    if zstandard is not None:
+        encodings.append("zstd")
+    if brotli is not None:
+        encodings.append("br")
+    encodings.append("gzip")
+    return encodings
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick the best supported encoding from an Accept-Encoding header.
+
+    Honours q-values (``q=0`` rejects an encoding) and ``*``. Ties are broken
+    by server preference. Returns None when the body should be sent as is.
+    """
+    weights = {}
+    for part in accept_encoding.split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[token] = q
+
+    best, best_q = None, 0.0
+    for encoding in available_encodings():
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def compress(body: bytes, encoding: str, settings: CompressionSettings) -> bytes:
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=settings.zstd_level).compress(body)
+    if encoding == "br":
+        return brotli.compress(body, quality=settings.brotli_quality)
+    return gzip.compress(body, compresslevel=settings.gzip_level, mtime=0)
+
+
+class CompressionMiddleware:
+    """ASGI middleware applying :class:`CompressionSettings` per route prefix.
+
+    ``routes`` maps path prefixes to settings; the longest matching prefix
+    wins and unmatched paths use ``default``.
+    """
+
+    def __init__(
+        self,
+        app,
+        routes: Optional[Dict[str, CompressionSettings]] = None,
+        default: CompressionSettings = DEFAULT_SETTINGS,
+    ):
+        self.app = app
+        self.default = default
+        # Longest prefix first so "/gears/photos" beats "/gears"
+        self.routes = sorted((routes or {}).items(), key=lambda item: len(item[0]), reverse=True)
+
+    def settings_for(self, path: str) -> CompressionSettings:
+        for prefix, settings in self.routes:
+            if path == prefix or path.startswith(prefix.rstrip("/") + "/"):
+                return settings
+        return self.default
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        settings = self.settings_for(scope["path"])
+        if not settings.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        responder = _CompressionResponder(self.app, settings, encoding)
+        await responder(scope, receive, send)
+
+
+class _CompressionResponder:
+    def __init__(self, app, settings: CompressionSettings, encoding: Optional[str]):
+        self.app = app
+        self.settings = settings
+        self.encoding = encoding
+        self.send = None
+        self.start_message = None
+        self.passthrough = False
+
+    async def __call__(self, scope, receive, send):
+        self.send = send
+        await self.app(scope, receive, self.send_wrapper)
+
+    async def send_wrapper(self, message):
+        if message["type"] == "http.response.start":
+            # Hold the headers back until we know the body size
+            self.start_message = message
+            return
+
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.send(message)
+            return
+
+        start, self.start_message = self.start_message, None
+        headers = MutableHeaders(raw=start["headers"])
+        body = message.get("body", b"")
+        content_type = headers.get("content-type", "")
+
+        if (
+            message.get("more_body", False)
+            or "content-encoding" in headers
+            or content_type.startswith(INCOMPRESSIBLE_TYPES)
+        ):
+            # Streaming or already-encoded content is forwarded untouched
+            self.passthrough = True
+            await self.send(start)
+            await self.send(message)
+            return
+
+        headers.add_vary_header("Accept-Encoding")
+        if self.encoding is not None and len(body) >= self.settings.minimum_size:
+            body = compress(body, self.encoding, self.settings)
+            headers["Content-Encoding"] = self.encoding
+            headers["Content-Length"] = str(len(body))
+            message = {"type": "http.response.body", "body": body}
+
+        await self.send(start)
+        await self.send(message)
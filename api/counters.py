@@ -0,0 +1,39 @@
+"""
+Counter rows incremented inside the writing transaction.
+
+Rollup and counter tables keep one row per key, e.g. per station and
+status. ``increment`` adds to the row's counters and creates the row on
+first use, safely under concurrent writers:
+- on MySQL with one ``INSERT ... ON DUPLICATE KEY UPDATE``, so two first
+  writers never race between an update and an insert (which under
+  REPEATABLE READ can deadlock on gap locks)
+- elsewhere (SQLite) with an ``UPDATE``, falling back to an insert in a
+  savepoint; a writer losing the insert race retries the update without
+  aborting the surrounding transaction
+"""
+from typing import Any, Dict
+
+from sqlalchemy.dialects import mysql
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+
+def increment(db: Session, model, key: Dict[str, Any], **deltas: int) -> None:
+    """Add ``deltas`` to the counters of the ``model`` row matching ``key``; does not commit"""
+    if db.get_bind().dialect.name == "mysql":
+        columns = model.__table__.c
+        statement = mysql.insert(model.__table__).values(**key, **deltas)
+        db.execute(statement.on_duplicate_key_update(
+            {column: columns[column] + delta for column, delta in deltas.items()}
+        ))
+        return
+    match = [getattr(model, column) == value for column, value in key.items()]
+    values = {getattr(model, column): getattr(model, column) + delta for column, delta in deltas.items()}
+    if db.query(model).filter(*match).update(values, synchronize_session=False):
+        return
+    try:
+        with db.begin_nested():
+            db.add(model(**key, **deltas))
+    except IntegrityError:
+        # A concurrent transaction created the row first
+        db.query(model).filter(*match).update(values, synchronize_session=False)
@@ -0,0 +1,76 @@
+"""
+Damage report counts per station and status.
+
+``damageReportStatusCount`` holds one counter per station and status, moved
+in the transaction that writes the report, so the dashboard badge reads a
+handful of counter rows instead of counting the report table. Reports
+without a status count under ``""``. ``python damage_counters.py
+--backfill`` rebuilds the counters from the reports.
+"""
+import argparse
+import logging
+from typing import Dict, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+import models
+from counters import increment
+from database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+def count_report(db: Session, station_id: int, status: Optional[str], delta: int = 1) -> None:
+    """Move the counter of ``status`` at ``station_id`` by ``delta``; does not commit"""
+    increment(
+        db, models.DamageReportStatusCount,
+        {"station_id": station_id, "status": status or ""},
+        count=delta,
+    )
+
+
+def status_counts(db: Session, station_id: Optional[int] = None) -> Dict[str, int]:
+    """Reports per status, for one station or all of them"""
+    counter = models.DamageReportStatusCount
+    query = db.query(counter.status, func.sum(counter.count))
+    if station_id is not None:
+        query = query.filter(counter.station_id == station_id)
+    return {status: int(count) for status, count in query.group_by(counter.status).all() if count}
+
+
+def backfill_status_counts(db: Session) -> int:
+    """Rebuild every counter from the damage reports; returns the counter rows written"""
+    report = models.DamageReport
+    status = func.coalesce(report.status, "")
+    rows = (
+        db.query(models.Gear.station_id, status, func.count())
+        .join(models.Gear, models.Gear.id == report.gear_id)
+        .group_by(models.Gear.station_id, status)
+        .all()
+    )
+    db.query(models.DamageReportStatusCount).delete(synchronize_session=False)
+    db.add_all(
+        models.DamageReportStatusCount(station_id=station_id, status=row_status, count=count)
+        for station_id, row_status, count in rows
+    )
+    db.commit()
+    return len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Damage report counters")
+    parser.add_argument("--backfill", action="store_true", help="rebuild the counters from all reports")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    db = SessionLocal()
+    try:
+        if args.backfill:
+            logger.info("Rebuilt %d damage report counters", backfill_status_counts(db))
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
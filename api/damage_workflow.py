@@ -0,0 +1,176 @@
+"""
+Damage report status workflow.
+
+A report starts ``pending``, may go ``in_repair`` (and back to ``pending``
+if the repair is put off) and ends ``repaired`` or ``retired``. Every
+change, including the creation, appends a ``damageReportTransition`` row
+and moves the station's status counters in the same transaction, so open
+versus closed counts never need to count the reports. Each repair adds its
+time since the report was created to ``damageRepairRollup`` for
+time-to-repair metrics.
+
+``python damage_workflow.py --backfill`` maps legacy free-text statuses
+onto the workflow, records a creation row for reports without history and
+rebuilds the repair rollups and status counters.
+"""
+import argparse
+import logging
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+import models
+from analytics import month_of
+from counters import increment
+from damage_counters import backfill_status_counts, count_report
+from database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+STATUSES = ("pending", "in_repair", "repaired", "retired")
+OPEN_STATUSES = ("pending", "in_repair")
+TRANSITIONS = {
+    "pending": ("in_repair", "repaired", "retired"),
+    "in_repair": ("pending", "repaired", "retired"),
+    "repaired": (),
+    "retired": (),
+}
+INITIAL_STATUS = "pending"
+
+# Free-text statuses written before the workflow existed
+LEGACY_STATUSES = {
+    "open": "pending",
+    "reported": "pending",
+    "under_review": "pending",
+    "in_progress": "in_repair",
+    "repairing": "in_repair",
+    "fixed": "repaired",
+    "resolved": "repaired",
+    "closed": "repaired",
+    "out_of_service": "retired",
+}
+
+
+def normalize_status(status: Optional[str]) -> Optional[str]:
+    """Workflow state for a stored or typed status, or None if it has none"""
+    key = "_".join((status or "").lower().split())
+    key = LEGACY_STATUSES.get(key, key)
+    return key if key in STATUSES else None
+
+
+def record_created(db: Session, report: models.DamageReport, station_id: int) -> None:
+    """Count a flushed new report and start its history; does not commit"""
+    count_report(db, station_id, report.status)
+    db.add(models.DamageReportTransition(
+        damage_report_id=report.id,
+        to_status=report.status,
+        changed_by=report.reporter_id,
+        changed_at=report.created_at,
+    ))
+
+
+def transition(
+    db: Session,
+    report: models.DamageReport,
+    station_id: int,
+    to_status: str,
+    changed_by: Optional[int] = None,
+    note: Optional[str] = None,
+    now: Optional[datetime] = None,
+) -> models.DamageReportTransition:
+    """Move ``report`` to ``to_status``; does not commit.
+
+    Raises ValueError when the workflow does not allow the change. Lock the
+    report row first so concurrent changes apply one after the other.
+    """
+    from_status = report.status
+    if to_status not in TRANSITIONS.get(from_status, ()):
+        raise ValueError(f"Cannot change a {from_status or 'blank'} damage report to {to_status}")
+    now = now or models.utcnow()
+    report.status = to_status
+    count_report(db, station_id, from_status, -1)
+    count_report(db, station_id, to_status)
+    if to_status == "repaired" and report.created_at is not None:
+        add_repair(db, station_id, report.created_at, now)
+    row = models.DamageReportTransition(
+        damage_report_id=report.id,
+        from_status=from_status,
+        to_status=to_status,
+        changed_by=changed_by,
+        note=note,
+        changed_at=now,
+    )
+    db.add(row)
+    return row
+
+
+def add_repair(db: Session, station_id: int, created_at: datetime, repaired_at: datetime) -> None:
+    """Count one repair into its station and month; does not commit"""
+    seconds = max(int((repaired_at - created_at).total_seconds()), 0)
+    increment(
+        db, models.DamageRepairRollup,
+        {"station_id": station_id, "month": month_of(repaired_at.date())},
+        repairs=1, repair_seconds=seconds,
+    )
+
+
+def backfill_workflow(db: Session) -> int:
+    """Bring existing reports onto the workflow; returns the reports whose status changed"""
+    report = models.DamageReport
+    changed = 0
+    for (status,) in db.query(report.status).distinct().all():
+        normalized = normalize_status(status) or INITIAL_STATUS
+        if normalized != status:
+            changed += (
+                db.query(report)
+                .filter(report.status.is_(None) if status is None else report.status == status)
+                .update({report.status: normalized}, synchronize_session=False)
+            )
+
+    transition_model = models.DamageReportTransition
+    untracked = ~db.query(transition_model.id).filter(transition_model.damage_report_id == report.id).exists()
+    untracked_reports = (
+        db.query(report.id, report.status, report.reporter_id, report.created_at).filter(untracked).all()
+    )
+    db.add_all(
+        transition_model(
+            damage_report_id=id, to_status=status, changed_by=reporter_id,
+            changed_at=created_at or models.utcnow(),
+        )
+        for id, status, reporter_id, created_at in untracked_reports
+    )
+
+    db.query(models.DamageRepairRollup).delete(synchronize_session=False)
+    repairs = (
+        db.query(models.Gear.station_id, report.created_at, transition_model.changed_at)
+        .join(report, report.id == transition_model.damage_report_id)
+        .join(models.Gear, models.Gear.id == report.gear_id)
+        .filter(transition_model.to_status == "repaired", transition_model.from_status.isnot(None))
+        .filter(report.created_at.isnot(None))
+        .order_by(models.Gear.station_id, transition_model.changed_at)
+        .all()
+    )
+    for station_id, created_at, repaired_at in repairs:
+        add_repair(db, station_id, created_at, repaired_at)
+    db.commit()
+    backfill_status_counts(db)
+    return changed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Damage report status workflow")
+    parser.add_argument("--backfill", action="store_true", help="move existing reports onto the workflow")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    db = SessionLocal()
+    try:
+        if args.backfill:
+            logger.info("Mapped %d damage report statuses onto the workflow", backfill_workflow(db))
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Station dashboards.
+
+A dashboard sums up each station's gear count, gear expiring soon, gear with
+overdue maintenance, open damage reports and recent inspections. Any number
+of stations is computed with two grouped queries:
+- one over the gear table for the gear and expiry counts
+- one ``UNION ALL`` of per-station counts over schedules, inspections and
+  the damage report status counters
+
+Maintenance is overdue when a schedule's date has passed and the gear has
+not been inspected since. Results are cached briefly in ``dashboard_cache``
+and dropped whenever one of the underlying entities changes.
+"""
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import case, distinct, func, literal, or_
+from sqlalchemy.orm import Session
+
+import models
+from cache import get_reference, list_reference
+from damage_workflow import OPEN_STATUSES
+
+METRICS = ("gear_count", "expiring_soon", "overdue_maintenance", "open_damage_reports", "recent_inspections")
+
+
+def station_metrics(
+    db: Session, station_ids: List[int], today: date, expiring_within: int, recent_days: int
+) -> Dict[int, Dict[str, int]]:
+    """Dashboard counts of every station in ``station_ids``, by station id"""
+    metrics = {station_id: dict.fromkeys(METRICS, 0) for station_id in station_ids}
+    if not station_ids:
+        return metrics
+    gear = models.Gear
+
+    expiring = case((gear.expiry_date.between(today, today + timedelta(days=expiring_within)), 1), else_=0)
+    for station_id, gear_count, expiring_soon in (
+        db.query(gear.station_id, func.count(), func.sum(expiring))
+        .filter(gear.station_id.in_(station_ids))
+        .group_by(gear.station_id)
+    ):
+        metrics[station_id].update(gear_count=gear_count, expiring_soon=int(expiring_soon or 0))
+
+    schedule = models.MaintenanceSchedule
+    overdue = (
+        db.query(gear.station_id, literal("overdue_maintenance"), func.count(distinct(gear.id)))
+        .join(schedule, schedule.gear_id == gear.id)
+        .filter(gear.station_id.in_(station_ids), schedule.scheduled_date < today)
+        .filter(or_(gear.last_inspected_at.is_(None), gear.last_inspected_at < schedule.scheduled_date))
+        .group_by(gear.station_id)
+    )
+    inspection = models.Inspection
+    inspections = (
+        db.query(gear.station_id, literal("recent_inspections"), func.count())
+        .join(inspection, inspection.gear_id == gear.id)
+        .filter(gear.station_id.in_(station_ids))
+        .filter(inspection.inspection_date.between(today - timedelta(days=recent_days), today))
+        .group_by(gear.station_id)
+    )
+    counter = models.DamageReportStatusCount
+    damage = (
+        db.query(counter.station_id, literal("open_damage_reports"), func.sum(counter.count))
+        .filter(counter.station_id.in_(station_ids), counter.status.in_(OPEN_STATUSES))
+        .group_by(counter.station_id)
+    )
+    for station_id, metric, count in overdue.union_all(inspections, damage):
+        metrics[station_id][metric] = int(count or 0)
+    return metrics
+
+
+def station_dashboard(
+    db: Session, station_id: int, today: date, expiring_within: int, recent_days: int
+) -> Optional[Dict[str, Any]]:
+    """Dashboard of one station, or None if it does not exist"""
+    station = get_reference(db, models.Station, station_id)
+    if station is None:
+        return None
+    metrics = station_metrics(db, [station_id], today, expiring_within, recent_days)[station_id]
+    return {"station_id": station_id, "station_name": station["name"], **metrics}
+
+
+def department_dashboard(
+    db: Session, department_id: int, today: date, expiring_within: int, recent_days: int
+) -> Optional[Dict[str, Any]]:
+    """Totals of a department and the dashboard of each of its stations, or None"""
+    department = get_reference(db, models.Department, department_id)
+    if department is None:
+        return None
+    stations = [
+        station for station in list_reference(db, models.Station)
+        if station["department_id"] == department_id
+    ]
+    metrics = station_metrics(db, [station["id"] for station in stations], today, expiring_within, recent_days)
+    return {
+        "department_id": department_id,
+        "department_name": department["department_name"],
+        **{metric: sum(counts[metric] for counts in metrics.values()) for metric in METRICS},
+        "stations": [
+            {"station_id": station["id"], "station_name": station["name"], **metrics[station["id"]]}
+            for station in sorted(stations, key=lambda station: station["id"])
+        ],
+    }
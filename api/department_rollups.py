@@ -0,0 +1,185 @@
+"""
+Department rollups.
+
+``departmentRollup`` holds one row per department and equipment type with
+gear, expiry, inspection and open damage totals across all the department's
+stations, so regional views read a few rows per department however many
+stations it has. The rows are rebuilt together by a job:
+```bash
+python department_rollups.py               # once, e.g. from cron
+python department_rollups.py --every 300   # keep refreshing
+```
+Every row of a run carries the same ``refreshed_at``, which the endpoints
+return so clients can tell how fresh the figures are.
+
+- expiring soon: expiry date within ``ROLLUP_EXPIRING_DAYS`` (default 30)
+- inspections: the inspection rollups of the last ``ROLLUP_INSPECTION_MONTHS``
+  calendar months (default 12), including the current one
+- open damage: reports pending or in repair
+"""
+import argparse
+import logging
+import os
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+
+import models
+from analytics import month_of
+from damage_workflow import OPEN_STATUSES
+from database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+EXPIRING_DAYS = int(os.getenv("ROLLUP_EXPIRING_DAYS", "30"))
+INSPECTION_MONTHS = int(os.getenv("ROLLUP_INSPECTION_MONTHS", "12"))
+
+COUNTS = ("gear_count", "expiring_soon", "expired", "inspections", "passed", "failed", "open_damage_reports")
+
+
+def months_back(today: date, months: int) -> date:
+    """First day of the month ``months - 1`` months before ``today``'s"""
+    index = today.year * 12 + today.month - months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def refresh_rollups(
+    db: Session,
+    today: Optional[date] = None,
+    expiring_days: int = EXPIRING_DAYS,
+    inspection_months: int = INSPECTION_MONTHS,
+) -> int:
+    """Rebuild every department rollup row; returns the number of rows written"""
+    today = today or date.today()
+    gear = models.Gear
+    station = models.Station
+    equipment_type = func.coalesce(gear.equipment_type, "")
+    rows: Dict[Tuple[int, str], Dict[str, int]] = defaultdict(lambda: dict.fromkeys(COUNTS, 0))
+
+    for department_id, type_, gear_count, expiring_soon, expired in (
+        db.query(
+            station.department_id,
+            equipment_type,
+            func.count(),
+            func.sum(case((gear.expiry_date.between(today, today + timedelta(days=expiring_days)), 1), else_=0)),
+            func.sum(case((gear.expiry_date < today, 1), else_=0)),
+        )
+        .select_from(gear)
+        .join(station, station.id == gear.station_id)
+        .filter(station.department_id.isnot(None))
+        .group_by(station.department_id, equipment_type)
+    ):
+        rows[department_id, type_].update(
+            gear_count=gear_count, expiring_soon=int(expiring_soon or 0), expired=int(expired or 0)
+        )
+
+    rollup = models.InspectionRollup
+    for department_id, type_, total, passed, failed in (
+        db.query(
+            station.department_id,
+            rollup.equipment_type,
+            func.sum(rollup.total),
+            func.sum(rollup.passed),
+            func.sum(rollup.failed),
+        )
+        .select_from(rollup)
+        .join(station, station.id == rollup.station_id)
+        .filter(station.department_id.isnot(None))
+        .filter(rollup.month >= months_back(today, inspection_months), rollup.month <= month_of(today))
+        .group_by(station.department_id, rollup.equipment_type)
+    ):
+        rows[department_id, type_].update(inspections=int(total), passed=int(passed), failed=int(failed))
+
+    report = models.DamageReport
+    for department_id, type_, open_count in (
+        db.query(station.department_id, equipment_type, func.count())
+        .select_from(report)
+        .join(gear, gear.id == report.gear_id)
+        .join(station, station.id == gear.station_id)
+        .filter(station.department_id.isnot(None), report.status.in_(OPEN_STATUSES))
+        .group_by(station.department_id, equipment_type)
+    ):
+        rows[department_id, type_]["open_damage_reports"] = open_count
+
+    refreshed_at = models.utcnow()
+    db.query(models.DepartmentRollup).delete(synchronize_session=False)
+    db.add_all(
+        models.DepartmentRollup(
+            department_id=department_id, equipment_type=type_, refreshed_at=refreshed_at, **counts
+        )
+        for (department_id, type_), counts in rows.items()
+    )
+    db.commit()
+    return len(rows)
+
+
+def _with_pass_rate(counts: Dict[str, Any]) -> Dict[str, Any]:
+    completed = counts["passed"] + counts["failed"]
+    counts["pass_rate"] = counts["passed"] / completed if completed else None
+    return counts
+
+
+def department_rollups(db: Session, department_id: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Totals and per-type rows of every department, or of one, from the rollup table"""
+    department = models.Department
+    query = db.query(department.id, department.department_name)
+    if department_id is not None:
+        query = query.filter(department.id == department_id)
+    departments = query.order_by(department.id).all()
+
+    rollup = models.DepartmentRollup
+    rows = db.query(rollup)
+    if department_id is not None:
+        rows = rows.filter(rollup.department_id == department_id)
+    by_department = defaultdict(list)
+    for row in rows.order_by(rollup.department_id, rollup.equipment_type):
+        by_department[row.department_id].append(row)
+    # Departments without rows were empty at the last run
+    last_run = db.query(func.max(rollup.refreshed_at)).scalar()
+
+    results = []
+    for id, name in departments:
+        types = [
+            _with_pass_rate({
+                "equipment_type": row.equipment_type or None,
+                **{count: getattr(row, count) for count in COUNTS},
+            })
+            for row in by_department[id]
+        ]
+        results.append({
+            "department_id": id,
+            "department_name": name,
+            "refreshed_at": last_run,
+            **_with_pass_rate({count: sum(row[count] for row in types) for count in COUNTS}),
+            "by_equipment_type": types,
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Department rollups")
+    parser.add_argument("--every", type=float, metavar="SECONDS", help="keep refreshing at this interval")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    while True:
+        db = SessionLocal()
+        try:
+            logger.info("Refreshed %d department rollup rows", refresh_rollups(db))
+        except Exception:
+            if not args.every:
+                raise
+            logger.exception("Department rollup refresh failed")
+        finally:
+            db.close()
+        if not args.every:
+            break
+        time.sleep(args.every)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+In-memory firefighter directory for resolving typed reporter names.
+
+Damage reports name their reporter as free text. The directory maps
+``models.normalize_name`` forms to firefighter ids, so "  jane  DOE" finds
+"Jane Doe" without a query, and ranks close names with ``difflib`` when
+nothing matches.
+
+It loads every firefighter once, then stays current from the invalidation
+bus: a firefighter event with an id only queues that id, and the next lookup
+loads the queued rows in one query. Any other firefighter event, or a
+``"*"`` event, reloads everything. A name missing from the directory is
+checked once more against the indexed ``name_normalized`` column before it
+counts as unknown, which covers inserts whose event has not arrived yet.
+"""
+import argparse
+import difflib
+import logging
+import threading
+from typing import Dict, List, Optional, Set
+
+from sqlalchemy.orm import Session
+
+import models
+from database import SessionLocal
+from invalidation import ALL_ENTITIES
+
+logger = logging.getLogger(__name__)
+
+FIREFIGHTER = models.Firefighter.__tablename__
+
+
+class FirefighterDirectory:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._pending: Set[int] = set()
+        self._ids: Dict[str, List[int]] = {}
+        self._names: Dict[int, str] = {}
+
+    def clear(self) -> None:
+        """Forget everything; the next lookup reloads the directory"""
+        with self._lock:
+            self._loaded = False
+            self._pending.clear()
+            self._ids.clear()
+            self._names.clear()
+
+    def handle_event(self, event) -> None:
+        """Invalidation bus handler"""
+        if event["entity"] == ALL_ENTITIES:
+            self.clear()
+        elif event["entity"] == FIREFIGHTER:
+            ids = event.get("ids") or ([event["id"]] if event.get("id") is not None else None)
+            if ids is None:
+                self.clear()
+                return
+            with self._lock:
+                self._pending.update(ids)
+
+    def _add(self, firefighter_id: int, name: str) -> None:
+        ids = self._ids.setdefault(models.normalize_name(name), [])
+        if firefighter_id not in ids:
+            ids.append(firefighter_id)
+            ids.sort()
+        self._names[firefighter_id] = name
+
+    def _refresh(self, db: Session) -> None:
+        firefighter = models.Firefighter
+        with self._lock:
+            if not self._loaded:
+                self._pending.clear()
+                for firefighter_id, name in db.query(firefighter.id, firefighter.name):
+                    self._add(firefighter_id, name)
+                self._loaded = True
+            elif self._pending:
+                pending, self._pending = self._pending, set()
+                for firefighter_id, name in db.query(firefighter.id, firefighter.name).filter(
+                    firefighter.id.in_(pending)
+                ):
+                    self._add(firefighter_id, name)
+
+    def resolve(self, db: Session, name: Optional[str]) -> Optional[int]:
+        """Id of the firefighter with this name, ignoring case and spacing.
+
+        The lowest id wins when several firefighters share a name.
+        """
+        key = models.normalize_name(name)
+        if not key:
+            return None
+        self._refresh(db)
+        ids = self._ids.get(key)
+        if ids:
+            return ids[0]
+        firefighter = models.Firefighter
+        row = (
+            db.query(firefighter.id, firefighter.name)
+            .filter(firefighter.name_normalized == key)
+            .order_by(firefighter.id)
+            .first()
+        )
+        if row is None:
+            return None
+        with self._lock:
+            self._add(row.id, row.name)
+        return row.id
+
+    def name_of(self, firefighter_id: int) -> Optional[str]:
+        return self._names.get(firefighter_id)
+
+    def suggest(self, db: Session, name: Optional[str], limit: int = 3) -> List[str]:
+        """Names closest to ``name``, best match first"""
+        key = models.normalize_name(name)
+        if not key:
+            return []
+        self._refresh(db)
+        matches = difflib.get_close_matches(key, list(self._ids), n=limit, cutoff=0.6)
+        return [self._names[self._ids[match][0]] for match in matches]
+
+
+directory = FirefighterDirectory()
+
+
+def backfill_normalized_names(db: Session) -> int:
+    """Fill ``name_normalized`` on rows written before it existed; returns the count"""
+    firefighter = models.Firefighter
+    rows = db.query(firefighter.id, firefighter.name).filter(firefighter.name_normalized.is_(None)).all()
+    db.bulk_update_mappings(
+        firefighter, [{"id": row.id, "name_normalized": models.normalize_name(row.name)} for row in rows]
+    )
+    db.commit()
+    return len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Firefighter directory maintenance")
+    parser.add_argument("--backfill", action="store_true", help="fill firefighter.name_normalized")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    db = SessionLocal()
+    try:
+        if args.backfill:
+            logger.info("Normalized %d firefighter names", backfill_normalized_names(db))
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -21,13 +21,15 @@ CREATE TABLE Station (
 CREATE TABLE Firefighter (
     id INT AUTO_INCREMENT PRIMARY KEY,
     name VARCHAR(100) NOT NULL,
+    name_normalized VARCHAR(100),
     ranks VARCHAR(50),
     email VARCHAR(100),
     phone VARCHAR(20),
     station_id INT,
     department_id INT,
     FOREIGN KEY (station_id) REFERENCES Station(id),
-    FOREIGN KEY (department_id) REFERENCES Department(id)
+    FOREIGN KEY (department_id) REFERENCES Department(id),
+    INDEX ix_firefighter_name_normalized (name_normalized)
 );
 
 
@@ -41,7 +43,9 @@ CREATE TABLE Gear (
     purchase_date DATE,
     expiry_date DATE,
     status VARCHAR(50),
-    FOREIGN KEY (station_id) REFERENCES Station(id)
+    last_inspected_at DATE,
+    FOREIGN KEY (station_id) REFERENCES Station(id),
+    INDEX ix_gear_type_last_inspected (equipment_type, last_inspected_at)
 );
 
 
@@ -53,8 +57,14 @@ CREATE TABLE Inspection (
     inspection_type VARCHAR(100),
     condition_notes TEXT,
     result VARCHAR(50),
+    client_id VARCHAR(64) UNIQUE,
     FOREIGN KEY (gear_id) REFERENCES Gear(id),
-    FOREIGN KEY (inspector_id) REFERENCES Firefighter(id)
+    FOREIGN KEY (inspector_id) REFERENCES Firefighter(id),
+    INDEX ix_inspection_date (inspection_date, id),
+    INDEX ix_inspection_gear_date (gear_id, inspection_date, id),
+    INDEX ix_inspection_inspector_date (inspector_id, inspection_date, id),
+    INDEX ix_inspection_result_date (result, inspection_date, id),
+    INDEX ix_inspection_type_date (inspection_type, inspection_date, id)
 );
 
 
@@ -63,7 +73,27 @@ CREATE TABLE MaintenanceSchedule (
     gear_id INT,
     scheduled_date DATE,
     scheduled_time TIME NOT NULL DEFAULT '00:00:00',
-    FOREIGN KEY (gear_id) REFERENCES Gear(id)
+    pending BOOLEAN NULL,
+    FOREIGN KEY (gear_id) REFERENCES Gear(id),
+    INDEX ix_maintenanceSchedule_date (scheduled_date, gear_id),
+    UNIQUE KEY uq_maintenanceSchedule_pending (gear_id, pending)
+);
+
+
+CREATE TABLE MaintenanceRecurrence (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    gear_id INT NOT NULL,
+    frequency VARCHAR(10) NOT NULL,
+    `interval` INT NOT NULL DEFAULT 1,
+    weekdays VARCHAR(20),
+    month_day INT,
+    start_date DATE NOT NULL,
+    scheduled_time TIME NOT NULL DEFAULT '00:00:00',
+    until_date DATE,
+    count INT,
+    active BOOLEAN NOT NULL DEFAULT TRUE,
+    FOREIGN KEY (gear_id) REFERENCES Gear(id),
+    INDEX ix_maintenanceRecurrence_gear_id (gear_id)
 );
 
 
@@ -71,12 +101,18 @@ CREATE TABLE MaintenanceReminder (
     id INT AUTO_INCREMENT PRIMARY KEY,
     gear_id INT,
     schedule_id INT,
+    recurrence_id INT,
     reminder_date DATE,
     reminder_time TIME NOT NULL DEFAULT '00:00:00',
     message VARCHAR(255),
     sent BOOLEAN DEFAULT FALSE,
+    updated_at DATETIME(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
     FOREIGN KEY (gear_id) REFERENCES Gear(id),
-    FOREIGN KEY (schedule_id) REFERENCES MaintenanceSchedule(id)
+    FOREIGN KEY (schedule_id) REFERENCES MaintenanceSchedule(id),
+    FOREIGN KEY (recurrence_id) REFERENCES MaintenanceRecurrence(id),
+    UNIQUE KEY uq_maintenanceReminder_occurrence (recurrence_id, reminder_date),
+    INDEX ix_maintenanceReminder_due (sent, reminder_date, reminder_time),
+    INDEX ix_maintenanceReminder_changes (updated_at, id)
 );
 
 
@@ -88,8 +124,81 @@ CREATE TABLE DamageReport (
     notes TEXT,
     photo_url VARCHAR(255),
     status VARCHAR(50),
+    created_at DATETIME(6) DEFAULT CURRENT_TIMESTAMP(6),
     FOREIGN KEY (gear_id) REFERENCES Gear(id),
-    FOREIGN KEY (reporter_id) REFERENCES Firefighter(id)
+    FOREIGN KEY (reporter_id) REFERENCES Firefighter(id),
+    INDEX ix_damageReport_date (report_date, id),
+    INDEX ix_damageReport_status_date (status, report_date, id),
+    INDEX ix_damageReport_gear_date (gear_id, report_date, id)
+);
+
+CREATE TABLE DamageReportStatusCount (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    station_id INT NOT NULL,
+    status VARCHAR(50) NOT NULL DEFAULT '',
+    count INT NOT NULL DEFAULT 0,
+    FOREIGN KEY (station_id) REFERENCES Station(id),
+    UNIQUE KEY uq_damageReportStatusCount_key (station_id, status)
+);
+
+CREATE TABLE DamageReportTransition (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    damage_report_id INT NOT NULL,
+    from_status VARCHAR(50),
+    to_status VARCHAR(50) NOT NULL,
+    changed_by INT,
+    note TEXT,
+    changed_at DATETIME(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6),
+    FOREIGN KEY (damage_report_id) REFERENCES DamageReport(id),
+    FOREIGN KEY (changed_by) REFERENCES Firefighter(id),
+    INDEX ix_damageReportTransition_report (damage_report_id, id)
+);
+
+CREATE TABLE DamageRepairRollup (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    station_id INT NOT NULL,
+    month DATE NOT NULL,
+    repairs INT NOT NULL DEFAULT 0,
+    repair_seconds BIGINT NOT NULL DEFAULT 0,
+    FOREIGN KEY (station_id) REFERENCES Station(id),
+    UNIQUE KEY uq_damageRepairRollup_bucket (station_id, month)
+);
+
+CREATE TABLE InspectionRollup (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    station_id INT NOT NULL,
+    equipment_type VARCHAR(100) NOT NULL DEFAULT '',
+    month DATE NOT NULL,
+    total INT NOT NULL DEFAULT 0,
+    passed INT NOT NULL DEFAULT 0,
+    failed INT NOT NULL DEFAULT 0,
+    FOREIGN KEY (station_id) REFERENCES Station(id),
+    UNIQUE KEY uq_inspectionRollup_bucket (station_id, equipment_type, month),
+    INDEX ix_inspectionRollup_month (month)
+);
+
+CREATE TABLE DepartmentRollup (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    department_id INT NOT NULL,
+    equipment_type VARCHAR(100) NOT NULL DEFAULT '',
+    gear_count INT NOT NULL DEFAULT 0,
+    expiring_soon INT NOT NULL DEFAULT 0,
+    expired INT NOT NULL DEFAULT 0,
+    inspections INT NOT NULL DEFAULT 0,
+    passed INT NOT NULL DEFAULT 0,
+    failed INT NOT NULL DEFAULT 0,
+    open_damage_reports INT NOT NULL DEFAULT 0,
+    refreshed_at DATETIME(6) NOT NULL,
+    FOREIGN KEY (department_id) REFERENCES Department(id),
+    UNIQUE KEY uq_departmentRollup_type (department_id, equipment_type)
+);
+
+CREATE TABLE ChangeLog (
+    seq BIGINT AUTO_INCREMENT PRIMARY KEY,
+    entity_type VARCHAR(50) NOT NULL,
+    entity_id INT NOT NULL,
+    changed_at DATETIME(6) NOT NULL,
+    INDEX ix_changeLog_entity (entity_type, entity_id, seq)
 );
 
 -- ===================================================================
@@ -128,6 +237,9 @@ VALUES
 ('Sang Nuntaphop', 'Firefighter', 'Sang.nuntaphop@gmail.com', '0888888888', 2, 2),
 ('P Pongpon', 'Firefighter', 'P.pongpon@gmail.com', '0888888888', 2, 2),
 ('Pon Phonlaphat', 'Firefighter', 'Pon.phonlaphat@gmail.com', '0888888888', 2, 2);
+
+UPDATE Firefighter SET name_normalized = LOWER(TRIM(name));
+
 -- Gear
 INSERT INTO Gear (station_id, gear_name, serial_number, photo_url, equipment_type, purchase_date, expiry_date)
 VALUES
@@ -158,6 +270,10 @@ VALUES
 (3, '2025-10-14', 1, 'Post-Service', 'Hose replaced and tested', 'Passed'),
 (4, '2025-10-09', 2, 'Routine', 'Gloves slightly worn', 'Passed');
 
+UPDATE Gear SET last_inspected_at = (
+    SELECT MAX(inspection_date) FROM Inspection WHERE Inspection.gear_id = Gear.id
+);
+
 -- MaintenanceSchedule
 INSERT INTO MaintenanceSchedule (gear_id, scheduled_date)
 VALUES
@@ -176,6 +292,35 @@ VALUES
 -- DamageReport
 INSERT INTO DamageReport (gear_id, reporter_id, report_date, notes, photo_url, status)
 VALUES
-(3, 1, '2025-10-15', 'Hose nozzle cracked during use', 'uploads/hose_damage_15oct.jpg', 'Pending'),
-(2, 2, '2025-09-30', 'Tank strap worn out', 'uploads/tank_strap_issue.jpg', 'Resolved'),
-(4, 3, '2025-10-13', 'Burn mark on gloves', 'uploads/gloves_burned.jpg', 'Under Review');
+(3, 1, '2025-10-15', 'Hose nozzle cracked during use', 'uploads/hose_damage_15oct.jpg', 'pending'),
+(2, 2, '2025-09-30', 'Tank strap worn out', 'uploads/tank_strap_issue.jpg', 'repaired'),
+(4, 3, '2025-10-13', 'Burn mark on gloves', 'uploads/gloves_burned.jpg', 'in_repair');
+
+INSERT INTO DamageReportTransition (damage_report_id, from_status, to_status, changed_by)
+SELECT id, NULL, status, reporter_id FROM DamageReport;
+
+-- Counters and rollups kept by the API, seeded to match the rows above
+-- (the same figures damage_counters.py and analytics.py --backfill compute)
+INSERT INTO DamageReportStatusCount (station_id, status, count)
+SELECT Gear.station_id, COALESCE(DamageReport.status, ''), COUNT(*)
+FROM DamageReport
+JOIN Gear ON Gear.id = DamageReport.gear_id
+GROUP BY Gear.station_id, COALESCE(DamageReport.status, '');
+
+INSERT INTO InspectionRollup (station_id, equipment_type, month, total, passed, failed)
+SELECT
+    Gear.station_id,
+    COALESCE(Gear.equipment_type, ''),
+    Inspection.inspection_date - INTERVAL (DAY(Inspection.inspection_date) - 1) DAY,
+    COUNT(*),
+    SUM(CASE WHEN LOWER(TRIM(Inspection.result)) IN ('pass', 'passed') THEN 1 ELSE 0 END),
+    SUM(CASE WHEN LOWER(TRIM(Inspection.result)) IN ('fail', 'failed', 'needs repair') THEN 1 ELSE 0 END)
+FROM Inspection
+JOIN Gear ON Gear.id = Inspection.gear_id
+WHERE Inspection.inspection_date IS NOT NULL
+GROUP BY
+    Gear.station_id,
+    COALESCE(Gear.equipment_type, ''),
+    Inspection.inspection_date - INTERVAL (DAY(Inspection.inspection_date) - 1) DAY;
+
+-- DepartmentRollup is built from these by the job: python department_rollups.py
@@ -0,0 +1,45 @@
+"""
+Production server profile.
+
+Runs several uvicorn workers under gunicorn:
+
+    gunicorn -c gunicorn.conf.py main:app
+
+The app is imported once in the master (preload_app) and the schema check
+runs there before workers fork, so scaling out only pays for the fork.
+"""
+import multiprocessing
+import os
+
+bind = f"{os.getenv('HOST', '0.0.0.0')}:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "uvicorn_worker.UvicornWorker"
+preload_app = True
+
+# Mobile clients reuse connections between polls; keep them open a little
+# longer than uvicorn's default and allow a deep accept queue for bursts.
+keepalive = int(os.getenv("KEEPALIVE", "15"))
+backlog = int(os.getenv("BACKLOG", "2048"))
+timeout = int(os.getenv("WORKER_TIMEOUT", "60"))
+graceful_timeout = 30
+
+# Recycle workers occasionally to cap memory growth
+max_requests = int(os.getenv("MAX_REQUESTS", "10000"))
+max_requests_jitter = 1000
+
+accesslog = "-"
+
+
+def on_starting(server):
+    # Once, in the master, before any worker exists
+    from bootstrap import prepare_runtime
+    prepare_runtime()
+
+
+def post_fork(server, worker):
+    # Pooled connections opened by the master must not be shared by workers
+    from database import engine
+    engine.dispose(close=False)
+    # Each worker needs its own bus origin, or it ignores its siblings' events
+    from invalidation import bus
+    bus.after_fork()
@@ -1,19 +1,47 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-import models
-from database import engine
-from pathlib import Path
+from bootstrap import UPLOAD_DIR, prepare_runtime, runtime_prepared
+from cache import handle_invalidation, reference_cache
+from compression import CompressionMiddleware, DEFAULT_SETTINGS, DISABLED
+from invalidation import bus
+from firefighter_directory import directory
+from push import broker, handle_push
+from reminder_dispatcher import ReminderDispatcher, dispatcher_enabled, dispatcher_horizon
 
 # Import routers
 from routers import departments, stations, firefighters, gears, inspections, schedules, reminders
-from routers import damage_reports
+from routers import damage_reports, sync, events, recurrences, analytics, compliance
 
 
-app = FastAPI(title="GearMate API", version="1.0.0")
+# Evict cached reference data whenever any worker publishes a change
+bus.subscribe(handle_invalidation)
+# Forward pushable changes from any worker to this worker's event streams
+bus.subscribe(handle_push)
+# Keep the reporter name directory current with firefighter writes
+bus.subscribe(directory.handle_event)
 
-# DB tables
-models.Base.metadata.create_all(bind=engine)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Schema check and directories, unless the production master already did it
+    if not runtime_prepared():
+        prepare_runtime()
+    broker.attach(asyncio.get_running_loop())
+    bus.start()
+    dispatcher = ReminderDispatcher(horizon=dispatcher_horizon()) if dispatcher_enabled() else None
+    if dispatcher is not None:
+        dispatcher.start()
+    yield
+    if dispatcher is not None:
+        dispatcher.stop()
+    bus.stop()
+    broker.detach()
+
+
+app = FastAPI(title="GearMate API", version="1.0.0", lifespan=lifespan)
 
 # Configure CORS
 app.add_middleware(
@@ -22,12 +50,24 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
+)
+
+# Compress JSON responses for clients on slow links. Uploaded photos are
+# already compressed, and the large list endpoints use a lower threshold.
+app.add_middleware(
+    CompressionMiddleware,
+    routes={
+        "/uploads": DISABLED,
+        "/gears": DEFAULT_SETTINGS.with_options(minimum_size=512),
+        "/inspections": DEFAULT_SETTINGS.with_options(minimum_size=512),
+        "/damage-reports": DEFAULT_SETTINGS.with_options(minimum_size=512),
+        "/sync": DEFAULT_SETTINGS.with_options(minimum_size=512),
+    },
 )
 
-# Mount static files for uploaded images
-UPLOAD_DIR = Path("uploads")
-UPLOAD_DIR.mkdir(exist_ok=True)
-app.mount("/uploads", StaticFiles(directory=str(UPLOAD_DIR)), name="uploads")
+# Mount static files for uploaded images (the directory is created at startup)
+app.mount("/uploads", StaticFiles(directory=str(UPLOAD_DIR), check_dir=False), name="uploads")
 
 
 @app.get("/")
@@ -42,6 +82,12 @@ async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/cache/stats")
+async def cache_stats():
+    """Hit and miss counters of the reference data cache"""
+    return reference_cache.stats()
+
+
 # Include routers
 app.include_router(departments.router)
 app.include_router(stations.router)
@@ -49,5 +95,10 @@ app.include_router(firefighters.router)
 app.include_router(gears.router)
 app.include_router(inspections.router)
 app.include_router(schedules.router)
+app.include_router(recurrences.router)
 app.include_router(reminders.router)
 app.include_router(damage_reports.router)
+app.include_router(sync.router)
+app.include_router(events.router)
+app.include_router(analytics.router)
+app.include_router(compliance.router)
@@ -0,0 +1,168 @@
+-- Upgrade a database created from an earlier gearmateDB.sql.
+--
+-- The app's create_all only creates missing tables; it never adds columns,
+-- keys or indexes to tables that already exist. Run this once, before
+-- starting the new version and before any of the --backfill commands:
+--   mysql gearmate < migrations/001_upgrade_existing_schema.sql
+
+USE gearmate;
+
+-- ===================================================================
+-- New tables
+-- ===================================================================
+
+CREATE TABLE IF NOT EXISTS MaintenanceRecurrence (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    gear_id INT NOT NULL,
+    frequency VARCHAR(10) NOT NULL,
+    `interval` INT NOT NULL DEFAULT 1,
+    weekdays VARCHAR(20),
+    month_day INT,
+    start_date DATE NOT NULL,
+    scheduled_time TIME NOT NULL DEFAULT '00:00:00',
+    until_date DATE,
+    count INT,
+    active BOOLEAN NOT NULL DEFAULT TRUE,
+    FOREIGN KEY (gear_id) REFERENCES Gear(id),
+    INDEX ix_maintenanceRecurrence_gear_id (gear_id)
+);
+
+CREATE TABLE IF NOT EXISTS DamageReportStatusCount (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    station_id INT NOT NULL,
+    status VARCHAR(50) NOT NULL DEFAULT '',
+    count INT NOT NULL DEFAULT 0,
+    FOREIGN KEY (station_id) REFERENCES Station(id),
+    UNIQUE KEY uq_damageReportStatusCount_key (station_id, status)
+);
+
+CREATE TABLE IF NOT EXISTS DamageReportTransition (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    damage_report_id INT NOT NULL,
+    from_status VARCHAR(50),
+    to_status VARCHAR(50) NOT NULL,
+    changed_by INT,
+    note TEXT,
+    changed_at DATETIME(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6),
+    FOREIGN KEY (damage_report_id) REFERENCES DamageReport(id),
+    FOREIGN KEY (changed_by) REFERENCES Firefighter(id),
+    INDEX ix_damageReportTransition_report (damage_report_id, id)
+);
+
+CREATE TABLE IF NOT EXISTS DamageRepairRollup (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    station_id INT NOT NULL,
+    month DATE NOT NULL,
+    repairs INT NOT NULL DEFAULT 0,
+    repair_seconds BIGINT NOT NULL DEFAULT 0,
+    FOREIGN KEY (station_id) REFERENCES Station(id),
+    UNIQUE KEY uq_damageRepairRollup_bucket (station_id, month)
+);
+
+CREATE TABLE IF NOT EXISTS InspectionRollup (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    station_id INT NOT NULL,
+    equipment_type VARCHAR(100) NOT NULL DEFAULT '',
+    month DATE NOT NULL,
+    total INT NOT NULL DEFAULT 0,
+    passed INT NOT NULL DEFAULT 0,
+    failed INT NOT NULL DEFAULT 0,
+    FOREIGN KEY (station_id) REFERENCES Station(id),
+    UNIQUE KEY uq_inspectionRollup_bucket (station_id, equipment_type, month),
+    INDEX ix_inspectionRollup_month (month)
+);
+
+CREATE TABLE IF NOT EXISTS DepartmentRollup (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    department_id INT NOT NULL,
+    equipment_type VARCHAR(100) NOT NULL DEFAULT '',
+    gear_count INT NOT NULL DEFAULT 0,
+    expiring_soon INT NOT NULL DEFAULT 0,
+    expired INT NOT NULL DEFAULT 0,
+    inspections INT NOT NULL DEFAULT 0,
+    passed INT NOT NULL DEFAULT 0,
+    failed INT NOT NULL DEFAULT 0,
+    open_damage_reports INT NOT NULL DEFAULT 0,
+    refreshed_at DATETIME(6) NOT NULL,
+    FOREIGN KEY (department_id) REFERENCES Department(id),
+    UNIQUE KEY uq_departmentRollup_type (department_id, equipment_type)
+);
+
+CREATE TABLE IF NOT EXISTS ChangeLog (
+    seq BIGINT AUTO_INCREMENT PRIMARY KEY,
+    entity_type VARCHAR(50) NOT NULL,
+    entity_id INT NOT NULL,
+    changed_at DATETIME(6) NOT NULL,
+    INDEX ix_changeLog_entity (entity_type, entity_id, seq)
+);
+
+-- ===================================================================
+-- New columns, keys and indexes on existing tables
+-- ===================================================================
+
+-- Reporter lookups by typed name; fill with python firefighter_directory.py --backfill
+ALTER TABLE Firefighter
+    ADD COLUMN name_normalized VARCHAR(100),
+    ADD INDEX ix_firefighter_name_normalized (name_normalized);
+
+-- Latest inspection per gear; fill with python compliance.py --backfill
+ALTER TABLE Gear
+    ADD COLUMN last_inspected_at DATE,
+    ADD INDEX ix_gear_type_last_inspected (equipment_type, last_inspected_at);
+
+-- Offline batch idempotency and keyset pages of GET /inspections
+ALTER TABLE Inspection
+    ADD COLUMN client_id VARCHAR(64),
+    ADD UNIQUE KEY client_id (client_id),
+    ADD INDEX ix_inspection_date (inspection_date, id),
+    ADD INDEX ix_inspection_gear_date (gear_id, inspection_date, id),
+    ADD INDEX ix_inspection_inspector_date (inspector_id, inspection_date, id),
+    ADD INDEX ix_inspection_result_date (result, inspection_date, id);
+
+-- At most one pending schedule per gear; calendar range reads
+ALTER TABLE MaintenanceSchedule
+    ADD COLUMN pending BOOLEAN NULL,
+    ADD INDEX ix_maintenanceSchedule_date (scheduled_date, gear_id);
+
+-- Mark each gear's earliest upcoming schedule pending before the unique
+-- key goes on, so gears that already had several do not violate it
+UPDATE MaintenanceSchedule AS schedule
+JOIN (
+    SELECT MIN(id) AS id
+    FROM MaintenanceSchedule
+    WHERE scheduled_date >= CURDATE()
+    GROUP BY gear_id
+) AS upcoming ON upcoming.id = schedule.id
+SET schedule.pending = TRUE;
+
+ALTER TABLE MaintenanceSchedule
+    ADD UNIQUE KEY uq_maintenanceSchedule_pending (gear_id, pending);
+
+-- Recurring occurrences, reminder sync tokens and the dispatcher's due scan;
+-- existing reminders take the upgrade time as their first change
+ALTER TABLE MaintenanceReminder
+    ADD COLUMN recurrence_id INT,
+    ADD COLUMN updated_at DATETIME(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+    ADD FOREIGN KEY (recurrence_id) REFERENCES MaintenanceRecurrence(id),
+    ADD UNIQUE KEY uq_maintenanceReminder_occurrence (recurrence_id, reminder_date),
+    ADD INDEX ix_maintenanceReminder_due (sent, reminder_date, reminder_time),
+    ADD INDEX ix_maintenanceReminder_changes (updated_at, id);
+
+-- Creation time for repair times; existing reports keep NULL (unknown)
+-- and only new ones take the default
+ALTER TABLE DamageReport
+    ADD COLUMN created_at DATETIME(6) NULL,
+    ADD INDEX ix_damageReport_date (report_date, id),
+    ADD INDEX ix_damageReport_status_date (status, report_date, id),
+    ADD INDEX ix_damageReport_gear_date (gear_id, report_date, id);
+
+ALTER TABLE DamageReport
+    MODIFY created_at DATETIME(6) NULL DEFAULT CURRENT_TIMESTAMP(6);
+
+-- Then fill the new columns and counters, in this order:
+--   python firefighter_directory.py --backfill
+--   python compliance.py --backfill
+--   python analytics.py --backfill
+--   python damage_workflow.py --backfill
+--   python changelog.py --seed
+--   python department_rollups.py
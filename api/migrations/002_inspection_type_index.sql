@@ -0,0 +1,7 @@
+-- Index for GET /inspections filtered by inspection_type.
+--   mysql gearmate < migrations/002_inspection_type_index.sql
+
+USE gearmate;
+
+ALTER TABLE Inspection
+    ADD INDEX ix_inspection_type_date (inspection_type, inspection_date, id);
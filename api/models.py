@@ -1,9 +1,33 @@
+import unicodedata
+from datetime import datetime, timezone
 from sqlalchemy import (
-    Column, Integer, String, Date, Boolean, ForeignKey, Text, Time
+    Column, Integer, BigInteger, String, Date, DateTime, Boolean, ForeignKey, Text, Time, Index,
+    UniqueConstraint,
 )
+from sqlalchemy.dialects import mysql
 from sqlalchemy.orm import relationship
 from database import Base
 
+
+def utcnow():
+    """Naive UTC timestamp, the convention for DateTime columns"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def normalize_name(name):
+    """Case- and whitespace-insensitive form of a person's name"""
+    if name is None:
+        return None
+    return " ".join(unicodedata.normalize("NFKC", name).split()).casefold()
+
+
+def _normalized_name(context):
+    return normalize_name(context.get_current_parameters().get("name"))
+
+
+# Microsecond precision on MySQL so change tokens order writes reliably
+PreciseDateTime = DateTime().with_variant(mysql.DATETIME(fsp=6), "mysql")
+
 class Department(Base):
     __tablename__ = "department"
 
@@ -33,6 +57,8 @@ class Firefighter(Base):
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     name = Column(String(100), nullable=False)
+    # normalize_name(name), for reporter lookups by typed name
+    name_normalized = Column(String(100), index=True, default=_normalized_name)
     ranks = Column(String(50))
     email = Column(String(100))
     phone = Column(String(20))
@@ -56,13 +82,21 @@ class Gear(Base):
     equipment_type = Column(String(100))
     purchase_date = Column(Date)
     expiry_date = Column(Date)
+    # Latest inspection_date, kept current by inspection inserts (compliance.py)
+    last_inspected_at = Column(Date)
 
     station = relationship("Station", back_populates="gears")
     inspections = relationship("Inspection", back_populates="gear")
     maintenanceSchedules = relationship("MaintenanceSchedule", back_populates="gear")
     maintenanceReminders = relationship("MaintenanceReminder", back_populates="gear")
+    maintenanceRecurrences = relationship("MaintenanceRecurrence", back_populates="gear")
     damageReports = relationship("DamageReport", back_populates="gear")
 
+    __table_args__ = (
+        # Overdue report: per equipment type, last_inspected_at < cutoff
+        Index("ix_gear_type_last_inspected", "equipment_type", "last_inspected_at"),
+    )
+
 
 class Inspection(Base):
     __tablename__ = "inspection"
@@ -74,10 +108,21 @@ class Inspection(Base):
     inspection_type = Column(String(100))
     condition_notes = Column(Text)
     result = Column(String(50))
+    # Set by offline batch submissions so a retried batch is not inserted twice
+    client_id = Column(String(64), unique=True, nullable=True)
 
     gear = relationship("Gear", back_populates="inspections")
     inspector = relationship("Firefighter", back_populates="inspections")
 
+    __table_args__ = (
+        # Keyset pages of GET /inspections, newest first, with and without filters
+        Index("ix_inspection_date", "inspection_date", "id"),
+        Index("ix_inspection_gear_date", "gear_id", "inspection_date", "id"),
+        Index("ix_inspection_inspector_date", "inspector_id", "inspection_date", "id"),
+        Index("ix_inspection_result_date", "result", "inspection_date", "id"),
+        Index("ix_inspection_type_date", "inspection_type", "inspection_date", "id"),
+    )
+
 
 class MaintenanceSchedule(Base):
     __tablename__ = "maintenanceSchedule"
@@ -86,10 +131,19 @@ class MaintenanceSchedule(Base):
     gear_id = Column(Integer, ForeignKey("gear.id"))
     scheduled_date = Column(Date)
     scheduled_time = Column(Time, nullable=False, default="00:00:00")
+    # TRUE while upcoming, NULL once past; see scheduling.py
+    pending = Column(Boolean, nullable=True)
 
     gear = relationship("Gear", back_populates="maintenanceSchedules")
     reminder = relationship("MaintenanceReminder", back_populates="schedule", uselist=False)
 
+    __table_args__ = (
+        # Calendar range reads: scheduled_date BETWEEN :from AND :to
+        Index("ix_maintenanceSchedule_date", "scheduled_date", "gear_id"),
+        # At most one pending schedule per gear; NULLs do not collide
+        UniqueConstraint("gear_id", "pending", name="uq_maintenanceSchedule_pending"),
+    )
+
 
 class MaintenanceReminder(Base):
     __tablename__ = "maintenanceReminder"
@@ -97,13 +151,52 @@ class MaintenanceReminder(Base):
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     gear_id = Column(Integer, ForeignKey("gear.id"))
     schedule_id = Column(Integer, ForeignKey("maintenanceSchedule.id"), nullable=True) 
+    recurrence_id = Column(Integer, ForeignKey("maintenanceRecurrence.id"), nullable=True)
     reminder_date = Column(Date)
     reminder_time = Column(Time, nullable=False, default="00:00:00")
     message = Column(String(255))
     sent = Column(Boolean, default=False)
+    # Bumped on every insert and update; drives GET /reminders/changes
+    updated_at = Column(PreciseDateTime, nullable=False, default=utcnow, onupdate=utcnow)
 
     gear = relationship("Gear", back_populates="maintenanceReminders")
     schedule = relationship("MaintenanceSchedule", back_populates="reminder")
+    recurrence = relationship("MaintenanceRecurrence", back_populates="reminders")
+
+    __table_args__ = (
+        # Due scan of the dispatcher: sent = false AND reminder_date <= today
+        Index("ix_maintenanceReminder_due", "sent", "reminder_date", "reminder_time"),
+        Index("ix_maintenanceReminder_changes", "updated_at", "id"),
+        # One materialized reminder per occurrence of a recurring schedule
+        UniqueConstraint("recurrence_id", "reminder_date", name="uq_maintenanceReminder_occurrence"),
+    )
+
+
+class MaintenanceRecurrence(Base):
+    """A recurring maintenance series for one gear, expanded by ``recurrence.py``.
+
+    ``frequency`` is daily, weekly, monthly or yearly, repeated every
+    ``interval`` periods from ``start_date``. Weekly rules fall on
+    ``weekdays`` (comma separated, Monday is 0), monthly and yearly rules on
+    ``month_day``; both default to the start date's. The series ends at
+    ``until_date`` or after ``count`` occurrences, whichever comes first.
+    """
+    __tablename__ = "maintenanceRecurrence"
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    gear_id = Column(Integer, ForeignKey("gear.id"), nullable=False, index=True)
+    frequency = Column(String(10), nullable=False)
+    interval = Column(Integer, nullable=False, default=1)
+    weekdays = Column(String(20))
+    month_day = Column(Integer)
+    start_date = Column(Date, nullable=False)
+    scheduled_time = Column(Time, nullable=False, default="00:00:00")
+    until_date = Column(Date)
+    count = Column(Integer)
+    active = Column(Boolean, nullable=False, default=True)
+
+    gear = relationship("Gear", back_populates="maintenanceRecurrences")
+    reminders = relationship("MaintenanceReminder", back_populates="recurrence")
 
 
 class DamageReport(Base):
@@ -115,7 +208,143 @@ class DamageReport(Base):
     report_date = Column(Date)
     notes = Column(Text)
     photo_url = Column(String(255))
+    # pending, in_repair, repaired or retired; see damage_workflow.py
     status = Column(String(50))
+    created_at = Column(PreciseDateTime, default=utcnow)
 
     gear = relationship("Gear", back_populates="damageReports")
-    reporter = relationship("Firefighter", back_populates="damageReports")
\ No newline at end of file
+    reporter = relationship("Firefighter", back_populates="damageReports")
+    transitions = relationship(
+        "DamageReportTransition", back_populates="report", order_by="DamageReportTransition.id"
+    )
+
+    __table_args__ = (
+        # Keyset pages of GET /damage-reports, newest first, with and without filters
+        Index("ix_damageReport_date", "report_date", "id"),
+        Index("ix_damageReport_status_date", "status", "report_date", "id"),
+        Index("ix_damageReport_gear_date", "gear_id", "report_date", "id"),
+    )
+
+
+class DamageReportStatusCount(Base):
+    """Damage reports per station and status, kept by ``damage_counters.py``.
+
+    Reports without a status count under ``""``.
+    """
+    __tablename__ = "damageReportStatusCount"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    station_id = Column(Integer, ForeignKey("station.id"), nullable=False)
+    status = Column(String(50), nullable=False, default="")
+    count = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        UniqueConstraint("station_id", "status", name="uq_damageReportStatusCount_key"),
+    )
+
+
+class DamageReportTransition(Base):
+    """Append-only history of damage report status changes.
+
+    The first row of a report records its creation, with ``from_status``
+    unset.
+    """
+    __tablename__ = "damageReportTransition"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    damage_report_id = Column(Integer, ForeignKey("damageReport.id"), nullable=False)
+    from_status = Column(String(50))
+    to_status = Column(String(50), nullable=False)
+    changed_by = Column(Integer, ForeignKey("firefighter.id"))
+    note = Column(Text)
+    changed_at = Column(PreciseDateTime, nullable=False, default=utcnow)
+
+    report = relationship("DamageReport", back_populates="transitions")
+
+    __table_args__ = (
+        Index("ix_damageReportTransition_report", "damage_report_id", "id"),
+    )
+
+
+class DamageRepairRollup(Base):
+    """Repaired damage reports per station and month of repair.
+
+    ``repair_seconds`` sums the time from report creation to repair, so the
+    average time to repair is ``repair_seconds / repairs``.
+    """
+    __tablename__ = "damageRepairRollup"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    station_id = Column(Integer, ForeignKey("station.id"), nullable=False)
+    month = Column(Date, nullable=False)  # first day of the month
+    repairs = Column(Integer, nullable=False, default=0)
+    repair_seconds = Column(BigInteger, nullable=False, default=0)
+
+    __table_args__ = (
+        UniqueConstraint("station_id", "month", name="uq_damageRepairRollup_bucket"),
+    )
+
+
+class InspectionRollup(Base):
+    """Inspection counts per station, equipment type and month.
+
+    Kept current by every inspection insert and rebuilt by
+    ``python analytics.py --backfill``; see ``analytics.py``. Gears without
+    an equipment type count under ``""``.
+    """
+    __tablename__ = "inspectionRollup"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    station_id = Column(Integer, ForeignKey("station.id"), nullable=False)
+    equipment_type = Column(String(100), nullable=False, default="")
+    month = Column(Date, nullable=False)  # first day of the month
+    total = Column(Integer, nullable=False, default=0)
+    passed = Column(Integer, nullable=False, default=0)
+    failed = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        UniqueConstraint("station_id", "equipment_type", "month", name="uq_inspectionRollup_bucket"),
+        Index("ix_inspectionRollup_month", "month"),
+    )
+
+
+class DepartmentRollup(Base):
+    """Department totals per equipment type, rebuilt by ``department_rollups.py``.
+
+    Gears without an equipment type count under ``""``.
+    """
+    __tablename__ = "departmentRollup"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    department_id = Column(Integer, ForeignKey("department.id"), nullable=False)
+    equipment_type = Column(String(100), nullable=False, default="")
+    gear_count = Column(Integer, nullable=False, default=0)
+    expiring_soon = Column(Integer, nullable=False, default=0)
+    expired = Column(Integer, nullable=False, default=0)
+    inspections = Column(Integer, nullable=False, default=0)
+    passed = Column(Integer, nullable=False, default=0)
+    failed = Column(Integer, nullable=False, default=0)
+    open_damage_reports = Column(Integer, nullable=False, default=0)
+    refreshed_at = Column(PreciseDateTime, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("department_id", "equipment_type", name="uq_departmentRollup_type"),
+    )
+
+
+class ChangeLog(Base):
+    """One row per committed write, in the same transaction as the write.
+
+    ``seq`` is the monotonic position clients sync from. Superseded rows of
+    the same entity are removed by ``changelog.compact_change_log``.
+    """
+    __tablename__ = "changeLog"
+
+    seq = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    entity_type = Column(String(50), nullable=False)
+    entity_id = Column(Integer, nullable=False)
+    changed_at = Column(PreciseDateTime, nullable=False, default=utcnow)
+
+    __table_args__ = (
+        Index("ix_changeLog_entity", "entity_type", "entity_id", "seq"),
+    )
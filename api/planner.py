@@ -0,0 +1,127 @@
+"""
+Capacity-aware maintenance slot planner.
+
+Each station services at most ``capacity`` gears per slot (a date and a
+time of day). Gears are planned station by station, earliest deadline
+first, into the earliest slot that still has room after the schedules
+already booked. A gear's deadline is the earlier of its ``expiry_date`` and
+its last inspection plus the inspection interval; gears with neither are
+planned last. For unit-length jobs on identical slots, earliest deadline
+first minimizes the worst lateness, and the whole plan is one sort per
+station plus a single pass over the slots.
+"""
+from collections import defaultdict
+from datetime import date, time, timedelta
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+import models
+
+Slot = Tuple[date, time]
+
+
+class PlanGear(NamedTuple):
+    gear_id: int
+    station_id: int
+    deadline: Optional[date]
+
+
+class Assignment(NamedTuple):
+    gear_id: int
+    station_id: int
+    scheduled_date: date
+    scheduled_time: time
+    deadline: Optional[date]
+    late: bool
+
+
+def build_slots(
+    start_date: date, end_date: date, slot_times: Iterable[time], weekdays: Optional[Iterable[int]] = None
+) -> List[Slot]:
+    """Every slot in the window, in time order, on the allowed weekdays"""
+    times = sorted(set(slot_times))
+    allowed = set(weekdays) if weekdays else set(range(7))
+    slots = []
+    day = start_date
+    while day <= end_date:
+        if day.weekday() in allowed:
+            slots.extend((day, slot_time) for slot_time in times)
+        day += timedelta(days=1)
+    return slots
+
+
+def load_gears(
+    db: Session, station_by_gear: Dict[int, int], inspection_interval: timedelta
+) -> List[PlanGear]:
+    """Gears with their deadlines, from one grouped query"""
+    if not station_by_gear:
+        return []
+    gear = models.Gear
+    inspection = models.Inspection
+    rows = (
+        db.query(gear.id, gear.expiry_date, func.max(inspection.inspection_date))
+        .outerjoin(inspection, inspection.gear_id == gear.id)
+        .filter(gear.id.in_(list(station_by_gear)))
+        .group_by(gear.id, gear.expiry_date)
+        .all()
+    )
+    gears = []
+    for gear_id, expiry_date, last_inspected in rows:
+        deadlines = [d for d in (expiry_date, last_inspected and last_inspected + inspection_interval) if d]
+        gears.append(PlanGear(gear_id, station_by_gear[gear_id], min(deadlines) if deadlines else None))
+    return gears
+
+
+def load_booked(db: Session, station_ids: Iterable[int], start_date: date, end_date: date) -> Dict[tuple, int]:
+    """Schedules already booked per ``(station_id, date, time)`` in the window"""
+    schedule = models.MaintenanceSchedule
+    rows = (
+        db.query(models.Gear.station_id, schedule.scheduled_date, schedule.scheduled_time, func.count())
+        .join(models.Gear, models.Gear.id == schedule.gear_id)
+        .filter(
+            models.Gear.station_id.in_(list(station_ids)),
+            schedule.scheduled_date.between(start_date, end_date),
+        )
+        .group_by(models.Gear.station_id, schedule.scheduled_date, schedule.scheduled_time)
+        .all()
+    )
+    return {(station_id, day, slot_time): count for station_id, day, slot_time, count in rows}
+
+
+def plan_slots(
+    gears: Iterable[PlanGear],
+    slots: List[Slot],
+    capacity: Dict[int, int],
+    default_capacity: int = 1,
+    booked: Optional[Dict[tuple, int]] = None,
+) -> Tuple[List[Assignment], List[int]]:
+    """Assign gears to slots; returns the assignments and the gears that did not fit"""
+    booked = booked or {}
+    by_station = defaultdict(list)
+    for gear in gears:
+        by_station[gear.station_id].append(gear)
+
+    assignments: List[Assignment] = []
+    unassigned: List[int] = []
+    for station_id, station_gears in by_station.items():
+        station_gears.sort(key=lambda g: (g.deadline is None, g.deadline or date.max, g.gear_id))
+        per_slot = capacity.get(station_id, default_capacity)
+        queue = iter(station_gears)
+        pending = next(queue, None)
+        for day, slot_time in slots:
+            if pending is None:
+                break
+            free = per_slot - booked.get((station_id, day, slot_time), 0)
+            while free > 0 and pending is not None:
+                late = pending.deadline is not None and day > pending.deadline
+                assignments.append(
+                    Assignment(pending.gear_id, station_id, day, slot_time, pending.deadline, late)
+                )
+                free -= 1
+                pending = next(queue, None)
+        if pending is not None:
+            unassigned.append(pending.gear_id)
+            unassigned.extend(g.gear_id for g in queue)
+    return assignments, sorted(unassigned)
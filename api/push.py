@@ -0,0 +1,158 @@
+"""
+Real-time push of entity changes to connected devices.
+
+Write paths already publish entity-change events on the invalidation bus
+(see ``invalidation.py``). Every worker hands the events it receives to a
+``PushBroker``, which fans them out to the Server-Sent Events streams open on
+that worker, filtered by station or department.
+
+Each stream is one coroutine waiting on a small bounded queue, so thousands
+of idle connections cost little more than their sockets. A consumer that
+falls behind is not allowed to buffer without limit. When its queue fills,
+its pending events are dropped and it receives a ``resync`` event and is
+disconnected. The client then catches up with ``GET /sync`` and reconnects.
+Every stream gets the same ``resync`` when the bus asks to drop everything
+(``ALL_ENTITIES``, e.g. after a reconnect), since changes may have been
+missed.
+"""
+import asyncio
+import json
+import logging
+import os
+from typing import Any, AsyncIterator, Dict, Optional, Set
+
+from sqlalchemy.orm import Session
+
+import models
+from cache import get_reference
+from invalidation import ALL_ENTITIES
+
+logger = logging.getLogger(__name__)
+
+# Entities devices need to hear about without polling
+PUSHED_ENTITIES = {
+    models.DamageReport.__tablename__,
+    models.MaintenanceSchedule.__tablename__,
+    models.MaintenanceReminder.__tablename__,
+    models.Inspection.__tablename__,
+}
+
+QUEUE_SIZE = int(os.getenv("PUSH_QUEUE_SIZE", "100"))
+KEEPALIVE_SECONDS = float(os.getenv("PUSH_KEEPALIVE_SECONDS", "15"))
+
+_RESYNC = object()
+
+
+class Subscriber:
+    """One open stream and the events waiting to be written to it"""
+
+    def __init__(self, station_id: Optional[int], department_id: Optional[int], queue_size: int):
+        self.station_id = station_id
+        self.department_id = department_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+
+    def matches(self, event: Dict[str, Any]) -> bool:
+        if self.station_id is not None and event.get("station_id") != self.station_id:
+            return False
+        if self.department_id is not None and event.get("department_id") != self.department_id:
+            return False
+        return True
+
+    def offer(self, event: Dict[str, Any]) -> None:
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Slow consumer: tell it to resync
+            self.resync()
+
+    def resync(self) -> None:
+        """Drop what the stream has not read and end it with a ``resync`` event"""
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(_RESYNC)
+
+
+class PushBroker:
+    """Fans out change events to the subscribers of this process.
+
+    ``publish`` may be called from any thread (sync route handlers, the
+    invalidation bus listener); delivery always happens on the event loop
+    attached with :meth:`attach`.
+    """
+
+    def __init__(self, queue_size: int = QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscribers: Set[Subscriber] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def attach(self, loop: asyncio.AbstractEventLoop) -> None:
+        self._loop = loop
+
+    def detach(self) -> None:
+        self._loop = None
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self, station_id: Optional[int] = None, department_id: Optional[int] = None) -> Subscriber:
+        subscriber = Subscriber(station_id, department_id, self.queue_size)
+        self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        self._subscribers.discard(subscriber)
+
+    def publish(self, event: Dict[str, Any]) -> None:
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self._fan_out(event)
+        else:
+            loop.call_soon_threadsafe(self._fan_out, event)
+
+    def _fan_out(self, event: Dict[str, Any]) -> None:
+        for subscriber in list(self._subscribers):
+            if event.get("entity") == ALL_ENTITIES:
+                subscriber.resync()
+            elif subscriber.matches(event):
+                subscriber.offer(event)
+
+
+broker = PushBroker()
+
+
+def handle_push(event: Dict[str, Any]) -> None:
+    """Invalidation bus handler forwarding pushable changes and resyncs to the broker"""
+    if event.get("entity") in PUSHED_ENTITIES or event.get("entity") == ALL_ENTITIES:
+        broker.publish(event)
+
+
+def gear_scope(db: Session, gear_id: Optional[int]) -> Dict[str, Optional[int]]:
+    """Station and department of a gear, used to filter pushed events"""
+    station_id = db.query(models.Gear.station_id).filter(models.Gear.id == gear_id).scalar()
+    station = get_reference(db, models.Station, station_id) if station_id is not None else None
+    return {
+        "station_id": station_id,
+        "department_id": station["department_id"] if station else None,
+    }
+
+
+async def event_stream(subscriber: Subscriber, keepalive: float = KEEPALIVE_SECONDS) -> AsyncIterator[str]:
+    """Server-Sent Events for one subscriber, with periodic keep-alives"""
+    yield f"retry: {int(keepalive * 1000)}\n\n"
+    while True:
+        try:
+            event = await asyncio.wait_for(subscriber.queue.get(), timeout=keepalive)
+        except asyncio.TimeoutError:
+            yield ": keep-alive\n\n"
+            continue
+        if event is _RESYNC:
+            yield "event: resync\ndata: {}\n\n"
+            return
+        yield f"event: change\ndata: {json.dumps(event, default=str)}\n\n"
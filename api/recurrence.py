@@ -0,0 +1,188 @@
+"""
+Recurring maintenance rules.
+
+A ``MaintenanceRecurrence`` row describes a whole series, e.g. "every month
+on the 1st" or "every 2 weeks on Monday and Thursday", instead of one
+schedule row per occurrence. Occurrences are computed on demand:
+- ``expand`` yields the dates of a rule inside a window, jumping straight to
+  the window for rules without a count
+- the reminder dispatcher materializes reminders only for occurrences inside
+  its horizon (``materialize_reminders``), one per rule and date, guarded by
+  the unique ``(recurrence_id, reminder_date)`` key
+
+Monthly and yearly rules on a day a month does not have (31st, 29 February)
+fall on that month's last day.
+"""
+import calendar
+import logging
+from datetime import date, datetime, timedelta
+from typing import Iterator, List, Optional
+
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+import models
+from changelog import record_changes
+
+logger = logging.getLogger(__name__)
+
+FREQUENCIES = ("daily", "weekly", "monthly", "yearly")
+
+# Most periods one expansion walks, whatever the window or the rule's count
+MAX_PERIODS = 10000
+
+
+def parse_weekdays(value: Optional[str]) -> List[int]:
+    """``"0,3"`` -> ``[0, 3]`` (Monday is 0)"""
+    if not value:
+        return []
+    return sorted({int(day) for day in value.split(",") if day.strip()})
+
+
+def format_weekdays(days: Optional[List[int]]) -> Optional[str]:
+    return ",".join(str(day) for day in sorted(set(days))) if days else None
+
+
+def _add_months(year: int, month: int, months: int):
+    index = year * 12 + (month - 1) + months
+    return index // 12, index % 12 + 1
+
+
+def _on_day(year: int, month: int, day: int) -> date:
+    return date(year, month, min(day, calendar.monthrange(year, month)[1]))
+
+
+def _periods_between(rule, start: date, day: date) -> int:
+    """Whole periods of the rule between its start and ``day`` (floor)"""
+    if rule.frequency == "daily":
+        return (day - start).days // rule.interval
+    if rule.frequency == "weekly":
+        start_week = start - timedelta(days=start.weekday())
+        day_week = day - timedelta(days=day.weekday())
+        return (day_week - start_week).days // 7 // rule.interval
+    months = (day.year - start.year) * 12 + day.month - start.month
+    if rule.frequency == "monthly":
+        return months // rule.interval
+    return months // 12 // rule.interval
+
+
+def _period_dates(rule, start: date, period: int) -> List[date]:
+    """Occurrence dates of one period, ascending"""
+    step = period * rule.interval
+    if rule.frequency == "daily":
+        return [start + timedelta(days=step)]
+    if rule.frequency == "weekly":
+        week = start - timedelta(days=start.weekday()) + timedelta(weeks=step)
+        days = parse_weekdays(rule.weekdays) or [start.weekday()]
+        return [week + timedelta(days=day) for day in days]
+    day = rule.month_day or start.day
+    if rule.frequency == "monthly":
+        year, month = _add_months(start.year, start.month, step)
+        return [_on_day(year, month, day)]
+    return [_on_day(start.year + step, start.month, day)]
+
+
+def expand(rule, window_start: date, window_end: date) -> Iterator[date]:
+    """Lazily yield the occurrence dates of ``rule`` within the window.
+
+    Honors the rule's ``until_date`` and ``count``. Rules with a count are
+    walked from their first occurrence so the count is exact; the others
+    start at the period containing ``window_start``. Either way the walk
+    stops after ``MAX_PERIODS`` periods.
+    """
+    start = rule.start_date
+    end = min(window_end, rule.until_date) if rule.until_date else window_end
+    if end < start or end < window_start:
+        return
+    first_period = 0
+    if not rule.count and window_start > start:
+        first_period = max(_periods_between(rule, start, window_start), 0)
+    seen = 0
+    for period in range(first_period, first_period + MAX_PERIODS):
+        for day in _period_dates(rule, start, period):
+            if day < start:
+                continue
+            if day > end:
+                return
+            seen += 1
+            if day >= window_start:
+                yield day
+            if rule.count and seen >= rule.count:
+                return
+
+
+def next_occurrence(rule, on_or_after: date) -> Optional[date]:
+    """First occurrence on or after ``on_or_after``, or None if the series ended"""
+    horizon = on_or_after + timedelta(days=366 * max(rule.interval, 1) + 31)
+    return next(expand(rule, on_or_after, horizon), None)
+
+
+def active_filter(today: date):
+    """Rules that may still have occurrences from ``today`` on"""
+    rule = models.MaintenanceRecurrence
+    return (
+        rule.active == True,  # noqa: E712 - SQL comparison
+        or_(rule.until_date.is_(None), rule.until_date >= today),
+    )
+
+
+def reminder_message(gear_id: int) -> str:
+    return f"Maintenance scheduled for gear {gear_id}"
+
+
+def materialize_reminders(db: Session, now: datetime, until: datetime) -> List[int]:
+    """Insert reminders for occurrences between ``now`` and ``until`` that lack one.
+
+    Returns the new reminder ids. Several dispatchers may race here; the
+    unique ``(recurrence_id, reminder_date)`` key lets only one insert win.
+    """
+    rule_model = models.MaintenanceRecurrence
+    reminder = models.MaintenanceReminder
+    rules = (
+        db.query(rule_model)
+        .filter(rule_model.start_date <= until.date(), *active_filter(now.date()))
+        .all()
+    )
+    wanted = []
+    for rule in rules:
+        for day in expand(rule, now.date(), until.date()):
+            if datetime.combine(day, rule.scheduled_time) <= until:
+                wanted.append((rule, day))
+    if not wanted:
+        return []
+
+    existing = set(
+        db.query(reminder.recurrence_id, reminder.reminder_date)
+        .filter(
+            reminder.recurrence_id.in_({rule.id for rule, _ in wanted}),
+            reminder.reminder_date.between(now.date(), until.date()),
+        )
+        .all()
+    )
+    new_reminders = [
+        models.MaintenanceReminder(
+            gear_id=rule.gear_id,
+            recurrence_id=rule.id,
+            reminder_date=day,
+            reminder_time=rule.scheduled_time,
+            message=reminder_message(rule.gear_id),
+            sent=False,
+        )
+        for rule, day in wanted
+        if (rule.id, day) not in existing
+    ]
+    if not new_reminders:
+        return []
+    try:
+        db.add_all(new_reminders)
+        db.flush()
+        reminder_ids = [row.id for row in new_reminders]
+        record_changes(db, models.MaintenanceReminder, reminder_ids)
+        db.commit()
+    except IntegrityError:
+        # Another dispatcher materialized the same occurrences first
+        db.rollback()
+        logger.info("Recurring reminders already materialized elsewhere")
+        return []
+    return reminder_ids
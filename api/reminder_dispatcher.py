@@ -0,0 +1,289 @@
+"""
+Server-side maintenance reminder dispatcher.
+
+Keeps the reminders due within a rolling horizon in an in-memory timer queue
+(see ``reminder_timers.py``) and sleeps until the next one is due. New
+reminders reach the queue through the invalidation bus. The queue is rebuilt
+from the ``(sent, reminder_date, reminder_time)`` index on start and every
+half horizon, so a restarted dispatcher picks up whatever was left unsent.
+
+When reminders fire they are claimed with ``SELECT ... FOR UPDATE SKIP
+LOCKED``, handed to a sink for delivery and marked sent with one bulk UPDATE
+in the same transaction. Several dispatchers (one per worker or container)
+can hold the same reminders in their queues; only the first to claim one
+delivers it. If delivery fails the transaction is rolled back and the
+reminders are retried at the next rebuild.
+
+Run it standalone:
+
+    python reminder_dispatcher.py
+
+or set ``REMINDER_DISPATCHER=1`` to run it in a thread of each API worker.
+"""
+import argparse
+import logging
+from abc import ABC, abstractmethod
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, List, Optional
+
+from sqlalchemy.orm import Session
+
+import models
+from changelog import record_changes
+from database import SessionLocal
+from invalidation import ALL_ENTITIES, bus, publish_change
+from recurrence import materialize_reminders
+from reminder_timers import ReminderTimerQueue, due_filter
+
+logger = logging.getLogger(__name__)
+
+
+class ReminderSink(ABC):
+    """Delivery backend for due reminders.
+
+    ``deliver`` receives rows with ``id``, ``gear_id``, ``schedule_id``,
+    ``reminder_date``, ``reminder_time`` and ``message``. Raising an exception
+    leaves the whole batch unsent.
+    """
+
+    @abstractmethod
+    def deliver(self, reminders: List) -> None:
+        """Deliver one batch of due reminders"""
+
+
+class LoggingSink(ReminderSink):
+    """Writes each reminder to the log; the default until a push sink exists"""
+
+    def deliver(self, reminders: List) -> None:
+        for reminder in reminders:
+            logger.info(
+                "Reminder %s for gear %s: %s",
+                reminder.id, reminder.gear_id, reminder.message,
+            )
+
+
+CLAIM_COLUMNS = (
+    models.MaintenanceReminder.id,
+    models.MaintenanceReminder.gear_id,
+    models.MaintenanceReminder.schedule_id,
+    models.MaintenanceReminder.reminder_date,
+    models.MaintenanceReminder.reminder_time,
+    models.MaintenanceReminder.message,
+)
+
+
+def claim_due(db: Session, now: datetime, limit: int) -> List:
+    """Lock up to ``limit`` due reminders, skipping rows other dispatchers hold"""
+    reminder = models.MaintenanceReminder
+    return (
+        db.query(*CLAIM_COLUMNS)
+        .filter(due_filter(now))
+        .order_by(reminder.reminder_date, reminder.reminder_time, reminder.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+
+
+def claim_ids(db: Session, reminder_ids: List[int]) -> List:
+    """Lock the still unsent reminders among ``reminder_ids``"""
+    reminder = models.MaintenanceReminder
+    return (
+        db.query(*CLAIM_COLUMNS)
+        .filter(reminder.id.in_(reminder_ids), reminder.sent == False)  # noqa: E712
+        .order_by(reminder.reminder_date, reminder.reminder_time, reminder.id)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+
+
+def mark_sent(db: Session, reminder_ids: List[int]) -> None:
+    """Flag a whole batch as sent with a single UPDATE"""
+    (
+        db.query(models.MaintenanceReminder)
+        .filter(models.MaintenanceReminder.id.in_(reminder_ids))
+        .update({models.MaintenanceReminder.sent: True}, synchronize_session=False)
+    )
+
+
+class ReminderDispatcher:
+    """Fires reminders from a timer queue and delivers them through ``sink``.
+
+    ``poll_interval`` caps how long the loop sleeps between checks;
+    ``horizon`` is how far ahead reminders are held in memory.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        sink: Optional[ReminderSink] = None,
+        batch_size: int = 100,
+        poll_interval: float = 60.0,
+        horizon: timedelta = timedelta(hours=6),
+    ):
+        self.session_factory = session_factory
+        self.sink = sink or LoggingSink()
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.timers = ReminderTimerQueue(horizon)
+        self._stopping = threading.Event()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _deliver(self, claim: Callable[[Session], List]) -> int:
+        """Claim, deliver and mark one batch in a single transaction"""
+        db = self.session_factory()
+        try:
+            batch = claim(db)
+            if not batch:
+                db.rollback()
+                return 0
+            self.sink.deliver(batch)
+            reminder_ids = [reminder.id for reminder in batch]
+            mark_sent(db, reminder_ids)
+            record_changes(db, models.MaintenanceReminder, reminder_ids)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+        publish_change(models.MaintenanceReminder)
+        return len(batch)
+
+    def dispatch_due(self, now: Optional[datetime] = None) -> int:
+        """Deliver every reminder due at ``now`` with a table scan; returns how many were sent"""
+        now = now or datetime.now()
+        sent = 0
+        while True:
+            count = self._deliver(lambda db: claim_due(db, now, self.batch_size))
+            sent += count
+            if count < self.batch_size:
+                return sent
+
+    def dispatch_ids(self, reminder_ids: List[int]) -> int:
+        """Deliver the given reminders unless another dispatcher already has"""
+        sent = 0
+        for start in range(0, len(reminder_ids), self.batch_size):
+            chunk = reminder_ids[start:start + self.batch_size]
+            sent += self._deliver(lambda db: claim_ids(db, chunk))
+        return sent
+
+    def fire_due(self, now: Optional[datetime] = None) -> int:
+        """Deliver what the timer queue holds as due, rebuilding it when needed"""
+        now = now or datetime.now()
+        if self.timers.needs_rebuild(now):
+            db = self.session_factory()
+            try:
+                # Recurring series only get reminder rows inside the horizon
+                created = materialize_reminders(db, now, now + self.timers.horizon)
+                loaded = self.timers.rebuild(db, now)
+            finally:
+                db.close()
+            if created:
+                publish_change(models.MaintenanceReminder)
+            logger.debug("Loaded %d upcoming reminders", loaded)
+        return self.dispatch_ids(self.timers.pop_due(now))
+
+    def handle_event(self, event) -> None:
+        """Invalidation bus handler adding newly created reminders to the queue"""
+        if event["entity"] in (ALL_ENTITIES, models.MaintenanceRecurrence.__tablename__):
+            # Missed events or a new series: reload, materializing occurrences
+            self.timers.invalidate()
+            self._wakeup.set()
+            return
+        if event["entity"] != models.MaintenanceReminder.__tablename__:
+            return
+        # Bulk writes announce many reminders with the same due time at once
+        reminder_ids = event.get("ids") or ([event["id"]] if event.get("id") is not None else [])
+        if not event.get("due"):
+            for reminder_id in reminder_ids:
+                self.timers.discard(reminder_id)
+            return
+        due = datetime.fromisoformat(event["due"])
+        if any([self.timers.add(reminder_id, due) for reminder_id in reminder_ids]):
+            self._wakeup.set()
+
+    def _seconds_until_next_check(self, now: datetime) -> float:
+        wait = self.poll_interval
+        next_due = self.timers.next_due()
+        if next_due is not None:
+            wait = min(wait, (next_due - now).total_seconds())
+        if self.timers.loaded_until is not None:
+            rebuild_at = self.timers.loaded_until - self.timers.horizon / 2
+            wait = min(wait, (rebuild_at - now).total_seconds())
+        return max(wait, 0.0)
+
+    def run_forever(self) -> None:
+        while not self._stopping.is_set():
+            self._wakeup.clear()
+            try:
+                count = self.fire_due()
+                if count:
+                    logger.info("Dispatched %d reminders", count)
+            except Exception:
+                # Popped reminders stay unsent and are reloaded by the rebuild
+                logger.exception("Reminder dispatch failed, retrying after a rebuild")
+                self.timers.invalidate()
+                self._stopping.wait(self.poll_interval)
+                continue
+            self._wakeup.wait(self._seconds_until_next_check(datetime.now()))
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stopping.clear()
+        bus.subscribe(self.handle_event)
+        self._thread = threading.Thread(target=self.run_forever, name="reminder-dispatcher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopping.set()
+        self._wakeup.set()
+        bus.unsubscribe(self.handle_event)
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+
+def dispatcher_enabled() -> bool:
+    return os.getenv("REMINDER_DISPATCHER") == "1"
+
+
+def dispatcher_horizon() -> timedelta:
+    return timedelta(minutes=float(os.getenv("REMINDER_HORIZON_MINUTES", "360")))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Deliver due maintenance reminders")
+    parser.add_argument("--once", action="store_true", help="dispatch what is due now and exit")
+    parser.add_argument("--batch-size", type=int, default=int(os.getenv("REMINDER_BATCH_SIZE", "100")))
+    parser.add_argument("--interval", type=float, default=float(os.getenv("REMINDER_POLL_INTERVAL", "60")))
+    parser.add_argument(
+        "--horizon", type=float, default=dispatcher_horizon().total_seconds() / 60,
+        help="minutes of upcoming reminders kept in memory",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    dispatcher = ReminderDispatcher(
+        batch_size=args.batch_size,
+        poll_interval=args.interval,
+        horizon=timedelta(minutes=args.horizon),
+    )
+    if args.once:
+        logger.info("Dispatched %d reminders", dispatcher.dispatch_due())
+    else:
+        bus.subscribe(dispatcher.handle_event)
+        bus.start()
+        try:
+            dispatcher.run_forever()
+        finally:
+            bus.stop()
+
+
+if __name__ == "__main__":
+    main()
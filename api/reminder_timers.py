@@ -0,0 +1,146 @@
+"""
+In-memory timer queue for maintenance reminders.
+
+The dispatcher keeps only the unsent reminders due within a rolling horizon
+in a min-heap ordered by due time, so it can sleep until the next one is due
+instead of scanning the table on every poll. The heap is:
+- rebuilt from the ``(sent, reminder_date, reminder_time)`` index on startup
+  and whenever the horizon needs extending, which also recovers reminders
+  whose delivery failed or whose events were missed
+- updated incrementally from the reminder events ``create_reminder`` and
+  ``create_schedule`` publish on the invalidation bus
+
+Reminders beyond the horizon are not held in memory; the next rebuild picks
+them up once they come within range.
+"""
+import heapq
+import threading
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
+
+import models
+
+
+def due_at(reminder_date: date, reminder_time: Optional[time]) -> datetime:
+    return datetime.combine(reminder_date, reminder_time or time(0, 0))
+
+
+def timer_details(reminder) -> Dict[str, Any]:
+    """Event details that let dispatchers schedule a new reminder without a query"""
+    if reminder.sent or reminder.reminder_date is None:
+        return {}
+    return {"due": due_at(reminder.reminder_date, reminder.reminder_time).isoformat()}
+
+
+def due_filter(now: datetime):
+    """Unsent reminders whose date and time are not after ``now``"""
+    reminder = models.MaintenanceReminder
+    return and_(
+        reminder.sent == False,  # noqa: E712 - SQL comparison
+        or_(
+            reminder.reminder_date < now.date(),
+            and_(reminder.reminder_date == now.date(), reminder.reminder_time <= now.time()),
+        ),
+    )
+
+
+def load_upcoming(db: Session, until: datetime) -> List[Tuple[int, datetime]]:
+    """``(id, due)`` of unsent reminders due at or before ``until``"""
+    reminder = models.MaintenanceReminder
+    rows = (
+        db.query(reminder.id, reminder.reminder_date, reminder.reminder_time)
+        .filter(due_filter(until))
+        .all()
+    )
+    return [(row.id, due_at(row.reminder_date, row.reminder_time)) for row in rows]
+
+
+class ReminderTimerQueue:
+    """Thread-safe min-heap of ``(due, reminder_id)`` within a rolling horizon.
+
+    Removal is lazy: ``_due`` maps each live id to its due time, and heap
+    entries that no longer match it are skipped when popped.
+    """
+
+    def __init__(self, horizon: timedelta = timedelta(hours=6)):
+        self.horizon = horizon
+        self.loaded_until: Optional[datetime] = None
+        self._heap: List[Tuple[datetime, int]] = []
+        self._due: Dict[int, datetime] = {}
+        # Reminders added while a rebuild query runs, which it may not see
+        self._added_during_rebuild: Optional[List[Tuple[int, datetime]]] = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._due)
+
+    def rebuild(self, db: Session, now: datetime) -> int:
+        """Replace the contents with everything unsent due before ``now + horizon``"""
+        until = now + self.horizon
+        with self._lock:
+            self._added_during_rebuild = []
+        try:
+            upcoming = load_upcoming(db, until)
+        except Exception:
+            with self._lock:
+                self._added_during_rebuild = None
+            raise
+        with self._lock:
+            upcoming += [entry for entry in self._added_during_rebuild if entry[1] <= until]
+            self._added_during_rebuild = None
+            self._due = dict(upcoming)
+            self._heap = [(due, reminder_id) for reminder_id, due in self._due.items()]
+            heapq.heapify(self._heap)
+            self.loaded_until = until
+            return len(self._due)
+
+    def needs_rebuild(self, now: datetime) -> bool:
+        """True once half the horizon has been consumed"""
+        with self._lock:
+            return self.loaded_until is None or now + self.horizon / 2 >= self.loaded_until
+
+    def invalidate(self) -> None:
+        """Force a rebuild before the next firing, e.g. after missed events"""
+        with self._lock:
+            self.loaded_until = None
+
+    def add(self, reminder_id: int, due: datetime) -> bool:
+        """Schedule a reminder; ignored if it lies beyond the loaded horizon"""
+        with self._lock:
+            if self._added_during_rebuild is not None:
+                self._added_during_rebuild.append((reminder_id, due))
+            if self.loaded_until is None or due > self.loaded_until:
+                return False
+            self._due[reminder_id] = due
+            heapq.heappush(self._heap, (due, reminder_id))
+            return True
+
+    def discard(self, reminder_id: int) -> None:
+        with self._lock:
+            self._due.pop(reminder_id, None)
+
+    def next_due(self) -> Optional[datetime]:
+        with self._lock:
+            self._drop_stale()
+            return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now: datetime) -> List[int]:
+        """Remove and return the ids of every reminder due at ``now``"""
+        fired = []
+        with self._lock:
+            while True:
+                self._drop_stale()
+                if not self._heap or self._heap[0][0] > now:
+                    break
+                _, reminder_id = heapq.heappop(self._heap)
+                del self._due[reminder_id]
+                fired.append(reminder_id)
+        return fired
+
+    def _drop_stale(self) -> None:
+        while self._heap and self._due.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
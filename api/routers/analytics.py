@@ -0,0 +1,61 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from datetime import date
+import models
+import schemas
+from analytics import month_of
+from dependencies import get_db
+
+router = APIRouter(
+    prefix="/analytics",
+    tags=["analytics"]
+)
+
+GROUP_COLUMNS = ("station_id", "equipment_type", "month")
+
+
+@router.get("/inspections", response_model=List[schemas.InspectionFailureRate])
+def get_inspection_failure_rates(
+    group_by: List[str] = Query(list(GROUP_COLUMNS), description="station_id, equipment_type and/or month"),
+    station_id: Optional[int] = None,
+    equipment_type: Optional[str] = None,
+    from_month: Optional[date] = Query(None, alias="from"),
+    to_month: Optional[date] = Query(None, alias="to"),
+    db: Session = Depends(get_db),
+):
+    """Inspection failure rates from the rollups, never the inspection table.
+
+    ``from`` and ``to`` select whole months. Rows come out in ``group_by``
+    order.
+    """
+    unknown = set(group_by) - set(GROUP_COLUMNS)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Cannot group by {', '.join(sorted(unknown))}")
+
+    rollup = models.InspectionRollup
+    keys = [getattr(rollup, name) for name in dict.fromkeys(group_by)]
+    query = db.query(
+        *keys,
+        func.sum(rollup.total).label("total"),
+        func.sum(rollup.passed).label("passed"),
+        func.sum(rollup.failed).label("failed"),
+    )
+    if station_id is not None:
+        query = query.filter(rollup.station_id == station_id)
+    if equipment_type is not None:
+        query = query.filter(rollup.equipment_type == equipment_type)
+    if from_month is not None:
+        query = query.filter(rollup.month >= month_of(from_month))
+    if to_month is not None:
+        query = query.filter(rollup.month <= month_of(to_month))
+    rates = []
+    for row in query.group_by(*keys).order_by(*keys).all():
+        data = row._asdict()
+        if data.get("equipment_type") == "":
+            data["equipment_type"] = None
+        completed = data["passed"] + data["failed"]
+        data["failure_rate"] = data["failed"] / completed if completed else None
+        rates.append(data)
+    return rates
@@ -0,0 +1,26 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from datetime import date
+import schemas
+from cache import compliance_cache
+from compliance import overdue_by_station
+from dependencies import get_db
+
+router = APIRouter(
+    prefix="/compliance",
+    tags=["compliance"]
+)
+
+
+@router.get("/overdue", response_model=List[schemas.StationCompliance])
+def get_overdue_gears(station_id: Optional[int] = None, db: Session = Depends(get_db)):
+    """Gears overdue for inspection under the per-type policy, grouped by station.
+
+    Cached until a gear or inspection changes, or the day rolls over.
+    """
+    today = date.today()
+    return compliance_cache.get_or_load(
+        ("overdue", today, station_id),
+        lambda: overdue_by_station(db, today, station_id),
+    )
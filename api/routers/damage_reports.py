@@ -1,9 +1,18 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session, joinedload
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from datetime import date
 import models
 import schemas
+from changelog import record_change
+from damage_counters import status_counts
+from damage_workflow import INITIAL_STATUS, OPEN_STATUSES, record_created, transition
 from dependencies import get_db
+from firefighter_directory import directory
+from invalidation import publish_change
+from pagination import encode_cursor, newest_first_after, page_size
+from push import gear_scope
+from validation import reference_errors
 
 router = APIRouter(
     prefix="/damage-reports",
@@ -13,47 +22,175 @@ router = APIRouter(
 
 @router.post("/", response_model=schemas.DamageReport)
 def create_damage_report(report: schemas.DamageReportCreate, db: Session = Depends(get_db)):
-    # Look up firefighter by name if provided
-    reporter_id = None
-    if report.reporter_name:
-        firefighter = db.query(models.Firefighter).filter(
-            models.Firefighter.name == report.reporter_name
-        ).first()
-        if firefighter:
-            reporter_id = firefighter.id
-    
+    # Resolve the typed reporter name, ignoring case and extra spaces
+    reporter_id = directory.resolve(db, report.reporter_name)
+    suggestions = []
+    if report.reporter_name and reporter_id is None:
+        suggestions = directory.suggest(db, report.reporter_name)
+
     # Create damage report with the found reporter_id
     report_data = report.dict(exclude={'reporter_name'})
     report_data['reporter_id'] = reporter_id
-    
+    report_data['status'] = report_data['status'] or INITIAL_STATUS
+
     new_report = models.DamageReport(**report_data)
     db.add(new_report)
+    with reference_errors(db, models.DamageReport, report_data):
+        db.flush()
+    scope = gear_scope(db, new_report.gear_id)
+    record_created(db, new_report, scope["station_id"])
+    record_change(db, models.DamageReport, new_report.id)
     db.commit()
     db.refresh(new_report)
-    return new_report
+    publish_change(models.DamageReport, new_report.id, gear_id=new_report.gear_id, **scope)
+    response = _report_row(db, new_report.id)
+    response["reporter_suggestions"] = suggestions
+    return response
+
+
+def _report_rows(db: Session):
+    """Report columns plus gear and reporter names, the shape every endpoint returns"""
+    report = models.DamageReport
+    # Select only the columns the response needs; gear and reporter names come
+    # from outer joins instead of loading the related entities.
+    return (
+        db.query(
+            report.id,
+            report.gear_id,
+            report.reporter_id,
+            report.report_date,
+            report.notes,
+            report.photo_url,
+            report.status,
+            report.created_at,
+            models.Gear.gear_name,
+            models.Firefighter.name.label("reporter_name"),
+        )
+        .outerjoin(models.Gear, models.Gear.id == report.gear_id)
+        .outerjoin(models.Firefighter, models.Firefighter.id == report.reporter_id)
+    )
+
+
+def _report_row(db: Session, report_id: int) -> dict:
+    return _report_rows(db).filter(models.DamageReport.id == report_id).one()._asdict()
 
 
 @router.get("/", response_model=List[schemas.DamageReport])
-def get_damage_reports(db: Session = Depends(get_db)):
-    reports = db.query(models.DamageReport).options(
-        joinedload(models.DamageReport.gear),
-        joinedload(models.DamageReport.reporter)
-    ).all()
-    
-    # Add gear_name and reporter_name to response
-    result = []
-    for report in reports:
-        report_dict = {
-            "id": report.id,
-            "gear_id": report.gear_id,
-            "reporter_id": report.reporter_id,
-            "report_date": report.report_date,
-            "notes": report.notes,
-            "photo_url": report.photo_url,
-            "status": report.status,
-            "gear_name": report.gear.gear_name if report.gear else None,
-            "reporter_name": report.reporter.name if report.reporter else None,
+def get_damage_reports(
+    response: Response,
+    status: Optional[str] = None,
+    gear_id: Optional[int] = None,
+    station_id: Optional[int] = None,
+    from_date: Optional[date] = Query(None, alias="from"),
+    to_date: Optional[date] = Query(None, alias="to"),
+    limit: Optional[int] = Query(None, ge=1, le=500, description="Page size; omit with cursor for every row"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
+    db: Session = Depends(get_db),
+):
+    """Damage reports, newest first, one page at a time when ``limit`` or ``cursor`` is given.
+
+    Keyset pagination on ``(report_date, id)`` as in ``GET /inspections``:
+    the ``X-Next-Cursor`` response header holds the ``cursor`` of the next
+    page. Undated reports come last. Without either parameter every matching
+    report is returned.
+    """
+    report = models.DamageReport
+    query = _report_rows(db)
+    if status is not None:
+        query = query.filter(report.status == status)
+    if gear_id is not None:
+        query = query.filter(report.gear_id == gear_id)
+    if station_id is not None:
+        query = query.filter(models.Gear.station_id == station_id)
+    if from_date is not None:
+        query = query.filter(report.report_date >= from_date)
+    if to_date is not None:
+        query = query.filter(report.report_date <= to_date)
+    if cursor:
+        try:
+            query = query.filter(newest_first_after(report.report_date, report.id, cursor))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    query = query.order_by(report.report_date.desc(), report.id.desc())
+    size = page_size(limit, cursor)
+    if size is None:
+        return [row._asdict() for row in query.all()]
+    rows = query.limit(size + 1).all()
+    if len(rows) > size:
+        rows = rows[:size]
+        response.headers["X-Next-Cursor"] = encode_cursor(rows[-1].report_date, rows[-1].id)
+    return [row._asdict() for row in rows]
+
+
+@router.get("/summary", response_model=schemas.DamageReportSummary)
+def get_damage_report_summary(station_id: Optional[int] = None, db: Session = Depends(get_db)):
+    """Reports per status from the maintained counters, without counting the reports"""
+    counts = status_counts(db, station_id)
+    total = sum(counts.values())
+    open_count = sum(counts.get(status, 0) for status in OPEN_STATUSES)
+    return {"counts": counts, "total": total, "open": open_count, "closed": total - open_count}
+
+
+@router.get("/repair-times", response_model=List[schemas.DamageRepairTime])
+def get_repair_times(
+    station_id: Optional[int] = None,
+    from_date: Optional[date] = Query(None, alias="from"),
+    to_date: Optional[date] = Query(None, alias="to"),
+    db: Session = Depends(get_db),
+):
+    """Repairs and average hours from report to repair, per station and month of repair"""
+    rollup = models.DamageRepairRollup
+    query = db.query(rollup).filter(rollup.repairs > 0)
+    if station_id is not None:
+        query = query.filter(rollup.station_id == station_id)
+    if from_date is not None:
+        query = query.filter(rollup.month >= from_date.replace(day=1))
+    if to_date is not None:
+        query = query.filter(rollup.month <= to_date)
+    return [
+        {
+            "station_id": row.station_id,
+            "month": row.month,
+            "repairs": row.repairs,
+            "average_hours": round(row.repair_seconds / row.repairs / 3600, 2),
         }
-        result.append(report_dict)
-    
-    return result
+        for row in query.order_by(rollup.station_id, rollup.month)
+    ]
+
+
+@router.post("/{report_id}/transitions", response_model=schemas.DamageReport)
+def change_damage_report_status(
+    report_id: int, change: schemas.DamageReportTransitionCreate, db: Session = Depends(get_db)
+):
+    """Move a report along the workflow, recording the change in its history"""
+    report = db.query(models.DamageReport).filter(models.DamageReport.id == report_id).with_for_update().first()
+    if report is None:
+        raise HTTPException(status_code=404, detail="Damage report not found")
+    scope = gear_scope(db, report.gear_id)
+    try:
+        transition(db, report, scope["station_id"], change.status, change.changed_by, change.note)
+    except ValueError as exc:
+        db.rollback()
+        raise HTTPException(status_code=409, detail=str(exc))
+    with reference_errors(db, models.DamageReportTransition, {"changed_by": change.changed_by}):
+        db.flush()
+    record_change(db, models.DamageReport, report.id)
+    db.commit()
+    db.refresh(report)
+    publish_change(models.DamageReport, report.id, gear_id=report.gear_id, **scope)
+    return _report_row(db, report.id)
+
+
+@router.get("/{report_id}/transitions", response_model=List[schemas.DamageReportTransition])
+def get_damage_report_transitions(report_id: int, db: Session = Depends(get_db)):
+    """Status history of a report, oldest first"""
+    if db.get(models.DamageReport, report_id) is None:
+        raise HTTPException(status_code=404, detail="Damage report not found")
+    transition_model = models.DamageReportTransition
+    return (
+        db.query(transition_model)
+        .filter(transition_model.damage_report_id == report_id)
+        .order_by(transition_model.id)
+        .all()
+    )
@@ -1,9 +1,15 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from typing import List
+from datetime import date
 import models
 import schemas
+from cache import dashboard_cache, list_reference
+from dashboard import department_dashboard
+from department_rollups import department_rollups
+from changelog import record_change
 from dependencies import get_db
+from invalidation import publish_change
 
 router = APIRouter(
     prefix="/departments",
@@ -15,11 +21,47 @@ router = APIRouter(
 def create_department(dept: schemas.DepartmentCreate, db: Session = Depends(get_db)):
     new_dept = models.Department(**dept.dict())
     db.add(new_dept)
+    db.flush()
+    record_change(db, models.Department, new_dept.id)
     db.commit()
     db.refresh(new_dept)
+    publish_change(models.Department, new_dept.id)
     return new_dept
 
 
 @router.get("/", response_model=List[schemas.Department])
 def get_departments(db: Session = Depends(get_db)):
-    return db.query(models.Department).all()
+    return list_reference(db, models.Department)
+
+
+@router.get("/rollups", response_model=List[schemas.DepartmentRollup])
+def get_department_rollups(db: Session = Depends(get_db)):
+    """Totals of every department from the precomputed rollups; see ``refreshed_at``"""
+    return department_rollups(db)
+
+
+@router.get("/{department_id}/rollup", response_model=schemas.DepartmentRollup)
+def get_department_rollup(department_id: int, db: Session = Depends(get_db)):
+    """Totals of one department from the precomputed rollups"""
+    rollups = department_rollups(db, department_id)
+    if not rollups:
+        raise HTTPException(status_code=404, detail="Department not found")
+    return rollups[0]
+
+
+@router.get("/{department_id}/dashboard", response_model=schemas.DepartmentDashboard)
+def get_department_dashboard(
+    department_id: int,
+    expiring_within: int = Query(30, ge=0, le=365, description="Days ahead counted as expiring soon"),
+    recent_days: int = Query(30, ge=1, le=365, description="Days back counted as recent inspections"),
+    db: Session = Depends(get_db),
+):
+    """Dashboard totals of a department and each of its stations, cached briefly"""
+    today = date.today()
+    dashboard = dashboard_cache.get_or_load(
+        ("department", department_id, today, expiring_within, recent_days),
+        lambda: department_dashboard(db, department_id, today, expiring_within, recent_days),
+    )
+    if dashboard is None:
+        raise HTTPException(status_code=404, detail="Department not found")
+    return dashboard
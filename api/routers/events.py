@@ -0,0 +1,34 @@
+from fastapi import APIRouter
+from fastapi.responses import StreamingResponse
+from typing import Optional
+from push import broker, event_stream
+
+router = APIRouter(
+    prefix="/events",
+    tags=["events"]
+)
+
+
+@router.get("/stream")
+async def stream_events(station_id: Optional[int] = None, department_id: Optional[int] = None):
+    """Server-Sent Events for damage reports, schedules, reminders and inspections.
+
+    Each ``change`` event names the entity and id; fetch the rows with
+    ``GET /sync``. A ``resync`` event means events were dropped, because the
+    client fell behind or the server may have missed changes: run a sync and
+    reconnect.
+    """
+    subscriber = broker.subscribe(station_id, department_id)
+
+    async def body():
+        try:
+            async for chunk in event_stream(subscriber):
+                yield chunk
+        finally:
+            broker.unsubscribe(subscriber)
+
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,9 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 from typing import List
 import models
 import schemas
+from cache import list_reference
+from changelog import record_change
 from dependencies import get_db
+from invalidation import publish_change
+from validation import reference_errors
 
 router = APIRouter(
     prefix="/firefighters",
@@ -13,24 +17,19 @@ router = APIRouter(
 
 @router.post("/", response_model=schemas.Firefighter)
 def create_firefighter(firefighter: schemas.FirefighterCreate, db: Session = Depends(get_db)):
-    # Validate foreign key references
-    if firefighter.station_id is not None:
-        station = db.query(models.Station).filter(models.Station.id == firefighter.station_id).first()
-        if not station:
-            raise HTTPException(status_code=400, detail=f"Station with id {firefighter.station_id} does not exist")
-    
-    if firefighter.department_id is not None:
-        department = db.query(models.Department).filter(models.Department.id == firefighter.department_id).first()
-        if not department:
-            raise HTTPException(status_code=400, detail=f"Department with id {firefighter.department_id} does not exist")
-    
-    new_firefighter = models.Firefighter(**firefighter.dict())
+    data = firefighter.dict()
+    new_firefighter = models.Firefighter(**data)
     db.add(new_firefighter)
+    # Unknown station and department ids are rejected by the FK constraints
+    with reference_errors(db, models.Firefighter, data):
+        db.flush()
+    record_change(db, models.Firefighter, new_firefighter.id)
     db.commit()
     db.refresh(new_firefighter)
+    publish_change(models.Firefighter, new_firefighter.id)
     return new_firefighter
 
 
 @router.get("/", response_model=List[schemas.Firefighter])
 def get_firefighters(db: Session = Depends(get_db)):
-    return db.query(models.Firefighter).all()
+    return list_reference(db, models.Firefighter)
@@ -1,31 +1,35 @@
 from fastapi import APIRouter, Depends, Query, UploadFile, File
 from sqlalchemy.orm import Session
-from sqlalchemy import func, case
+from sqlalchemy import func, case, select
 from typing import List
 import models
 import schemas
+from changelog import record_change
 from dependencies import get_db
-import os
+from invalidation import publish_change
+from validation import reference_errors
 import shutil
 from pathlib import Path
 import uuid
+from bootstrap import GEAR_UPLOAD_DIR
 
 router = APIRouter(
     prefix="/gears",
     tags=["gears"]
 )
 
-# Create uploads directory if it doesn't exist
-UPLOAD_DIR = Path("uploads/gears")
-UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
-
 
 @router.post("/", response_model=schemas.Gear)
 def create_gear(gear: schemas.GearCreate, db: Session = Depends(get_db)):
-    new_gear = models.Gear(**gear.dict())
+    data = gear.dict()
+    new_gear = models.Gear(**data)
     db.add(new_gear)
+    with reference_errors(db, models.Gear, data):
+        db.flush()
+    record_change(db, models.Gear, new_gear.id)
     db.commit()
     db.refresh(new_gear)
+    publish_change(models.Gear, new_gear.id)
     return new_gear
 
 
@@ -49,7 +53,7 @@ async def upload_gear_photo(
     
     # Generate unique filename
     unique_filename = f"{gear_id}_{uuid.uuid4().hex}{file_ext}"
-    file_path = UPLOAD_DIR / unique_filename
+    file_path = GEAR_UPLOAD_DIR / unique_filename
     
     # Delete old photo if exists
     if gear.photo_url:
@@ -67,8 +71,10 @@ async def upload_gear_photo(
     # Update gear with photo URL (web-accessible URL path)
     photo_url = f"/uploads/gears/{unique_filename}"
     gear.photo_url = photo_url
+    record_change(db, models.Gear, gear.id)
     db.commit()
     db.refresh(gear)
+    publish_change(models.Gear, gear.id)
     
     return {
         "message": "Photo uploaded successfully",
@@ -103,11 +109,33 @@ def get_gears(
         .subquery()
     )
 
-    # Main query with left join to include maintenance dates
+    # Time of the earliest schedule on the next maintenance date, resolved in
+    # the same statement instead of one extra query per gear
+    next_time_subquery = (
+        select(models.MaintenanceSchedule.scheduled_time)
+        .where(
+            models.MaintenanceSchedule.gear_id == models.Gear.id,
+            models.MaintenanceSchedule.scheduled_date == maintenance_subquery.c.next_maintenance_date,
+        )
+        .order_by(models.MaintenanceSchedule.id.asc())
+        .limit(1)
+        .scalar_subquery()
+    )
+
+    # Main query with left join to include maintenance dates. Only the columns
+    # of the response schema are selected, so no Gear entities are hydrated.
     query = (
         db.query(
-            models.Gear,
-            maintenance_subquery.c.next_maintenance_date
+            models.Gear.id,
+            models.Gear.station_id,
+            models.Gear.gear_name,
+            models.Gear.serial_number,
+            models.Gear.photo_url,
+            models.Gear.equipment_type,
+            models.Gear.purchase_date,
+            models.Gear.expiry_date,
+            maintenance_subquery.c.next_maintenance_date,
+            next_time_subquery.label('next_maintenance_time'),
         )
         .outerjoin(
             maintenance_subquery,
@@ -131,36 +159,11 @@ def get_gears(
             maintenance_subquery.c.next_maintenance_date.asc()
         )
 
-    results = query.all()
-
-    # Build response with next_maintenance_date and next_maintenance_time included
     gears = []
-    for gear, next_maintenance_date in results:
+    for row in query.all():
+        gear_dict = row._asdict()
         # Always return a time string, default to '00:00' if not found
-        next_maintenance_time = '00:00'
-        if next_maintenance_date:
-            schedule = (
-                db.query(models.MaintenanceSchedule)
-                .filter(
-                    models.MaintenanceSchedule.gear_id == gear.id,
-                    models.MaintenanceSchedule.scheduled_date == next_maintenance_date
-                )
-                .order_by(models.MaintenanceSchedule.id.asc())
-                .first()
-            )
-            if schedule and schedule.scheduled_time:
-                next_maintenance_time = schedule.scheduled_time.strftime('%H:%M')
-        gear_dict = {
-            'id': gear.id,
-            'station_id': gear.station_id,
-            'gear_name': gear.gear_name,
-            'serial_number': gear.serial_number,
-            'photo_url': gear.photo_url,
-            'equipment_type': gear.equipment_type,
-            'purchase_date': gear.purchase_date,
-            'expiry_date': gear.expiry_date,
-            'next_maintenance_date': next_maintenance_date,
-            'next_maintenance_time': next_maintenance_time,
-        }
+        next_time = gear_dict['next_maintenance_time']
+        gear_dict['next_maintenance_time'] = next_time.strftime('%H:%M') if next_time else '00:00'
         gears.append(gear_dict)
     return gears
@@ -1,9 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from typing import List
+from collections import defaultdict
+from typing import List, Optional
+from datetime import date
 import models
 import schemas
+from analytics import add_inspections
+from cache import get_reference
+from changelog import record_change, record_changes
+from compliance import mark_inspected
 from dependencies import get_db
+from invalidation import publish_change
+from pagination import encode_cursor, newest_first_after, page_size
+from push import gear_scope
+from validation import reference_errors
 
 router = APIRouter(
     prefix="/inspections",
@@ -13,24 +24,159 @@ router = APIRouter(
 
 @router.post("/", response_model=schemas.Inspection)
 def create_inspection(inspection: schemas.InspectionCreate, db: Session = Depends(get_db)):
-    # Validate gear_id
-    gear = db.query(models.Gear).filter(models.Gear.id == inspection.gear_id).first()
-    if not gear:
-        raise HTTPException(status_code=400, detail=f"Gear with id {inspection.gear_id} does not exist")
-
-    # Validate inspector_id
-    if inspection.inspector_id is not None:
-        inspector = db.query(models.Firefighter).filter(models.Firefighter.id == inspection.inspector_id).first()
-        if not inspector:
-            raise HTTPException(status_code=400, detail=f"Firefighter with id {inspection.inspector_id} does not exist")
-
-    new_insp = models.Inspection(**inspection.dict())
+    data = inspection.dict()
+    new_insp = models.Inspection(**data)
     db.add(new_insp)
+    # Unknown gear and inspector ids are rejected by the FK constraints
+    with reference_errors(db, models.Inspection, data):
+        db.flush()
+    add_inspections(db, [new_insp])
+    mark_inspected(db, [new_insp])
+    record_change(db, models.Inspection, new_insp.id)
     db.commit()
     db.refresh(new_insp)
+    publish_change(
+        models.Inspection, new_insp.id,
+        gear_id=new_insp.gear_id, **gear_scope(db, new_insp.gear_id),
+    )
     return new_insp
 
 
+@router.post("/batch", response_model=schemas.InspectionBatchResult)
+def create_inspections_batch(batch: schemas.InspectionBatchCreate, db: Session = Depends(get_db)):
+    """Insert inspections collected offline, in one transaction.
+
+    Every item carries a ``client_id``. Items whose ``client_id`` is already
+    stored come back as ``duplicate`` with the stored id, so a retried batch
+    is safe. Items with an unknown gear or inspector come back as
+    ``invalid``; the rest are inserted together.
+    """
+    for _ in range(2):
+        try:
+            results, created = _insert_batch(db, batch.items)
+            break
+        except IntegrityError:
+            # A concurrent retry inserted some of the same client ids first;
+            # the second pass reports them as duplicates
+            db.rollback()
+    else:
+        raise HTTPException(status_code=409, detail="Batch conflicted with a concurrent submission, retry it")
+
+    ids_by_station = defaultdict(list)
+    for row, station_id in created:
+        ids_by_station[station_id].append(row.id)
+    for station_id, inspection_ids in ids_by_station.items():
+        station = get_reference(db, models.Station, station_id) if station_id is not None else None
+        publish_change(
+            models.Inspection, ids=inspection_ids, station_id=station_id,
+            department_id=station["department_id"] if station else None,
+        )
+    return {"results": results}
+
+
+def _insert_batch(db: Session, items: List[schemas.InspectionBatchItem]):
+    """Classify and insert one batch; returns the per-item results and new rows"""
+    inspection = models.Inspection
+    client_ids = {item.client_id for item in items}
+    stored = dict(
+        db.query(inspection.client_id, inspection.id).filter(inspection.client_id.in_(client_ids)).all()
+    )
+    station_by_gear = dict(
+        db.query(models.Gear.id, models.Gear.station_id)
+        .filter(models.Gear.id.in_({item.gear_id for item in items}))
+        .all()
+    )
+    inspector_ids = {item.inspector_id for item in items if item.inspector_id is not None}
+    known_inspectors = {
+        firefighter_id
+        for (firefighter_id,) in db.query(models.Firefighter.id).filter(models.Firefighter.id.in_(inspector_ids))
+    } if inspector_ids else set()
+
+    results = []
+    pending = {}
+    for item in items:
+        result = {"client_id": item.client_id, "status": "created", "id": None, "error": None}
+        results.append(result)
+        if item.client_id in stored:
+            result.update(status="duplicate", id=stored[item.client_id])
+        elif item.client_id in pending:
+            # Same client id twice in one batch: the first copy wins
+            result["status"] = "duplicate"
+        elif item.gear_id not in station_by_gear:
+            result.update(status="invalid", error=f"Gear with id {item.gear_id} does not exist")
+        elif item.inspector_id is not None and item.inspector_id not in known_inspectors:
+            result.update(status="invalid", error=f"Firefighter with id {item.inspector_id} does not exist")
+        else:
+            pending[item.client_id] = models.Inspection(**item.dict())
+
+    rows = list(pending.values())
+    if rows:
+        db.add_all(rows)
+        db.flush()
+        add_inspections(db, rows)
+        mark_inspected(db, rows)
+        record_changes(db, models.Inspection, [row.id for row in rows])
+        db.commit()
+    for result in results:
+        if result["id"] is None and result["client_id"] in pending:
+            result["id"] = pending[result["client_id"]].id
+    return results, [(row, station_by_gear[row.gear_id]) for row in rows]
+
+
 @router.get("/", response_model=List[schemas.Inspection])
-def get_inspections(db: Session = Depends(get_db)):
-    return db.query(models.Inspection).all()
+def get_inspections(
+    response: Response,
+    gear_id: Optional[int] = None,
+    inspector_id: Optional[int] = None,
+    result: Optional[str] = None,
+    inspection_type: Optional[str] = None,
+    from_date: Optional[date] = Query(None, alias="from"),
+    to_date: Optional[date] = Query(None, alias="to"),
+    limit: Optional[int] = Query(None, ge=1, le=500, description="Page size; omit with cursor for every row"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
+    db: Session = Depends(get_db),
+):
+    """Inspections, newest first, one page at a time when ``limit`` or ``cursor`` is given.
+
+    Keyset pagination on ``(inspection_date, id)``: when more rows follow,
+    the ``X-Next-Cursor`` response header holds the ``cursor`` for the next
+    page. Without either parameter every matching row is returned.
+    """
+    inspection = models.Inspection
+    query = db.query(
+        inspection.id,
+        inspection.gear_id,
+        inspection.inspection_date,
+        inspection.inspector_id,
+        inspection.inspection_type,
+        inspection.condition_notes,
+        inspection.result,
+        inspection.client_id,
+    )
+    if gear_id is not None:
+        query = query.filter(inspection.gear_id == gear_id)
+    if inspector_id is not None:
+        query = query.filter(inspection.inspector_id == inspector_id)
+    if result is not None:
+        query = query.filter(inspection.result == result)
+    if inspection_type is not None:
+        query = query.filter(inspection.inspection_type == inspection_type)
+    if from_date is not None:
+        query = query.filter(inspection.inspection_date >= from_date)
+    if to_date is not None:
+        query = query.filter(inspection.inspection_date <= to_date)
+    if cursor:
+        try:
+            query = query.filter(newest_first_after(inspection.inspection_date, inspection.id, cursor))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    query = query.order_by(inspection.inspection_date.desc(), inspection.id.desc())
+    size = page_size(limit, cursor)
+    if size is None:
+        return [row._asdict() for row in query.all()]
+    rows = query.limit(size + 1).all()
+    if len(rows) > size:
+        rows = rows[:size]
+        response.headers["X-Next-Cursor"] = encode_cursor(rows[-1].inspection_date, rows[-1].id)
+    return [row._asdict() for row in rows]
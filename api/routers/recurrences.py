@@ -0,0 +1,94 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from datetime import date, time, timedelta
+import models
+import schemas
+from changelog import record_change
+from dependencies import get_db
+from invalidation import publish_change
+from push import gear_scope
+from recurrence import active_filter, expand, format_weekdays
+from scheduling import ACTIVE_SCHEDULE_CONFLICT, gears_with_active_schedule, lock_gears
+from validation import not_found
+
+router = APIRouter(
+    prefix="/recurrences",
+    tags=["recurrences"]
+)
+
+# Longest window GET /recurrences/occurrences expands in one call
+MAX_WINDOW_DAYS = 366
+
+
+@router.post("/", response_model=schemas.MaintenanceRecurrence)
+def create_recurrence(recurrence: schemas.MaintenanceRecurrenceCreate, db: Session = Depends(get_db)):
+    if recurrence.until_date is not None and recurrence.until_date < recurrence.start_date:
+        raise HTTPException(status_code=400, detail="until_date must not be before start_date")
+
+    # Same rule as POST /schedules/: one active schedule per gear, checked
+    # under the gear row lock, which also tells whether the gear exists
+    if not lock_gears(db, [recurrence.gear_id]):
+        db.rollback()
+        raise HTTPException(status_code=400, detail=not_found(models.Gear, recurrence.gear_id))
+    if gears_with_active_schedule(db, [recurrence.gear_id], date.today()):
+        db.rollback()
+        raise HTTPException(status_code=409, detail=ACTIVE_SCHEDULE_CONFLICT)
+
+    data = recurrence.dict()
+    data["weekdays"] = format_weekdays(recurrence.weekdays)
+    data["scheduled_time"] = recurrence.scheduled_time or time(hour=0, minute=0)
+    new_rule = models.MaintenanceRecurrence(**data)
+    db.add(new_rule)
+    db.flush()
+    record_change(db, models.MaintenanceRecurrence, new_rule.id)
+    db.commit()
+    db.refresh(new_rule)
+    publish_change(
+        models.MaintenanceRecurrence, new_rule.id,
+        gear_id=new_rule.gear_id, **gear_scope(db, new_rule.gear_id),
+    )
+    return new_rule
+
+
+@router.get("/", response_model=List[schemas.MaintenanceRecurrence])
+def get_recurrences(gear_id: Optional[int] = None, db: Session = Depends(get_db)):
+    query = db.query(*models.MaintenanceRecurrence.__table__.columns)
+    if gear_id is not None:
+        query = query.filter(models.MaintenanceRecurrence.gear_id == gear_id)
+    return [row._asdict() for row in query.all()]
+
+
+@router.get("/occurrences", response_model=List[schemas.MaintenanceOccurrence])
+def get_occurrences(
+    from_date: date = Query(..., alias="from"),
+    to_date: date = Query(..., alias="to"),
+    gear_id: Optional[int] = None,
+    db: Session = Depends(get_db),
+):
+    """Occurrences of the active recurrences between ``from`` and ``to``, inclusive.
+
+    Computed from the rules on each call; nothing is stored per occurrence.
+    """
+    if to_date < from_date:
+        raise HTTPException(status_code=400, detail="'to' must not be before 'from'")
+    if to_date - from_date > timedelta(days=MAX_WINDOW_DAYS):
+        raise HTTPException(status_code=400, detail=f"Window is limited to {MAX_WINDOW_DAYS} days")
+
+    rule = models.MaintenanceRecurrence
+    query = db.query(rule).filter(rule.start_date <= to_date, *active_filter(from_date))
+    if gear_id is not None:
+        query = query.filter(rule.gear_id == gear_id)
+
+    occurrences = [
+        {
+            "recurrence_id": r.id,
+            "gear_id": r.gear_id,
+            "scheduled_date": day,
+            "scheduled_time": r.scheduled_time,
+        }
+        for r in query.all()
+        for day in expand(r, from_date, to_date)
+    ]
+    occurrences.sort(key=lambda o: (o["scheduled_date"], o["scheduled_time"], o["recurrence_id"]))
+    return occurrences
@@ -1,25 +1,99 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import and_, or_
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
+from datetime import datetime
 import models
 import schemas
+from changelog import record_change
 from dependencies import get_db
+from invalidation import publish_change
+from pagination import SYNC_SAFETY_WINDOW, decode_cursor, encode_cursor
+from reminder_timers import timer_details
+from validation import reference_errors
 
 router = APIRouter(
     prefix="/reminders",
     tags=["reminders"]
 )
 
+REMINDER_COLUMNS = (
+    models.MaintenanceReminder.id,
+    models.MaintenanceReminder.gear_id,
+    models.MaintenanceReminder.reminder_date,
+    models.MaintenanceReminder.reminder_time,
+    models.MaintenanceReminder.message,
+    models.MaintenanceReminder.sent,
+    models.MaintenanceReminder.recurrence_id,
+    models.MaintenanceReminder.updated_at,
+)
+
 
 @router.post("/", response_model=schemas.MaintenanceReminder)
 def create_reminder(reminder: schemas.MaintenanceReminderCreate, db: Session = Depends(get_db)):
-    new_reminder = models.MaintenanceReminder(**reminder.dict())
+    data = reminder.dict()
+    new_reminder = models.MaintenanceReminder(**data)
     db.add(new_reminder)
+    with reference_errors(db, models.MaintenanceReminder, data):
+        db.flush()
+    record_change(db, models.MaintenanceReminder, new_reminder.id)
     db.commit()
     db.refresh(new_reminder)
+    publish_change(
+        models.MaintenanceReminder, new_reminder.id,
+        gear_id=new_reminder.gear_id, **timer_details(new_reminder),
+    )
     return new_reminder
 
 
 @router.get("/", response_model=List[schemas.MaintenanceReminder])
 def get_reminders(db: Session = Depends(get_db)):
-    return db.query(models.MaintenanceReminder).all()
+    rows = db.query(*REMINDER_COLUMNS).all()
+    return [row._asdict() for row in rows]
+
+
+@router.get("/changes", response_model=schemas.MaintenanceReminderChanges)
+def get_reminder_changes(
+    since: Optional[str] = Query(None, description="next_token of the previous sync; omit for a full sync"),
+    limit: int = Query(500, ge=1, le=5000),
+    db: Session = Depends(get_db),
+):
+    """Reminders created or modified after the ``since`` token.
+
+    Changes come oldest first, keyed on ``(updated_at, id)``. Call again with
+    ``next_token`` while ``has_more`` is true. A reminder can be returned more
+    than once, so clients should upsert by id.
+    """
+    reminder = models.MaintenanceReminder
+    query = db.query(*REMINDER_COLUMNS)
+
+    cursor = None
+    if since:
+        try:
+            updated_at, last_id = decode_cursor(since, 2)
+            cursor = (datetime.fromisoformat(updated_at), int(last_id))
+        except (ValueError, TypeError):
+            raise HTTPException(status_code=400, detail="Invalid sync token")
+        query = query.filter(
+            or_(
+                reminder.updated_at > cursor[0],
+                and_(reminder.updated_at == cursor[0], reminder.id > cursor[1]),
+            )
+        )
+
+    rows = query.order_by(reminder.updated_at, reminder.id).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    next_cursor = (rows[-1].updated_at, rows[-1].id) if rows else cursor
+    if not has_more:
+        horizon = (models.utcnow() - SYNC_SAFETY_WINDOW, 0)
+        next_cursor = min(next_cursor, horizon) if next_cursor else horizon
+        if cursor:
+            next_cursor = max(cursor, next_cursor)
+
+    return {
+        "reminders": [row._asdict() for row in rows],
+        "next_token": encode_cursor(*next_cursor),
+        "has_more": has_more,
+    }
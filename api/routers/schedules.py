@@ -1,59 +1,279 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from typing import List
+from collections import defaultdict
+import hashlib
+import json
+from typing import List, Optional
 import models
 import schemas
+from cache import calendar_cache
 from dependencies import get_db
-from datetime import date, time
+from invalidation import publish_change
+from planner import build_slots, load_booked, load_gears, plan_slots
+from push import gear_scope
+from recurrence import active_filter, expand
+from reminder_timers import due_at
+from scheduling import (
+    ACTIVE_SCHEDULE_CONFLICT, create_schedules, gears_with_active_schedule, insert_schedules, lock_gears,
+    select_gears,
+)
+from validation import not_found
+from datetime import date, time, timedelta
 
 router = APIRouter(
     prefix="/schedules",
     tags=["schedules"]
 )
 
+# Longest window GET /schedules/calendar returns in one call
+MAX_CALENDAR_DAYS = 366
+
 
 @router.post("/", response_model=schemas.MaintenanceSchedule)
 def create_schedule(schedule: schemas.MaintenanceScheduleCreate, db: Session = Depends(get_db)):
     # Prevent multiple active schedules for the same gear.
-    # Consider a schedule "active" if it is set for today or in the future.
-    existing = (
-        db.query(models.MaintenanceSchedule)
-        .filter(
-            models.MaintenanceSchedule.gear_id == schedule.gear_id,
-            models.MaintenanceSchedule.scheduled_date >= date.today(),
-        )
-        .first()
-    )
-    if existing is not None:
-        raise HTTPException(
-            status_code=409,
-            detail="This gear already has a pending maintenance schedule. Complete or cancel it before adding another.",
+    # Consider a schedule "active" if it is set for today or in the future,
+    # or if the gear has a recurrence with occurrences still to come.
+    # The gear row lock and the pending constraint make the check hold under
+    # concurrent requests (see scheduling.py). Locking also tells whether the
+    # gear exists.
+    today = date.today()
+    if not lock_gears(db, [schedule.gear_id]):
+        db.rollback()
+        raise HTTPException(status_code=400, detail=not_found(models.Gear, schedule.gear_id))
+    if gears_with_active_schedule(db, [schedule.gear_id], today):
+        db.rollback()
+        raise HTTPException(status_code=409, detail=ACTIVE_SCHEDULE_CONFLICT)
+
+    # Schedule, reminder and change log rows commit together
+    try:
+        created, reminder_ids = insert_schedules(
+            db, [(schedule.gear_id, schedule.scheduled_date, schedule.scheduled_time)], today
         )
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=409, detail=ACTIVE_SCHEDULE_CONFLICT)
+    new_sched = created[0]
+    db.refresh(new_sched)
 
-    new_sched = models.MaintenanceSchedule(
-        gear_id=schedule.gear_id,
-        scheduled_date=schedule.scheduled_date,
-        scheduled_time=schedule.scheduled_time or time(hour=0, minute=0)
+    scope = gear_scope(db, new_sched.gear_id)
+    timer = {}
+    if new_sched.scheduled_date is not None:
+        timer = {"due": due_at(new_sched.scheduled_date, new_sched.scheduled_time).isoformat()}
+    publish_change(models.MaintenanceSchedule, new_sched.id, gear_id=new_sched.gear_id, **scope)
+    publish_change(
+        models.MaintenanceReminder, reminder_ids[0],
+        gear_id=new_sched.gear_id, **scope, **timer,
     )
-    db.add(new_sched)
-    db.commit()
-    db.refresh(new_sched)
-    
-    new_reminder = models.MaintenanceReminder(
-        gear_id=new_sched.gear_id,
-        schedule_id=new_sched.id,
-        reminder_date=new_sched.scheduled_date,
-        reminder_time=new_sched.scheduled_time or time(hour=0, minute=0),
-        message=f"Maintenance scheduled for gear {new_sched.gear_id}",
-        sent=False
+    return new_sched
+
+
+@router.post("/bulk", response_model=schemas.BulkScheduleResult)
+def create_schedules_bulk(request: schemas.BulkScheduleCreate, db: Session = Depends(get_db)):
+    """Schedule many gears for the same date and time in one transaction.
+
+    Gears are selected by ``gear_ids`` and/or ``station_id`` and
+    ``equipment_type``. Gears that already have an active schedule are
+    skipped and reported, as are unknown ids.
+    """
+    if request.gear_ids is None and request.station_id is None and request.equipment_type is None:
+        raise HTTPException(status_code=400, detail="Provide gear_ids, station_id or equipment_type")
+
+    station_by_gear = select_gears(db, request.gear_ids, request.station_id, request.equipment_type)
+    missing = sorted(set(request.gear_ids or []) - set(station_by_gear))
+
+    scheduled_time = request.scheduled_time or time(hour=0, minute=0)
+    items = [(gear_id, request.scheduled_date, scheduled_time) for gear_id in station_by_gear]
+    try:
+        created, busy = create_schedules(db, items, station_by_gear, date.today())
+    except IntegrityError:
+        # A concurrent request scheduled one of these gears; nothing was written
+        raise HTTPException(status_code=409, detail="Some gears were scheduled concurrently, retry the request")
+
+    return {
+        "created": [
+            {
+                "id": row.id,
+                "gear_id": row.gear_id,
+                "scheduled_date": row.scheduled_date,
+                "scheduled_time": row.scheduled_time,
+            }
+            for row in created
+        ],
+        "skipped_gear_ids": sorted(busy),
+        "missing_gear_ids": missing,
+    }
+
+
+@router.post("/plan", response_model=schemas.SchedulePlan)
+def plan_schedules(request: schemas.SchedulePlanRequest, db: Session = Depends(get_db)):
+    """Spread gears over maintenance slots without exceeding station capacity.
+
+    Gears are selected like ``POST /schedules/bulk``. Each station takes up to
+    ``station_capacity[station_id]`` (default ``capacity``) gears per slot;
+    slots are ``slot_times`` on the allowed ``weekdays`` between
+    ``start_date`` and ``end_date``, minus what is already booked. With
+    ``commit`` the plan is written through the bulk path in one transaction.
+    """
+    if request.gear_ids is None and request.station_id is None and request.equipment_type is None:
+        raise HTTPException(status_code=400, detail="Provide gear_ids, station_id or equipment_type")
+    today = date.today()
+    # Past slots would be written as schedules that are never pending and
+    # reminders dispatched at once
+    if request.start_date < today:
+        raise HTTPException(status_code=400, detail="start_date must not be in the past")
+    if request.end_date < request.start_date:
+        raise HTTPException(status_code=400, detail="end_date must not be before start_date")
+    if request.end_date - request.start_date > timedelta(days=MAX_CALENDAR_DAYS):
+        raise HTTPException(status_code=400, detail=f"Window is limited to {MAX_CALENDAR_DAYS} days")
+    if any(day < 0 or day > 6 for day in request.weekdays or []):
+        raise HTTPException(status_code=400, detail="weekdays must be between 0 (Monday) and 6 (Sunday)")
+
+    station_by_gear = select_gears(db, request.gear_ids, request.station_id, request.equipment_type)
+    missing = sorted(set(request.gear_ids or []) - set(station_by_gear))
+    busy = gears_with_active_schedule(db, station_by_gear, today)
+    free = {gear_id: station for gear_id, station in station_by_gear.items() if gear_id not in busy}
+
+    slots = build_slots(request.start_date, request.end_date, request.slot_times, request.weekdays)
+    assignments, unassigned = plan_slots(
+        load_gears(db, free, timedelta(days=request.inspection_interval_days)),
+        slots,
+        request.station_capacity,
+        request.capacity,
+        load_booked(db, set(free.values()), request.start_date, request.end_date),
     )
-    db.add(new_reminder)
-    db.commit()
-    db.refresh(new_reminder)
+    assignments.sort(key=lambda a: (a.scheduled_date, a.scheduled_time, a.station_id, a.gear_id))
 
-    return new_sched
+    created = []
+    if request.commit:
+        items = [(a.gear_id, a.scheduled_date, a.scheduled_time) for a in assignments]
+        try:
+            created, now_busy = create_schedules(db, items, free, today)
+        except IntegrityError:
+            raise HTTPException(status_code=409, detail="Some gears were scheduled concurrently, retry the request")
+        busy |= now_busy
+
+    return {
+        "assignments": [a._asdict() for a in assignments],
+        "unassigned_gear_ids": unassigned,
+        "skipped_gear_ids": sorted(busy),
+        "missing_gear_ids": missing,
+        "committed": request.commit,
+        "created": [
+            {
+                "id": row.id,
+                "gear_id": row.gear_id,
+                "scheduled_date": row.scheduled_date,
+                "scheduled_time": row.scheduled_time,
+            }
+            for row in created
+        ],
+    }
 
 
 @router.get("/", response_model=List[schemas.MaintenanceSchedule])
 def get_schedules(db: Session = Depends(get_db)):
-    return db.query(models.MaintenanceSchedule).all()
+    rows = db.query(
+        models.MaintenanceSchedule.id,
+        models.MaintenanceSchedule.gear_id,
+        models.MaintenanceSchedule.scheduled_date,
+        models.MaintenanceSchedule.scheduled_time,
+    ).all()
+    return [row._asdict() for row in rows]
+
+
+def _calendar_days(db: Session, from_date: date, to_date: date, station_id: Optional[int]):
+    schedule = models.MaintenanceSchedule
+    rule = models.MaintenanceRecurrence
+
+    # One range read on ix_maintenanceSchedule_date; gear only for names and station
+    query = (
+        db.query(
+            schedule.id,
+            schedule.gear_id,
+            schedule.scheduled_date,
+            schedule.scheduled_time,
+            models.Gear.gear_name,
+            models.Gear.station_id,
+        )
+        .join(models.Gear, models.Gear.id == schedule.gear_id)
+        .filter(schedule.scheduled_date.between(from_date, to_date))
+    )
+    rules = (
+        db.query(rule, models.Gear.gear_name, models.Gear.station_id)
+        .join(models.Gear, models.Gear.id == rule.gear_id)
+        .filter(rule.start_date <= to_date, *active_filter(from_date))
+    )
+    if station_id is not None:
+        query = query.filter(models.Gear.station_id == station_id)
+        rules = rules.filter(models.Gear.station_id == station_id)
+
+    buckets = defaultdict(list)
+    for row in query.all():
+        buckets[row.scheduled_date].append({
+            "schedule_id": row.id,
+            "gear_id": row.gear_id,
+            "gear_name": row.gear_name,
+            "station_id": row.station_id,
+            "scheduled_time": row.scheduled_time,
+        })
+    for recurrence, gear_name, gear_station_id in rules.all():
+        for day in expand(recurrence, from_date, to_date):
+            buckets[day].append({
+                "recurrence_id": recurrence.id,
+                "gear_id": recurrence.gear_id,
+                "gear_name": gear_name,
+                "station_id": gear_station_id,
+                "scheduled_time": recurrence.scheduled_time,
+            })
+
+    days = []
+    for day in sorted(buckets):
+        items = sorted(buckets[day], key=lambda item: (item["scheduled_time"], item["gear_id"]))
+        days.append({"day": day, "count": len(items), "items": items})
+    return days
+
+
+def _tagged_days(days: list) -> tuple:
+    """Calendar days with their ETag, a hash of the response body"""
+    body = json.dumps(jsonable_encoder(days), sort_keys=True, separators=(",", ":"))
+    return days, '"%s"' % hashlib.sha1(body.encode()).hexdigest()
+
+
+@router.get("/calendar", response_model=List[schemas.CalendarDay])
+def get_schedule_calendar(
+    request: Request,
+    response: Response,
+    from_date: date = Query(..., alias="from"),
+    to_date: date = Query(..., alias="to"),
+    station_id: Optional[int] = None,
+    db: Session = Depends(get_db),
+):
+    """Schedules and recurring occurrences between ``from`` and ``to``, by day.
+
+    Only days with at least one item are returned. Windows that ended before
+    today are cached in process and sent with an ``ETag``; clients must
+    revalidate (``no-cache``), since back-dated schedules still change past
+    windows, and get a 304 while nothing did.
+    """
+    if to_date < from_date:
+        raise HTTPException(status_code=400, detail="'to' must not be before 'from'")
+    if to_date - from_date > timedelta(days=MAX_CALENDAR_DAYS):
+        raise HTTPException(status_code=400, detail=f"Window is limited to {MAX_CALENDAR_DAYS} days")
+
+    if to_date >= date.today():
+        response.headers["Cache-Control"] = "no-cache"
+        return _calendar_days(db, from_date, to_date, station_id)
+
+    days, etag = calendar_cache.get_or_load(
+        ("calendar", from_date, to_date, station_id),
+        lambda: _tagged_days(_calendar_days(db, from_date, to_date, station_id)),
+    )
+    headers = {"Cache-Control": "no-cache", "ETag": etag}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return days
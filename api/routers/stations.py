@@ -1,9 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from typing import List
+from datetime import date
 import models
 import schemas
+from cache import dashboard_cache, list_reference
+from dashboard import station_dashboard
+from changelog import record_change
 from dependencies import get_db
+from invalidation import publish_change
+from validation import reference_errors
 
 router = APIRouter(
     prefix="/stations",
@@ -13,19 +19,37 @@ router = APIRouter(
 
 @router.post("/", response_model=schemas.Station)
 def create_station(station: schemas.StationCreate, db: Session = Depends(get_db)):
-    # Validate foreign key reference
-    if station.department_id is not None:
-        department = db.query(models.Department).filter(models.Department.id == station.department_id).first()
-        if not department:
-            raise HTTPException(status_code=400, detail=f"Department with id {station.department_id} does not exist")
-    
-    new_station = models.Station(**station.dict())
+    data = station.dict()
+    new_station = models.Station(**data)
     db.add(new_station)
+    # An unknown department id is rejected by the FK constraint
+    with reference_errors(db, models.Station, data):
+        db.flush()
+    record_change(db, models.Station, new_station.id)
     db.commit()
     db.refresh(new_station)
+    publish_change(models.Station, new_station.id)
     return new_station
 
 
 @router.get("/", response_model=List[schemas.Station])
 def get_stations(db: Session = Depends(get_db)):
-    return db.query(models.Station).all()
+    return list_reference(db, models.Station)
+
+
+@router.get("/{station_id}/dashboard", response_model=schemas.StationDashboard)
+def get_station_dashboard(
+    station_id: int,
+    expiring_within: int = Query(30, ge=0, le=365, description="Days ahead counted as expiring soon"),
+    recent_days: int = Query(30, ge=1, le=365, description="Days back counted as recent inspections"),
+    db: Session = Depends(get_db),
+):
+    """Gear, maintenance, damage and inspection counts of a station, cached briefly"""
+    today = date.today()
+    dashboard = dashboard_cache.get_or_load(
+        ("station", station_id, today, expiring_within, recent_days),
+        lambda: station_dashboard(db, station_id, today, expiring_within, recent_days),
+    )
+    if dashboard is None:
+        raise HTTPException(status_code=404, detail="Station not found")
+    return dashboard
@@ -0,0 +1,82 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from collections import defaultdict
+import models
+import schemas
+from changelog import SYNCED_MODELS, read_changes
+from dependencies import get_db
+from pagination import SYNC_SAFETY_WINDOW
+
+router = APIRouter(
+    prefix="/sync",
+    tags=["sync"]
+)
+
+# Response field for each synced table
+RESPONSE_FIELDS = {
+    models.Department.__tablename__: "departments",
+    models.Station.__tablename__: "stations",
+    models.Firefighter.__tablename__: "firefighters",
+    models.Gear.__tablename__: "gears",
+    models.Inspection.__tablename__: "inspections",
+    models.MaintenanceSchedule.__tablename__: "schedules",
+    models.MaintenanceReminder.__tablename__: "reminders",
+    models.MaintenanceRecurrence.__tablename__: "recurrences",
+    models.DamageReport.__tablename__: "damage_reports",
+}
+
+MODELS_BY_TABLE = {model.__tablename__: model for model in SYNCED_MODELS}
+
+
+def _load_rows(db: Session, entity_type: str, ids):
+    if entity_type == models.DamageReport.__tablename__:
+        # Same shape as GET /damage-reports, names resolved by outer joins
+        query = (
+            db.query(
+                *models.DamageReport.__table__.columns,
+                models.Gear.gear_name,
+                models.Firefighter.name.label("reporter_name"),
+            )
+            .outerjoin(models.Gear, models.Gear.id == models.DamageReport.gear_id)
+            .outerjoin(models.Firefighter, models.Firefighter.id == models.DamageReport.reporter_id)
+            .filter(models.DamageReport.id.in_(ids))
+        )
+    else:
+        model = MODELS_BY_TABLE[entity_type]
+        query = db.query(*model.__table__.columns).filter(model.id.in_(ids))
+    return [row._asdict() for row in query.all()]
+
+
+@router.get("/", response_model=schemas.SyncResponse)
+def sync(
+    since: int = Query(0, ge=0, description="next_since of the previous sync; 0 for a full sync"),
+    limit: int = Query(1000, ge=1, le=5000, description="maximum number of entities per page"),
+    db: Session = Depends(get_db),
+):
+    """Current state of every entity changed after ``since``.
+
+    Each changed entity is returned once, however often it changed, so the
+    payload is bounded by the number of changed entities. Call again with
+    ``next_since`` while ``has_more`` is true and upsert rows by id.
+    """
+    changes = read_changes(db, since, limit)
+    # Never move past a recent change, on any page; a write with a lower seq
+    # may still be committing and would otherwise be skipped. Recent changes
+    # are still returned, and returned again by the next sync.
+    cutoff = models.utcnow() - SYNC_SAFETY_WINDOW
+    settled = next(
+        (index for index, change in enumerate(changes) if change.changed_at > cutoff), len(changes)
+    )
+    has_more = settled > limit
+    changes = changes[:limit]
+    next_since = changes[min(settled, limit) - 1].seq if settled else since
+
+    ids_by_type = defaultdict(list)
+    for change in changes:
+        if change.entity_type in RESPONSE_FIELDS:
+            ids_by_type[change.entity_type].append(change.entity_id)
+
+    response = {"next_since": next_since, "has_more": has_more}
+    for entity_type, ids in ids_by_type.items():
+        response[RESPONSE_FIELDS[entity_type]] = _load_rows(db, entity_type, ids)
+    return response
@@ -0,0 +1,210 @@
+"""
+Maintenance scheduling shared by the schedule, bulk and planner endpoints.
+
+A gear has at most one active schedule. Creating one is safe under
+concurrent requests on any number of workers:
+- ``lock_gears`` takes a row lock on each affected gear (``SELECT ... FOR
+  UPDATE``), so writers for the same gear queue up while writers for other
+  gears proceed
+- ``maintenanceSchedule.pending`` is TRUE for a schedule dated today or later
+  and NULL otherwise, and ``UNIQUE (gear_id, pending)`` rejects a second
+  pending schedule even where row locks are not available (SQLite)
+- the schedule, its reminder and the change log rows commit together
+
+``insert_schedules`` takes ``(gear_id, scheduled_date, scheduled_time)``
+items and writes their schedules, reminders and change log rows with a
+handful of statements, whatever the number of gears: batched INSERTs (which
+PyMySQL sends as multi-row statements), an ``INSERT ... SELECT`` and the
+queries reading back the new ids. It does not commit, so
+callers decide the transaction boundary. ``create_schedules`` wraps it with
+the locking, conflict check, commit and events the bulk and planner
+endpoints share.
+"""
+from collections import defaultdict
+from datetime import date, time
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import String, cast, false, func, insert, literal, select, true
+from sqlalchemy.orm import Session
+
+import models
+from cache import get_reference
+from changelog import record_changes
+from invalidation import publish_change
+from recurrence import active_filter, next_occurrence
+from reminder_timers import due_at
+
+ScheduleItem = Tuple[int, date, time]
+
+ACTIVE_SCHEDULE_CONFLICT = (
+    "This gear already has a pending maintenance schedule. Complete or cancel it before adding another."
+)
+
+
+def select_gears(
+    db: Session,
+    gear_ids: Optional[List[int]] = None,
+    station_id: Optional[int] = None,
+    equipment_type: Optional[str] = None,
+) -> Dict[int, int]:
+    """Station of every gear matching all the given filters, by gear id"""
+    gear = models.Gear
+    query = db.query(gear.id, gear.station_id)
+    if gear_ids is not None:
+        query = query.filter(gear.id.in_(gear_ids))
+    if station_id is not None:
+        query = query.filter(gear.station_id == station_id)
+    if equipment_type is not None:
+        query = query.filter(gear.equipment_type == equipment_type)
+    return dict(query.order_by(gear.id).all())
+
+
+def lock_gears(db: Session, gear_ids: Iterable[int]) -> List[int]:
+    """Row-lock the gears, in id order so concurrent writers cannot deadlock"""
+    gear = models.Gear
+    return [
+        gear_id
+        for (gear_id,) in db.query(gear.id)
+        .filter(gear.id.in_(list(gear_ids)))
+        .order_by(gear.id)
+        .with_for_update()
+    ]
+
+
+def is_pending(scheduled_date: date, today: date):
+    """Value of the ``pending`` column: TRUE while the schedule is upcoming"""
+    return True if scheduled_date is not None and scheduled_date >= today else None
+
+
+def expire_pending(db: Session, gear_ids: Iterable[int], today: date) -> None:
+    """Clear ``pending`` on schedules whose date has passed"""
+    schedule = models.MaintenanceSchedule
+    (
+        db.query(schedule)
+        .filter(
+            schedule.gear_id.in_(list(gear_ids)),
+            schedule.pending == true(),
+            schedule.scheduled_date < today,
+        )
+        .update({schedule.pending: None}, synchronize_session=False)
+    )
+
+
+def gears_with_active_schedule(db: Session, gear_ids: Iterable[int], today: date) -> Set[int]:
+    """Gears among ``gear_ids`` that already have a pending schedule or live recurrence"""
+    gear_ids = list(gear_ids)
+    if not gear_ids:
+        return set()
+    schedule = models.MaintenanceSchedule
+    busy = {
+        gear_id
+        for (gear_id,) in db.query(schedule.gear_id)
+        .filter(schedule.gear_id.in_(gear_ids), schedule.scheduled_date >= today)
+        .distinct()
+    }
+    rules = (
+        db.query(models.MaintenanceRecurrence)
+        .filter(models.MaintenanceRecurrence.gear_id.in_(gear_ids), *active_filter(today))
+        .all()
+    )
+    busy.update(rule.gear_id for rule in rules if next_occurrence(rule, today) is not None)
+    return busy
+
+
+def insert_schedules(
+    db: Session, items: List[ScheduleItem], today: date
+) -> Tuple[List[models.MaintenanceSchedule], List[int]]:
+    """Insert schedules and their reminders; returns the schedules and reminder ids.
+
+    Takes at most one item per gear. Lock the gears and check conflicts
+    first; a conflict missed by the check surfaces as an IntegrityError.
+    """
+    if not items:
+        return [], []
+    schedule = models.MaintenanceSchedule
+    reminder = models.MaintenanceReminder
+    gear_ids = [gear_id for gear_id, _, _ in items]
+    expire_pending(db, gear_ids, today)
+    # One batched INSERT, without fetching a primary key per row
+    db.execute(insert(schedule), [
+        {
+            "gear_id": gear_id,
+            "scheduled_date": scheduled_date,
+            "scheduled_time": scheduled_time or time(hour=0, minute=0),
+            "pending": is_pending(scheduled_date, today),
+        }
+        for gear_id, scheduled_date, scheduled_time in items
+    ])
+    # With the gears locked, each gear's newest schedule is the one just added
+    newest = (
+        select(func.max(schedule.id))
+        .where(schedule.gear_id.in_(gear_ids))
+        .group_by(schedule.gear_id)
+    )
+    schedules = db.query(schedule).filter(schedule.id.in_(newest)).order_by(schedule.id).all()
+    schedule_ids = [row.id for row in schedules]
+
+    # Reminders are copied from the new schedules in one INSERT ... SELECT,
+    # with the same message create_schedule writes
+    db.execute(
+        insert(reminder).from_select(
+            ["gear_id", "schedule_id", "reminder_date", "reminder_time", "message", "sent", "updated_at"],
+            select(
+                schedule.gear_id,
+                schedule.id,
+                schedule.scheduled_date,
+                schedule.scheduled_time,
+                literal("Maintenance scheduled for gear ") + cast(schedule.gear_id, String),
+                false(),
+                literal(models.utcnow()),
+            ).where(schedule.id.in_(schedule_ids)),
+        )
+    )
+    # Same order as the schedules, whose ids ascend in insertion order
+    reminder_ids = [
+        reminder_id
+        for (reminder_id,) in db.query(reminder.id)
+        .filter(reminder.schedule_id.in_(schedule_ids))
+        .order_by(reminder.schedule_id)
+    ]
+
+    record_changes(db, models.MaintenanceSchedule, schedule_ids)
+    record_changes(db, models.MaintenanceReminder, reminder_ids)
+    return schedules, reminder_ids
+
+
+def create_schedules(
+    db: Session, items: List[ScheduleItem], station_by_gear: Dict[int, int], today: date
+) -> Tuple[List[models.MaintenanceSchedule], Set[int]]:
+    """Schedule ``items`` in one transaction, skipping gears that are busy.
+
+    Returns the created schedules and the skipped gear ids, and publishes
+    one event per station and per reminder due time. An IntegrityError from
+    a concurrent writer is raised after rolling back; nothing is written.
+    """
+    lock_gears(db, {gear_id for gear_id, _, _ in items})
+    busy = gears_with_active_schedule(db, {gear_id for gear_id, _, _ in items}, today)
+    items = [item for item in items if item[0] not in busy]
+    try:
+        created, reminder_ids = insert_schedules(db, items, today)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    schedules_by_station = defaultdict(list)
+    reminders_by_due = defaultdict(list)
+    for new_sched, reminder_id in zip(created, reminder_ids):
+        schedules_by_station[station_by_gear.get(new_sched.gear_id)].append(new_sched.id)
+        if new_sched.scheduled_date is not None:
+            due = due_at(new_sched.scheduled_date, new_sched.scheduled_time)
+            reminders_by_due[due].append(reminder_id)
+    for station_id, schedule_ids in schedules_by_station.items():
+        station = get_reference(db, models.Station, station_id) if station_id is not None else None
+        publish_change(
+            models.MaintenanceSchedule, ids=schedule_ids, station_id=station_id,
+            department_id=station["department_id"] if station else None,
+        )
+    for due, due_reminder_ids in reminders_by_due.items():
+        publish_change(models.MaintenanceReminder, ids=due_reminder_ids, due=due.isoformat())
+    return created, busy
@@ -1,6 +1,6 @@
-from pydantic import BaseModel, field_validator
-from datetime import date, time
-from typing import Optional, List
+from pydantic import BaseModel, Field, field_validator
+from datetime import date, datetime, time
+from typing import Dict, Optional, List
 
 class DepartmentBase(BaseModel):
     department_name: str
@@ -93,6 +93,7 @@ class GearCreate(GearBase):
 class Gear(GearBase):
     id: int
     next_maintenance_date: Optional[date] = None
+    next_maintenance_time: Optional[str] = None
 
     class Config:
         orm_mode = True
@@ -113,11 +114,125 @@ class InspectionCreate(InspectionBase):
 
 class Inspection(InspectionBase):
     id: int
+    client_id: Optional[str] = None
 
     class Config:
         orm_mode = True
 
 
+class InspectionBatchItem(InspectionBase):
+    # Generated on the device; resending the same id never creates a second row
+    client_id: str
+
+    @field_validator('client_id')
+    @classmethod
+    def client_id_length(cls, v: str) -> str:
+        if not 1 <= len(v) <= 64:
+            raise ValueError('must be 1 to 64 characters')
+        return v
+
+
+class InspectionBatchCreate(BaseModel):
+    items: List[InspectionBatchItem]
+
+    @field_validator('items')
+    @classmethod
+    def batch_size(cls, v: List[InspectionBatchItem]) -> List[InspectionBatchItem]:
+        if len(v) > 500:
+            raise ValueError('at most 500 items per batch')
+        return v
+
+
+class InspectionBatchItemResult(BaseModel):
+    client_id: str
+    status: str  # "created", "duplicate" or "invalid"
+    id: Optional[int] = None
+    error: Optional[str] = None
+
+
+class InspectionBatchResult(BaseModel):
+    results: List[InspectionBatchItemResult]
+
+
+class InspectionFailureRate(BaseModel):
+    # Dimensions left out of group_by are None
+    station_id: Optional[int] = None
+    equipment_type: Optional[str] = None
+    month: Optional[date] = None
+    total: int
+    passed: int
+    failed: int
+    # failed / (passed + failed); None while nothing has passed or failed
+    failure_rate: Optional[float] = None
+
+
+class OverdueGear(BaseModel):
+    gear_id: int
+    gear_name: str
+    serial_number: Optional[str] = None
+    equipment_type: Optional[str] = None
+    last_inspected_at: Optional[date] = None
+    # None for gear that has never been inspected
+    due_date: Optional[date] = None
+    days_overdue: Optional[int] = None
+
+
+class StationCompliance(BaseModel):
+    station_id: int
+    station_name: str
+    overdue: List[OverdueGear]
+
+
+class StationDashboard(BaseModel):
+    station_id: int
+    station_name: str
+    gear_count: int
+    # Expiry date within the next expiring_within days
+    expiring_soon: int
+    # Gears with a past schedule and no inspection since
+    overdue_maintenance: int
+    # pending and in_repair
+    open_damage_reports: int
+    # Inspections in the last recent_days days
+    recent_inspections: int
+
+
+class DepartmentDashboard(BaseModel):
+    department_id: int
+    department_name: str
+    gear_count: int
+    expiring_soon: int
+    overdue_maintenance: int
+    open_damage_reports: int
+    recent_inspections: int
+    stations: List[StationDashboard]
+
+
+class DepartmentRollupCounts(BaseModel):
+    gear_count: int
+    expiring_soon: int
+    expired: int
+    # Inspections of the rollup window
+    inspections: int
+    passed: int
+    failed: int
+    # passed / (passed + failed); None while nothing has passed or failed
+    pass_rate: Optional[float] = None
+    open_damage_reports: int
+
+
+class DepartmentRollupType(DepartmentRollupCounts):
+    equipment_type: Optional[str] = None
+
+
+class DepartmentRollup(DepartmentRollupCounts):
+    department_id: int
+    department_name: str
+    # Last run of the rollup job; None before the first run
+    refreshed_at: Optional[datetime] = None
+    by_equipment_type: List[DepartmentRollupType]
+
+
 class MaintenanceScheduleBase(BaseModel):
     gear_id: int
     scheduled_date: Optional[date] = None
@@ -134,6 +249,133 @@ class MaintenanceSchedule(MaintenanceScheduleBase):
         orm_mode = True
 
 
+class BulkScheduleCreate(BaseModel):
+    gear_ids: Optional[List[int]] = None
+    station_id: Optional[int] = None
+    equipment_type: Optional[str] = None
+    scheduled_date: date
+    scheduled_time: Optional[time] = None
+
+
+class BulkScheduleResult(BaseModel):
+    created: List[MaintenanceSchedule]
+    skipped_gear_ids: List[int]
+    missing_gear_ids: List[int] = []
+
+
+class SchedulePlanRequest(BaseModel):
+    gear_ids: Optional[List[int]] = None
+    station_id: Optional[int] = None
+    equipment_type: Optional[str] = None
+    start_date: date
+    end_date: date
+    slot_times: List[time] = [time(9, 0)]
+    weekdays: Optional[List[int]] = None
+    capacity: int = 1
+    station_capacity: Dict[int, int] = {}
+    inspection_interval_days: int = 365
+    commit: bool = False
+
+    @field_validator('capacity', 'inspection_interval_days')
+    @classmethod
+    def must_be_positive(cls, v: int) -> int:
+        if v < 1:
+            raise ValueError('must be at least 1')
+        return v
+
+
+class PlanAssignment(BaseModel):
+    gear_id: int
+    station_id: int
+    scheduled_date: date
+    scheduled_time: time
+    deadline: Optional[date] = None
+    late: bool = False
+
+
+class SchedulePlan(BaseModel):
+    assignments: List[PlanAssignment]
+    unassigned_gear_ids: List[int]
+    skipped_gear_ids: List[int]
+    missing_gear_ids: List[int] = []
+    committed: bool = False
+    created: List[MaintenanceSchedule] = []
+
+
+class CalendarItem(BaseModel):
+    schedule_id: Optional[int] = None
+    recurrence_id: Optional[int] = None
+    gear_id: int
+    gear_name: Optional[str] = None
+    station_id: Optional[int] = None
+    scheduled_time: time
+
+
+class CalendarDay(BaseModel):
+    day: date
+    count: int
+    items: List[CalendarItem]
+
+
+# Largest interval and count a recurrence rule accepts
+MAX_RECURRENCE_INTERVAL = 366
+MAX_RECURRENCE_COUNT = 10000
+
+
+class MaintenanceRecurrenceBase(BaseModel):
+    gear_id: int
+    frequency: str
+    interval: int = Field(1, ge=1, le=MAX_RECURRENCE_INTERVAL)
+    weekdays: Optional[List[int]] = None
+    month_day: Optional[int] = None
+    start_date: date
+    scheduled_time: Optional[time] = None
+    until_date: Optional[date] = None
+    count: Optional[int] = Field(None, ge=1, le=MAX_RECURRENCE_COUNT)
+
+    @field_validator('frequency')
+    @classmethod
+    def frequency_must_be_known(cls, v: str) -> str:
+        if v not in ('daily', 'weekly', 'monthly', 'yearly'):
+            raise ValueError('frequency must be daily, weekly, monthly or yearly')
+        return v
+
+    @field_validator('weekdays', mode='before')
+    @classmethod
+    def weekdays_in_range(cls, v):
+        if isinstance(v, str):
+            v = [int(day) for day in v.split(',') if day.strip()]
+        if v is not None and any(day < 0 or day > 6 for day in v):
+            raise ValueError('weekdays must be between 0 (Monday) and 6 (Sunday)')
+        return v
+
+    @field_validator('month_day')
+    @classmethod
+    def month_day_in_range(cls, v: Optional[int]) -> Optional[int]:
+        if v is not None and not 1 <= v <= 31:
+            raise ValueError('month_day must be between 1 and 31')
+        return v
+
+
+class MaintenanceRecurrenceCreate(MaintenanceRecurrenceBase):
+    pass
+
+
+class MaintenanceRecurrence(MaintenanceRecurrenceBase):
+    id: int
+    active: bool = True
+
+    class Config:
+        orm_mode = True
+
+
+class MaintenanceOccurrence(BaseModel):
+    recurrence_id: int
+    gear_id: int
+    scheduled_date: date
+    scheduled_time: time
+
+
 class MaintenanceReminderBase(BaseModel):
     gear_id: int
     reminder_date: Optional[date] = None
@@ -148,11 +390,19 @@ class MaintenanceReminderCreate(MaintenanceReminderBase):
 
 class MaintenanceReminder(MaintenanceReminderBase):
     id: int
+    recurrence_id: Optional[int] = None
+    updated_at: Optional[datetime] = None
 
     class Config:
         orm_mode = True
 
 
+class MaintenanceReminderChanges(BaseModel):
+    reminders: List[MaintenanceReminder]
+    next_token: str
+    has_more: bool
+
+
 class DamageReportBase(BaseModel):
     gear_id: int
     reporter_id: Optional[int] = None
@@ -162,19 +412,91 @@ class DamageReportBase(BaseModel):
     status: Optional[str] = None
 
 
+def _damage_status(v: Optional[str]) -> Optional[str]:
+    if v is None:
+        return v
+    v = '_'.join(v.lower().split())
+    if v not in ('pending', 'in_repair', 'repaired', 'retired'):
+        raise ValueError('status must be pending, in_repair, repaired or retired')
+    return v
+
+
 class DamageReportCreate(BaseModel):
     gear_id: int
     reporter_name: Optional[str] = None
     report_date: Optional[date] = None
     notes: Optional[str] = None
     photo_url: Optional[str] = None
+    # Defaults to pending
     status: Optional[str] = None
 
+    @field_validator('status')
+    @classmethod
+    def status_must_be_known(cls, v: Optional[str]) -> Optional[str]:
+        return _damage_status(v)
+
 
 class DamageReport(DamageReportBase):
     id: int
+    created_at: Optional[datetime] = None
     gear_name: Optional[str] = None
     reporter_name: Optional[str] = None
+    # On create, when reporter_name matched no firefighter: closest names first
+    reporter_suggestions: List[str] = []
 
     class Config:
         orm_mode = True
+
+
+class DamageReportSummary(BaseModel):
+    # Reports per status; reports without a status count under ""
+    counts: Dict[str, int]
+    total: int
+    # pending and in_repair
+    open: int
+    closed: int
+
+
+class DamageReportTransitionCreate(BaseModel):
+    status: str
+    changed_by: Optional[int] = None
+    note: Optional[str] = None
+
+    @field_validator('status')
+    @classmethod
+    def status_must_be_known(cls, v: str) -> str:
+        return _damage_status(v)
+
+
+class DamageReportTransition(BaseModel):
+    id: int
+    damage_report_id: int
+    from_status: Optional[str] = None
+    to_status: str
+    changed_by: Optional[int] = None
+    note: Optional[str] = None
+    changed_at: datetime
+
+    class Config:
+        orm_mode = True
+
+
+class DamageRepairTime(BaseModel):
+    station_id: int
+    month: date
+    repairs: int
+    average_hours: float
+
+
+class SyncResponse(BaseModel):
+    departments: List[Department] = []
+    stations: List[Station] = []
+    firefighters: List[Firefighter] = []
+    gears: List[Gear] = []
+    inspections: List[Inspection] = []
+    schedules: List[MaintenanceSchedule] = []
+    reminders: List[MaintenanceReminder] = []
+    recurrences: List[MaintenanceRecurrence] = []
+    damage_reports: List[DamageReport] = []
+    next_since: int
+    has_more: bool
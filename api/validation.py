@@ -0,0 +1,65 @@
+"""
+Foreign key validation for the create routes.
+
+Writes rely on the database's foreign key constraints instead of looking up
+every referenced row before inserting: the insert either succeeds, or fails
+with an IntegrityError that ``reference_errors`` turns into the 400 every
+router returns, e.g. "Station with id 3 does not exist". Only that failing
+path looks the references up, through the reference cache, to name the
+missing one. SQLite enforces foreign keys only with ``PRAGMA foreign_keys``,
+which ``database.py`` turns on for every connection.
+"""
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from cache import get_reference
+from database import Base
+
+
+def _model_for_table(table) -> Any:
+    for mapper in Base.registry.mappers:
+        if mapper.local_table is table:
+            return mapper.class_
+    raise LookupError(f"No model is mapped to {table.name}")
+
+
+def foreign_keys(model) -> List[Tuple[str, Any]]:
+    """``(column name, referenced model)`` of each foreign key, in column order"""
+    return [
+        (column.name, _model_for_table(fk.column.table))
+        for column in model.__table__.columns
+        for fk in column.foreign_keys
+    ]
+
+
+def not_found(model, entity_id: Any) -> str:
+    return f"{model.__name__} with id {entity_id} does not exist"
+
+
+def missing_reference(db: Session, model, values: Dict[str, Any]) -> Optional[str]:
+    """Message for the first reference in ``values`` that does not exist"""
+    for column, target in foreign_keys(model):
+        target_id = values.get(column)
+        if target_id is not None and get_reference(db, target, target_id) is None:
+            return not_found(target, target_id)
+    return None
+
+
+@contextmanager
+def reference_errors(db: Session, model, values: Dict[str, Any]) -> Iterator[None]:
+    """Turn a foreign key violation while writing ``values`` into a 400.
+
+    The session is rolled back. Other integrity errors are re-raised.
+    """
+    try:
+        yield
+    except IntegrityError as exc:
+        db.rollback()
+        message = missing_reference(db, model, values)
+        if message is None:
+            raise
+        raise HTTPException(status_code=400, detail=message) from exc
@@ -17,6 +17,8 @@ sys.path.insert(0, str(api_path))
 from main import app
 from database import Base
 from dependencies import get_db
+from cache import calendar_cache, compliance_cache, dashboard_cache, reference_cache
+from firefighter_directory import directory
 import models
 from datetime import date
 
@@ -50,6 +52,12 @@ def client(db_session):
             pass
 
     app.dependency_overrides[get_db] = override_get_db
+    # Cached rows from a previous test's database must not leak into this one
+    reference_cache.clear()
+    calendar_cache.clear()
+    compliance_cache.clear()
+    dashboard_cache.clear()
+    directory.clear()
     with TestClient(app) as c:
         yield c
     app.dependency_overrides.clear()
@@ -0,0 +1,172 @@
+"""
+Inspection Analytics Tests
+Tests for analytics.py rollups and GET /analytics/inspections
+
+Testing Strategy:
+- Rollups are checked after inserts through the create and batch endpoints
+- The backfill is checked to rebuild the same buckets from raw inspections
+- The endpoint is tested with TestClient on the rollups alone
+
+Partitions:
+1. Result: passed, failed, other (Pending, None)
+2. Bucket: new vs existing station/equipment type/month, undated inspection
+3. Grouping: all dimensions, one dimension, unknown dimension
+4. Filters: station, equipment type, month range
+5. Counter upsert: SQLite update/insert vs MySQL single statement
+"""
+from datetime import date
+
+import pytest
+
+from sqlalchemy.dialects import mysql
+
+import models
+from analytics import backfill_rollups, classify
+from counters import increment
+
+
+def _rollups(db):
+    rollup = models.InspectionRollup
+    return {
+        (row.station_id, row.equipment_type, row.month): (row.total, row.passed, row.failed)
+        for row in db.query(rollup)
+    }
+
+
+class TestClassify:
+    """Unit tests for result classification"""
+
+    @pytest.mark.parametrize("result, outcome", [
+        ("Passed", "passed"), ("pass", "passed"), (" Fail ", "failed"),
+        ("Needs Repair", "failed"), ("Pending", None), (None, None),
+    ])
+    def test_results(self, result, outcome):
+        assert classify(result) == outcome
+
+
+class TestIncrementalRollups:
+    """Rollups maintained by the inspection endpoints"""
+
+    def test_create_inspection_counts_into_its_month(self, client, test_db_with_dependencies):
+        db = test_db_with_dependencies
+        for day, result in [(3, "Passed"), (20, "Failed"), (21, "Pending")]:
+            client.post("/inspections/", json={
+                "gear_id": 1, "inspection_date": f"2025-03-{day:02d}", "result": result,
+            })
+        client.post("/inspections/", json={"gear_id": 1, "result": "Failed"})
+
+        assert _rollups(db) == {(1, "PPE", date(2025, 3, 1)): (3, 1, 1)}
+
+    def test_batch_counts_every_created_item(self, client, test_db_with_dependencies):
+        db = test_db_with_dependencies
+        items = [
+            {"client_id": "a", "gear_id": 1, "inspection_date": "2025-03-01", "result": "Failed"},
+            {"client_id": "b", "gear_id": 1, "inspection_date": "2025-04-01", "result": "Passed"},
+        ]
+        client.post("/inspections/batch", json={"items": items})
+        client.post("/inspections/batch", json={"items": items})
+
+        assert _rollups(db) == {
+            (1, "PPE", date(2025, 3, 1)): (1, 0, 1),
+            (1, "PPE", date(2025, 4, 1)): (1, 1, 0),
+        }
+
+    def test_backfill_matches_incremental_rollups(self, client, test_db_with_dependencies):
+        db = test_db_with_dependencies
+        untyped = models.Gear(station_id=1, gear_name="Rope", serial_number="ROLLUP-1")
+        db.add(untyped)
+        db.commit()
+        for gear_id, day, result in [(1, "2025-01-05", "Passed"), (1, "2025-02-05", "Needs Repair"),
+                                     (untyped.id, "2025-02-06", "Pass")]:
+            client.post("/inspections/", json={"gear_id": gear_id, "inspection_date": day, "result": result})
+        incremental = _rollups(db)
+
+        assert backfill_rollups(db) == 3
+        assert _rollups(db) == incremental
+        assert (1, "", date(2025, 2, 1)) in incremental
+
+
+class TestIncrement:
+    """counters.increment on each dialect"""
+
+    def test_mysql_upserts_in_one_statement(self):
+        statements = []
+
+        class MySQLSession:
+            def get_bind(self):
+                return type("Bind", (), {"dialect": mysql.dialect()})()
+
+            def execute(self, statement):
+                statements.append(str(statement.compile(dialect=mysql.dialect())))
+
+        increment(MySQLSession(), models.DamageReportStatusCount, {"station_id": 1, "status": "pending"}, count=-1)
+
+        assert statements == [
+            "INSERT INTO `damageReportStatusCount` (station_id, status, count) VALUES (%s, %s, %s) "
+            "ON DUPLICATE KEY UPDATE count = (`damageReportStatusCount`.count + %s)"
+        ]
+
+    def test_sqlite_creates_then_updates(self, test_db_with_dependencies):
+        db = test_db_with_dependencies
+        key = {"station_id": 1, "status": "pending"}
+        for delta in (1, 2):
+            increment(db, models.DamageReportStatusCount, key, count=delta)
+        db.commit()
+
+        assert db.query(models.DamageReportStatusCount.count).scalar() == 3
+
+
+class TestAnalyticsEndpoint:
+    """GET /analytics/inspections reads the rollups"""
+
+    def _seed(self, db):
+        db.add(models.Station(name="Station 2", department_id=1))
+        db.flush()
+        db.add_all(
+            models.InspectionRollup(
+                station_id=station_id, equipment_type=equipment_type, month=month,
+                total=total, passed=passed, failed=failed,
+            )
+            for station_id, equipment_type, month, total, passed, failed in [
+                (1, "PPE", date(2025, 1, 1), 10, 6, 2),
+                (1, "SCBA", date(2025, 1, 1), 4, 0, 0),
+                (2, "PPE", date(2025, 2, 1), 5, 3, 2),
+            ]
+        )
+        db.commit()
+
+    def test_grouped_by_every_dimension(self, client, test_db_with_dependencies):
+        self._seed(test_db_with_dependencies)
+
+        rows = client.get("/analytics/inspections").json()
+
+        assert len(rows) == 3
+        assert rows[0] == {"station_id": 1, "equipment_type": "PPE", "month": "2025-01-01",
+                           "total": 10, "passed": 6, "failed": 2, "failure_rate": 0.25}
+        assert rows[1]["failure_rate"] is None
+
+    def test_grouped_by_equipment_type_and_filtered(self, client, test_db_with_dependencies):
+        self._seed(test_db_with_dependencies)
+
+        params = {"group_by": "equipment_type", "from": "2025-02-15"}
+        rows = client.get("/analytics/inspections", params=params).json()
+
+        assert rows == [{"station_id": None, "equipment_type": "PPE", "month": None,
+                         "total": 5, "passed": 3, "failed": 2, "failure_rate": 0.4}]
+
+    def test_grouped_by_month_and_empty_result(self, client, test_db_with_dependencies):
+        self._seed(test_db_with_dependencies)
+
+        months = client.get("/analytics/inspections", params={"group_by": "month"}).json()
+        empty = client.get("/analytics/inspections", params={"group_by": "month", "station_id": 99}).json()
+
+        assert [(row["month"], row["total"]) for row in months] == [("2025-01-01", 14), ("2025-02-01", 5)]
+        assert empty == []
+
+    def test_unknown_dimension_is_rejected(self, client, test_db_with_dependencies):
+        response = client.get("/analytics/inspections", params={"group_by": "inspector_id"})
+        assert response.status_code == 400
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,127 @@
+"""
+Reference Data Cache Tests
+Tests for cache.TTLCache and the cached /departments, /stations and
+/firefighters reads
+
+Testing Strategy:
+- TTLCache is tested directly for LRU eviction, expiry and counters
+- Router integration is tested with TestClient: reads are served from the
+  cache and create routes invalidate it
+"""
+import time
+
+import pytest
+
+import models
+from cache import TTLCache, reference_cache
+
+
+class TestTTLCache:
+    """Unit tests for the LRU/TTL cache"""
+
+    def test_hit_and_miss_counters(self):
+        cache = TTLCache(maxsize=10, ttl=60)
+        assert cache.get(("station", 1)) is None
+        cache.set(("station", 1), {"id": 1})
+        assert cache.get(("station", 1)) == {"id": 1}
+
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+
+    def test_least_recently_used_is_evicted(self):
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set(("station", 1), "a")
+        cache.set(("station", 2), "b")
+        cache.get(("station", 1))
+        cache.set(("station", 3), "c")
+
+        assert cache.get(("station", 2)) is None
+        assert cache.get(("station", 1)) == "a"
+
+    def test_entries_expire(self):
+        cache = TTLCache(maxsize=10, ttl=0.01)
+        cache.set(("station", 1), "a")
+        time.sleep(0.02)
+
+        assert cache.get(("station", 1)) is None
+
+    def test_invalidate_drops_only_that_entity(self):
+        cache = TTLCache(maxsize=10, ttl=60)
+        cache.set(("station", 1), "a")
+        cache.set(("station", "all"), ["a"])
+        cache.set(("department", 1), "d")
+        cache.invalidate("station")
+
+        assert cache.get(("station", 1)) is None
+        assert cache.get(("station", "all")) is None
+        assert cache.get(("department", 1)) == "d"
+
+    def test_none_is_not_cached(self):
+        cache = TTLCache(maxsize=10, ttl=60)
+        calls = []
+        cache.get_or_load(("station", 1), lambda: calls.append(1))
+        cache.get_or_load(("station", 1), lambda: calls.append(1))
+
+        assert len(calls) == 2
+
+
+class TestCachedReferenceRoutes:
+    """Reads served from the cache, writes invalidating it"""
+
+    def test_list_served_from_cache(self, client, test_db_with_dependencies):
+        """Second read is a cache hit and ignores writes made behind the API"""
+        client.get("/stations/")
+        test_db_with_dependencies.add(models.Station(name="Behind The API"))
+        test_db_with_dependencies.commit()
+
+        response = client.get("/stations/")
+
+        assert len(response.json()) == 1
+        assert reference_cache.stats()["hits"] >= 1
+
+    def test_create_invalidates_list(self, client, test_db_with_dependencies):
+        """Creating a station publishes a change that evicts the cached list"""
+        client.get("/stations/")
+        client.post("/stations/", json={'name': 'Fire Station 2', 'department_id': 1})
+
+        response = client.get("/stations/")
+
+        assert len(response.json()) == 2
+
+    def test_valid_references_need_no_lookup(self, client, test_db_with_dependencies):
+        """Creates rely on the FK constraints; the cache is not even consulted"""
+        payload = {'name': 'Jane Doe', 'station_id': 1, 'department_id': 1}
+        before = reference_cache.stats()
+
+        response = client.post("/firefighters/", json=payload)
+
+        after = reference_cache.stats()
+        assert response.status_code == 200
+        assert (after["hits"], after["misses"]) == (before["hits"], before["misses"])
+
+    def test_unknown_reference_is_named_from_the_cache(self, client, test_db_with_dependencies):
+        """A rejected create looks the references up through the cache"""
+        payload = {'name': 'Jane Doe', 'station_id': 1, 'department_id': 999}
+        client.post("/firefighters/", json=payload)
+        hits_before = reference_cache.stats()["hits"]
+
+        response = client.post("/firefighters/", json=payload)
+
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Department with id 999 does not exist"
+        assert reference_cache.stats()["hits"] >= hits_before + 1
+
+    def test_stats_endpoint(self, client, db_session):
+        client.get("/departments/")
+
+        response = client.get("/cache/stats")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["misses"] >= 1
+        assert {"hits", "misses", "size", "hit_rate"} <= set(data)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
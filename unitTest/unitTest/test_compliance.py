@@ -0,0 +1,111 @@
+"""
+Inspection Compliance Tests
+Tests for compliance.py and GET /compliance/overdue
+
+Testing Strategy:
+- last_inspected_at maintenance is checked through the inspection endpoints
+- The overdue query is tested directly with explicit policies and dates
+- The endpoint is tested with TestClient, including cache invalidation
+
+Partitions:
+1. Inspection history: never inspected, within policy, older than policy
+2. Policy: configured equipment type vs default allowance
+3. Inspection order: newer vs older (back-dated) inspection
+4. Cache: repeated read vs read after an inspection is recorded
+"""
+from datetime import date, timedelta
+
+import pytest
+
+import models
+from compliance import backfill_last_inspected, overdue_by_station
+
+TODAY = date(2030, 6, 1)
+
+
+def _gear(db, serial, equipment_type, last_inspected_at=None, station_id=1):
+    gear = models.Gear(
+        station_id=station_id, gear_name=serial, serial_number=serial,
+        equipment_type=equipment_type, last_inspected_at=last_inspected_at,
+    )
+    db.add(gear)
+    db.commit()
+    return gear.id
+
+
+class TestLastInspectedAt:
+    """gear.last_inspected_at kept by inspection inserts"""
+
+    def test_only_newer_inspections_move_it_forward(self, client, test_db_with_dependencies):
+        db = test_db_with_dependencies
+        client.post("/inspections/", json={"gear_id": 1, "inspection_date": "2025-05-01"})
+        client.post("/inspections/", json={"gear_id": 1, "inspection_date": "2025-03-01"})
+        client.post("/inspections/batch", json={"items": [
+            {"client_id": "a", "gear_id": 1, "inspection_date": "2025-06-01"},
+            {"client_id": "b", "gear_id": 1, "inspection_date": "2025-04-01"},
+        ]})
+
+        db.expire_all()
+        assert db.query(models.Gear.last_inspected_at).filter(models.Gear.id == 1).scalar() == date(2025, 6, 1)
+
+    def test_backfill_uses_the_latest_inspection(self, test_db_with_dependencies):
+        db = test_db_with_dependencies
+        db.add_all([
+            models.Inspection(gear_id=1, inspection_date=date(2025, 1, 1)),
+            models.Inspection(gear_id=1, inspection_date=date(2025, 2, 1)),
+        ])
+        db.commit()
+
+        backfill_last_inspected(db)
+
+        assert db.query(models.Gear.last_inspected_at).filter(models.Gear.id == 1).scalar() == date(2025, 2, 1)
+
+
+class TestOverdueReport:
+    """Unit tests for overdue_by_station"""
+
+    def test_policy_per_equipment_type(self, test_db_with_dependencies):
+        db = test_db_with_dependencies
+        db.add(models.Station(name="Station 2", department_id=1))
+        db.commit()
+        late_tank = _gear(db, "TANK-1", "Tank", TODAY - timedelta(days=31))
+        _gear(db, "TANK-2", "Tank", TODAY - timedelta(days=30))
+        _gear(db, "ROPE-1", "Rope", TODAY - timedelta(days=300))
+        late_rope = _gear(db, "ROPE-2", "Rope", TODAY - timedelta(days=400), station_id=2)
+
+        report = overdue_by_station(db, TODAY, policy={"Tank": 30}, default_days=365)
+
+        # The conftest gear (PPE) has never been inspected
+        assert [(s["station_id"], [g["gear_id"] for g in s["overdue"]]) for s in report] == [
+            (1, [1, late_tank]), (2, [late_rope]),
+        ]
+        tank = report[0]["overdue"][1]
+        assert (tank["due_date"], tank["days_overdue"]) == (TODAY - timedelta(days=1), 1)
+        assert report[0]["overdue"][0]["due_date"] is None
+
+    def test_station_filter(self, test_db_with_dependencies):
+        db = test_db_with_dependencies
+        assert overdue_by_station(db, TODAY, station_id=99, policy={}, default_days=365) == []
+
+
+class TestOverdueEndpoint:
+    """GET /compliance/overdue"""
+
+    def test_report_is_cached_until_an_inspection_is_recorded(self, client, test_db_with_dependencies):
+        db = test_db_with_dependencies
+        first = client.get("/compliance/overdue").json()
+        # Written behind the API's back: the cached report does not see it
+        db.query(models.Gear).update({models.Gear.last_inspected_at: date.today()})
+        db.commit()
+        cached = client.get("/compliance/overdue").json()
+
+        client.post("/inspections/", json={"gear_id": 1, "inspection_date": str(date.today())})
+        fresh = client.get("/compliance/overdue").json()
+
+        assert [g["gear_id"] for g in first[0]["overdue"]] == [1]
+        assert cached == first
+        assert fresh == []
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
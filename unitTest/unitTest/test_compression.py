@@ -0,0 +1,104 @@
+"""
+Response Compression Tests
+Tests for the CompressionMiddleware registered in main.py
+
+Testing Strategy:
+- Content negotiation is tested directly on negotiate_encoding
+- Middleware behaviour is tested through real HTTP requests with TestClient
+
+Characteristics:
+1. Accept-Encoding header
+   - gzip accepted, gzip rejected with q=0, header missing
+2. Body size
+   - Above and below the route's minimum size
+3. Route
+   - JSON list endpoint vs /uploads static files
+"""
+import gzip
+
+import pytest
+
+from compression import negotiate_encoding
+
+
+class TestNegotiateEncoding:
+    """Accept-Encoding parsing and encoding selection"""
+
+    def test_gzip_accepted(self):
+        assert negotiate_encoding("gzip, deflate") == "gzip"
+
+    def test_gzip_rejected_with_zero_quality(self):
+        assert negotiate_encoding("gzip;q=0, deflate") is None
+
+    def test_wildcard(self):
+        assert negotiate_encoding("*") is not None
+
+    def test_empty_header(self):
+        assert negotiate_encoding("") is None
+
+
+class TestCompressionMiddleware:
+    """Compression applied to real responses"""
+
+    def _create_stations(self, db_session, count):
+        import models
+        db_session.add_all(
+            models.Station(name=f"Station {i}", location="123 Main St, City, State 12345")
+            for i in range(count)
+        )
+        db_session.commit()
+
+    def test_large_response_is_gzipped(self, client, db_session):
+        """Body above the threshold is compressed when gzip is accepted"""
+        self._create_stations(db_session, 50)
+
+        response = client.get("/stations/", headers={"Accept-Encoding": "gzip"})
+
+        assert response.status_code == 200
+        assert response.headers["content-encoding"] == "gzip"
+        assert "Accept-Encoding" in response.headers["vary"]
+        assert len(response.json()) == 50
+
+    def test_small_response_is_not_compressed(self, client, db_session):
+        """Body below the threshold is sent as is"""
+        response = client.get("/stations/", headers={"Accept-Encoding": "gzip"})
+
+        assert response.status_code == 200
+        assert "content-encoding" not in response.headers
+
+    def test_identity_only_client(self, client, db_session):
+        """Client that rejects gzip gets an uncompressed body"""
+        self._create_stations(db_session, 50)
+
+        response = client.get("/stations/", headers={"Accept-Encoding": "identity"})
+
+        assert response.status_code == 200
+        assert "content-encoding" not in response.headers
+        assert len(response.json()) == 50
+
+    def test_uploads_are_not_compressed(self, client, db_session):
+        """Files under /uploads are served untouched"""
+        from main import UPLOAD_DIR
+        photo = UPLOAD_DIR / "compression_test.txt"
+        photo.write_bytes(b"x" * 4096)
+        try:
+            response = client.get("/uploads/compression_test.txt", headers={"Accept-Encoding": "gzip"})
+        finally:
+            photo.unlink()
+
+        assert response.status_code == 200
+        assert "content-encoding" not in response.headers
+        assert response.content == b"x" * 4096
+
+    def test_gzip_body_round_trips(self, client, db_session):
+        """Compressed bytes decode to the same JSON"""
+        self._create_stations(db_session, 50)
+
+        with client.stream("GET", "/stations/", headers={"Accept-Encoding": "gzip"}) as response:
+            raw = b"".join(response.iter_raw())
+
+        assert gzip.decompress(raw).startswith(b"[")
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,237 @@
+"""
+Damage Report Tests
+Tests for the filtered, paginated GET /damage-reports, the status summary
+and the status workflow
+
+Testing Strategy:
+- Reports are created through POST /damage-reports so the counters move
+  with them, or inserted directly where only the listing is under test
+- Listing, pagination and summary are tested with TestClient
+
+Partitions:
+1. Filters: status, gear_id, station_id, from/to date range
+2. Pages: last page vs more rows (X-Next-Cursor), malformed cursor,
+   no limit or cursor (every report)
+3. Summary: all stations vs one station, counters vs backfill
+4. Transitions: allowed, not allowed, terminal state, unknown status,
+   unknown report or firefighter
+5. Repair times: repaired vs retired reports, legacy statuses
+"""
+from datetime import date, timedelta
+
+import pytest
+
+import models
+from damage_counters import backfill_status_counts, status_counts
+from damage_workflow import backfill_workflow, normalize_status, transition
+from firefighter_directory import directory
+
+
+def _second_station_gear(db):
+    station = models.Station(name="Station 2", department_id=1)
+    db.add(station)
+    db.flush()
+    gear = models.Gear(station_id=station.id, gear_name="Hose", serial_number="DR-2")
+    db.add(gear)
+    db.commit()
+    return station.id, gear.id
+
+
+class TestDamageReportListing:
+    """Filters and keyset pagination"""
+
+    def _add_reports(self, db, count, **fields):
+        rows = [
+            models.DamageReport(
+                gear_id=fields.get("gear_id", 1),
+                report_date=fields.get("report_date", date(2025, 1, 1) + timedelta(days=i)),
+                status=fields.get("status", "pending"),
+            )
+            for i in range(count)
+        ]
+        db.add_all(rows)
+        db.commit()
+        return [row.id for row in rows]
+
+    def test_pages_cover_every_report_newest_first(self, client, test_db_with_dependencies):
+        ids = self._add_reports(test_db_with_dependencies, 5)
+
+        seen, cursor = [], None
+        while True:
+            params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+            response = client.get("/damage-reports/", params=params)
+            seen.append([row["id"] for row in response.json()])
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+
+        assert seen == [ids[4:2:-1], ids[2:0:-1], ids[:1]]
+
+    def test_without_limit_or_cursor_every_report_is_returned(self, client, test_db_with_dependencies):
+        ids = self._add_reports(test_db_with_dependencies, 120)
+
+        response = client.get("/damage-reports/")
+
+        assert [row["id"] for row in response.json()] == ids[::-1]
+        assert "X-Next-Cursor" not in response.headers
+
+    def test_filters(self, client, test_db_with_dependencies):
+        db = test_db_with_dependencies
+        station_id, gear_id = _second_station_gear(db)
+        self._add_reports(db, 2)
+        repaired = self._add_reports(db, 1, status="repaired")
+        other_station = self._add_reports(db, 2, gear_id=gear_id)
+
+        def ids(**params):
+            return sorted(row["id"] for row in client.get("/damage-reports/", params=params).json())
+
+        assert ids(status="repaired") == repaired
+        assert ids(station_id=station_id) == other_station
+        assert ids(gear_id=gear_id, **{"from": "2025-01-02"}) == other_station[1:]
+        assert len(ids(**{"to": "2025-01-01"})) == 3
+
+    def test_rows_keep_gear_and_reporter_names(self, client, test_db_with_dependencies):
+        client.post("/damage-reports/", json={"gear_id": 1, "reporter_name": "Inspector Gadget"})
+
+        row = client.get("/damage-reports/").json()[0]
+
+        assert (row["gear_name"], row["reporter_name"]) == ("Test Gear", "Inspector Gadget")
+
+    def test_malformed_cursor_is_rejected(self, client, test_db_with_dependencies):
+        assert client.get("/damage-reports/", params={"cursor": "bad"}).status_code == 400
+
+
+class TestDamageReportSummary:
+    """Per-status counters"""
+
+    def test_counters_follow_created_reports(self, client, test_db_with_dependencies):
+        db = test_db_with_dependencies
+        station_id, gear_id = _second_station_gear(db)
+        for gear, status in [(1, "pending"), (1, "pending"), (1, None), (gear_id, "pending")]:
+            client.post("/damage-reports/", json={"gear_id": gear, "status": status})
+
+        everywhere = client.get("/damage-reports/summary").json()
+        one_station = client.get("/damage-reports/summary", params={"station_id": station_id}).json()
+
+        assert everywhere == {"counts": {"pending": 4}, "total": 4, "open": 4, "closed": 0}
+        assert one_station == {"counts": {"pending": 1}, "total": 1, "open": 1, "closed": 0}
+
+    def test_backfill_matches_counters(self, client, test_db_with_dependencies):
+        db = test_db_with_dependencies
+        for status in ["pending", "repaired", "pending"]:
+            client.post("/damage-reports/", json={"gear_id": 1, "status": status})
+        maintained = status_counts(db)
+
+        assert backfill_status_counts(db) == 2
+        assert status_counts(db) == maintained == {"pending": 2, "repaired": 1}
+
+
+def _report(client, status=None):
+    return client.post("/damage-reports/", json={"gear_id": 1, "reporter_name": "Inspector Gadget", "status": status}).json()
+
+
+class TestDamageReportWorkflow:
+    """POST/GET /damage-reports/{id}/transitions"""
+
+    def _move(self, client, report_id, status, **fields):
+        return client.post(f"/damage-reports/{report_id}/transitions", json={"status": status, **fields})
+
+    def test_new_report_starts_pending_with_history(self, client, test_db_with_dependencies):
+        report = _report(client)
+
+        history = client.get(f"/damage-reports/{report['id']}/transitions").json()
+
+        assert report["status"] == "pending"
+        assert report["created_at"] is not None
+        assert [(row["from_status"], row["to_status"], row["changed_by"]) for row in history] == [(None, "pending", 1)]
+
+    def test_status_is_normalized_and_checked_on_create(self, client, test_db_with_dependencies):
+        assert _report(client, "In Repair")["status"] == "in_repair"
+        assert client.post("/damage-reports/", json={"gear_id": 1, "status": "Broken"}).status_code == 422
+
+    def test_transitions_move_counters_and_history(self, client, test_db_with_dependencies):
+        report_id = _report(client)["id"]
+
+        repairing = self._move(client, report_id, "in_repair", changed_by=1, note="Sent to vendor")
+        repaired = self._move(client, report_id, "Repaired")
+
+        assert repairing.json()["status"] == "in_repair"
+        assert repaired.json()["status"] == "repaired"
+        history = client.get(f"/damage-reports/{report_id}/transitions").json()
+        assert [(row["from_status"], row["to_status"]) for row in history] == [
+            (None, "pending"), ("pending", "in_repair"), ("in_repair", "repaired"),
+        ]
+        assert history[1]["note"] == "Sent to vendor"
+        summary = client.get("/damage-reports/summary").json()
+        assert summary == {"counts": {"repaired": 1}, "total": 1, "open": 0, "closed": 1}
+
+    def test_responses_name_gear_and_reporter_from_the_database(self, client, test_db_with_dependencies):
+        created = _report(client)
+        directory.clear()
+
+        moved = self._move(client, created["id"], "in_repair").json()
+
+        for data in (created, moved):
+            assert (data["gear_name"], data["reporter_name"]) == ("Test Gear", "Inspector Gadget")
+
+    def test_closed_report_cannot_move(self, client, test_db_with_dependencies):
+        report_id = _report(client, "retired")["id"]
+
+        response = self._move(client, report_id, "pending")
+
+        assert response.status_code == 409
+        assert client.get("/damage-reports/summary").json()["counts"] == {"retired": 1}
+        assert len(client.get(f"/damage-reports/{report_id}/transitions").json()) == 1
+
+    def test_unknown_status_report_or_firefighter(self, client, test_db_with_dependencies):
+        report_id = _report(client)["id"]
+
+        assert self._move(client, report_id, "fixed-ish").status_code == 422
+        assert self._move(client, 999, "in_repair").status_code == 404
+        assert client.get("/damage-reports/999/transitions").status_code == 404
+        response = self._move(client, report_id, "in_repair", changed_by=999)
+        assert response.status_code == 400
+        assert client.get("/damage-reports/summary").json()["counts"] == {"pending": 1}
+
+
+class TestRepairTimes:
+    """Time-to-repair rollups"""
+
+    def test_repairs_are_averaged_per_station_and_month(self, client, test_db_with_dependencies):
+        db = test_db_with_dependencies
+        for hours in (2, 4):
+            report = db.get(models.DamageReport, _report(client)["id"])
+            transition(db, report, 1, "repaired", now=report.created_at + timedelta(hours=hours))
+        retired = db.get(models.DamageReport, _report(client)["id"])
+        transition(db, retired, 1, "retired")
+        db.commit()
+
+        rows = client.get("/damage-reports/repair-times", params={"station_id": 1}).json()
+
+        assert [(row["repairs"], row["average_hours"]) for row in rows] == [(2, 3.0)]
+        assert client.get("/damage-reports/repair-times", params={"station_id": 2}).json() == []
+
+    def test_legacy_statuses_are_mapped(self):
+        assert [normalize_status(value) for value in ["Pending", "Resolved", "Under Review", "??", None]] == [
+            "pending", "repaired", "pending", None, None,
+        ]
+
+    def test_backfill_moves_legacy_reports_onto_the_workflow(self, client, test_db_with_dependencies):
+        db = test_db_with_dependencies
+        db.add_all([
+            models.DamageReport(gear_id=1, status="Resolved"),
+            models.DamageReport(gear_id=1, status=None),
+        ])
+        db.commit()
+        report = db.get(models.DamageReport, _report(client)["id"])
+        transition(db, report, 1, "repaired", now=report.created_at + timedelta(hours=5))
+        db.commit()
+
+        assert backfill_workflow(db) == 2
+        assert status_counts(db) == {"repaired": 2, "pending": 1}
+        assert db.query(models.DamageReportTransition).count() == 4
+        assert [row["average_hours"] for row in client.get("/damage-reports/repair-times").json()] == [5.0]
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,141 @@
+"""
+Dashboard Tests
+Tests for GET /stations/{id}/dashboard and GET /departments/{id}/dashboard
+
+Testing Strategy:
+- Gear, schedules, inspections and damage reports are written directly or
+  through the API, then the dashboards are read with TestClient
+- dashboard.station_metrics is called directly to count its queries
+
+Partitions:
+1. Gear expiry: none, within the window, past, beyond the window
+2. Schedules: future, past with no inspection since, past and inspected since
+3. Damage reports: open vs closed
+4. Scope: one station, a department with several stations, unknown ids
+5. Cache: repeated read, invalidated by a write
+"""
+from datetime import date, time, timedelta
+
+import pytest
+from sqlalchemy import event
+
+import models
+from dashboard import station_metrics
+
+TODAY = date.today()
+
+
+def _gear(db, serial, station_id=1, **fields):
+    gear = models.Gear(station_id=station_id, gear_name=serial, serial_number=serial, **fields)
+    db.add(gear)
+    db.commit()
+    return gear.id
+
+
+def _schedule(gear_id, days):
+    return models.MaintenanceSchedule(gear_id=gear_id, scheduled_date=TODAY + timedelta(days=days), scheduled_time=time(8))
+
+
+def _populate(db):
+    _gear(db, "EXP-SOON", expiry_date=TODAY + timedelta(days=10))
+    _gear(db, "EXP-PAST", expiry_date=TODAY - timedelta(days=1))
+    _gear(db, "EXP-LATER", expiry_date=TODAY + timedelta(days=90))
+    overdue = _gear(db, "OVERDUE", last_inspected_at=TODAY - timedelta(days=40))
+    inspected = _gear(db, "INSPECTED", last_inspected_at=TODAY - timedelta(days=2))
+    db.add_all([
+        _schedule(overdue, -5),
+        _schedule(overdue, -3),
+        _schedule(inspected, -5),
+        _schedule(1, 5),
+        models.Inspection(gear_id=inspected, inspection_date=TODAY - timedelta(days=2), result="Passed"),
+        models.Inspection(gear_id=1, inspection_date=TODAY - timedelta(days=60), result="Passed"),
+    ])
+    db.commit()
+
+
+class TestStationDashboard:
+    """GET /stations/{id}/dashboard"""
+
+    def test_counts(self, client, test_db_with_dependencies):
+        _populate(test_db_with_dependencies)
+        report_id = client.post("/damage-reports/", json={"gear_id": 1}).json()["id"]
+        client.post("/damage-reports/", json={"gear_id": 1, "status": "in_repair"})
+        client.post(f"/damage-reports/{report_id}/transitions", json={"status": "repaired"})
+
+        response = client.get("/stations/1/dashboard")
+
+        assert response.status_code == 200
+        assert response.json() == {
+            "station_id": 1,
+            "station_name": "Test Station",
+            "gear_count": 6,
+            "expiring_soon": 1,
+            "overdue_maintenance": 1,
+            "open_damage_reports": 1,
+            "recent_inspections": 1,
+        }
+
+    def test_windows_are_adjustable(self, client, test_db_with_dependencies):
+        _populate(test_db_with_dependencies)
+
+        data = client.get("/stations/1/dashboard", params={"expiring_within": 100, "recent_days": 90}).json()
+
+        assert (data["expiring_soon"], data["recent_inspections"]) == (2, 2)
+
+    def test_unknown_station(self, client, test_db_with_dependencies):
+        assert client.get("/stations/999/dashboard").status_code == 404
+
+    def test_cached_until_a_write(self, client, test_db_with_dependencies):
+        assert client.get("/stations/1/dashboard").json()["open_damage_reports"] == 0
+
+        client.post("/damage-reports/", json={"gear_id": 1})
+
+        assert client.get("/stations/1/dashboard").json()["open_damage_reports"] == 1
+
+
+class TestDepartmentDashboard:
+    """GET /departments/{id}/dashboard"""
+
+    def test_totals_and_stations(self, client, test_db_with_dependencies):
+        db = test_db_with_dependencies
+        _populate(db)
+        station = models.Station(name="Station 2", department_id=1)
+        db.add(station)
+        db.commit()
+        _gear(db, "S2-SOON", station_id=station.id, expiry_date=TODAY)
+
+        data = client.get("/departments/1/dashboard").json()
+
+        assert data["department_name"] == "Test Department"
+        assert [(row["station_id"], row["gear_count"], row["expiring_soon"]) for row in data["stations"]] == [
+            (1, 6, 1), (station.id, 1, 1),
+        ]
+        assert (data["gear_count"], data["expiring_soon"], data["overdue_maintenance"]) == (7, 2, 1)
+
+    def test_unknown_department(self, client, test_db_with_dependencies):
+        assert client.get("/departments/999/dashboard").status_code == 404
+
+    def test_two_queries_for_any_number_of_stations(self, test_db_with_dependencies):
+        db = test_db_with_dependencies
+        station_ids = [1]
+        for number in range(5):
+            station = models.Station(name=f"Extra {number}", department_id=1)
+            db.add(station)
+            db.commit()
+            station_ids.append(station.id)
+            _gear(db, f"EXTRA-{number}", station_id=station.id)
+        statements = []
+        engine = db.get_bind()
+        listener = lambda *args: statements.append(args[2])
+        event.listen(engine, "before_cursor_execute", listener)
+        try:
+            metrics = station_metrics(db, station_ids, TODAY, 30, 30)
+        finally:
+            event.remove(engine, "before_cursor_execute", listener)
+
+        assert len(statements) == 2
+        assert sum(counts["gear_count"] for counts in metrics.values()) == 6
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,97 @@
+"""
+Department Rollup Tests
+Tests for department_rollups.py and GET /departments/rollups, /departments/{id}/rollup
+
+Testing Strategy:
+- Gear, inspections and damage reports are created through the API or
+  directly, refresh_rollups is run, then the endpoints are read with
+  TestClient
+
+Partitions:
+1. Refresh: never run, run, run again after writes
+2. Equipment type: set vs missing
+3. Inspections: inside vs outside the month window, passed vs failed
+4. Departments: with stations, without, unknown id
+"""
+from datetime import date, timedelta
+
+import pytest
+
+import models
+from department_rollups import months_back, refresh_rollups
+
+TODAY = date.today()
+
+
+def _populate(client, db):
+    station = models.Station(name="Station 2", department_id=1)
+    db.add(station)
+    db.add(models.Department(department_name="Empty Department"))
+    db.commit()
+    db.add_all([
+        models.Gear(station_id=1, gear_name="Helmet", serial_number="H-1", equipment_type="Helmet",
+                    expiry_date=TODAY + timedelta(days=5)),
+        models.Gear(station_id=station.id, gear_name="Helmet", serial_number="H-2", equipment_type="Helmet",
+                    expiry_date=TODAY - timedelta(days=5)),
+        models.Gear(station_id=station.id, gear_name="Rope", serial_number="R-1"),
+    ])
+    db.commit()
+    for day, result in [(TODAY, "Passed"), (TODAY, "Failed"), (TODAY, "Passed"), (TODAY - timedelta(days=800), "Failed")]:
+        client.post("/inspections/", json={"gear_id": 1, "inspector_id": 1, "inspection_date": day.isoformat(), "result": result})
+    client.post("/damage-reports/", json={"gear_id": 1})
+    client.post("/damage-reports/", json={"gear_id": 1, "status": "repaired"})
+
+
+class TestDepartmentRollups:
+    """Refresh job and rollup endpoints"""
+
+    def test_before_the_first_run(self, client, test_db_with_dependencies):
+        data = client.get("/departments/1/rollup").json()
+
+        assert data["refreshed_at"] is None
+        assert (data["gear_count"], data["by_equipment_type"]) == (0, [])
+
+    def test_totals_per_department_and_type(self, client, test_db_with_dependencies):
+        db = test_db_with_dependencies
+        _populate(client, db)
+
+        assert refresh_rollups(db) == 3
+        rollups = client.get("/departments/rollups").json()
+
+        assert [row["department_name"] for row in rollups] == ["Test Department", "Empty Department"]
+        department = rollups[0]
+        assert department["refreshed_at"] is not None
+        assert {key: department[key] for key in ("gear_count", "expiring_soon", "expired", "open_damage_reports")} == {
+            "gear_count": 4, "expiring_soon": 1, "expired": 1, "open_damage_reports": 1,
+        }
+        assert (department["inspections"], department["passed"], department["failed"]) == (3, 2, 1)
+        assert department["pass_rate"] == pytest.approx(2 / 3)
+        assert [(row["equipment_type"], row["gear_count"]) for row in department["by_equipment_type"]] == [
+            (None, 1), ("Helmet", 2), ("PPE", 1),
+        ]
+        assert rollups[1]["gear_count"] == 0
+        assert rollups[1]["pass_rate"] is None
+
+    def test_figures_change_only_when_refreshed(self, client, test_db_with_dependencies):
+        db = test_db_with_dependencies
+        refresh_rollups(db)
+        first = client.get("/departments/1/rollup").json()
+
+        client.post("/damage-reports/", json={"gear_id": 1})
+        assert client.get("/departments/1/rollup").json()["open_damage_reports"] == 0
+
+        refresh_rollups(db)
+        second = client.get("/departments/1/rollup").json()
+        assert second["open_damage_reports"] == 1
+        assert second["refreshed_at"] >= first["refreshed_at"]
+
+    def test_unknown_department(self, client, test_db_with_dependencies):
+        assert client.get("/departments/999/rollup").status_code == 404
+
+    def test_month_window(self):
+        assert months_back(date(2026, 10, 19), 12) == date(2025, 11, 1)
+        assert months_back(date(2026, 1, 5), 1) == date(2026, 1, 1)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
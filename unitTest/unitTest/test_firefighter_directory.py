@@ -0,0 +1,116 @@
+"""
+Firefighter Directory Tests
+Tests for firefighter_directory.py and reporter resolution in POST /damage-reports
+
+Testing Strategy:
+- The directory is tested directly against the test database
+- Bus events are fed to handle_event to check incremental refreshes
+- The damage report endpoint is tested with TestClient
+
+Partitions:
+1. Typed name: exact, different case/spacing, misspelled, unrelated, empty
+2. Directory state: loaded, queued insert, insert without an event
+3. Duplicates: several firefighters with the same normalized name
+"""
+import pytest
+
+import models
+from firefighter_directory import FirefighterDirectory, backfill_normalized_names
+
+
+def _firefighter(db, name):
+    firefighter = models.Firefighter(name=name, station_id=1, department_id=1)
+    db.add(firefighter)
+    db.commit()
+    return firefighter.id
+
+
+class TestNormalizedName:
+    """name_normalized filled on insert and by the backfill"""
+
+    def test_insert_sets_normalized_name(self, test_db_with_dependencies):
+        db = test_db_with_dependencies
+        firefighter_id = _firefighter(db, "  Jane   DOE ")
+        assert db.get(models.Firefighter, firefighter_id).name_normalized == "jane doe"
+
+    def test_backfill_fills_missing_names(self, test_db_with_dependencies):
+        db = test_db_with_dependencies
+        db.query(models.Firefighter).update({models.Firefighter.name_normalized: None})
+        db.commit()
+
+        assert backfill_normalized_names(db) == 1
+        assert db.query(models.Firefighter.name_normalized).scalar() == "inspector gadget"
+
+
+class TestFirefighterDirectory:
+    """Unit tests for resolution and suggestions"""
+
+    def test_resolves_ignoring_case_and_spacing(self, test_db_with_dependencies):
+        directory = FirefighterDirectory()
+        assert directory.resolve(test_db_with_dependencies, "  inspector   GADGET") == 1
+        assert directory.resolve(test_db_with_dependencies, "") is None
+
+    def test_lowest_id_wins_for_duplicate_names(self, test_db_with_dependencies):
+        db = test_db_with_dependencies
+        _firefighter(db, "Inspector Gadget")
+        assert FirefighterDirectory().resolve(db, "inspector gadget") == 1
+
+    def test_queued_insert_is_loaded_on_next_lookup(self, test_db_with_dependencies):
+        db = test_db_with_dependencies
+        directory = FirefighterDirectory()
+        directory.resolve(db, "Inspector Gadget")
+        new_id = _firefighter(db, "Jane Doe")
+
+        directory.handle_event({"entity": "firefighter", "id": new_id})
+
+        assert directory.resolve(db, "jane doe") == new_id
+        assert directory.name_of(new_id) == "Jane Doe"
+
+    def test_insert_without_event_is_found_through_the_index(self, test_db_with_dependencies):
+        db = test_db_with_dependencies
+        directory = FirefighterDirectory()
+        directory.resolve(db, "Inspector Gadget")
+        new_id = _firefighter(db, "Jane Doe")
+
+        assert directory.resolve(db, "JANE DOE") == new_id
+
+    def test_suggestions_are_ranked(self, test_db_with_dependencies):
+        db = test_db_with_dependencies
+        _firefighter(db, "Jane Doe")
+        _firefighter(db, "Jane Dole")
+        directory = FirefighterDirectory()
+
+        assert directory.suggest(db, "Jane Doo") == ["Jane Doe", "Jane Dole"]
+        assert directory.suggest(db, "Zebedee") == []
+
+
+class TestDamageReportReporter:
+    """Reporter resolution in POST /damage-reports"""
+
+    def test_reporter_name_is_resolved_loosely(self, client, test_db_with_dependencies):
+        response = client.post("/damage-reports/", json={"gear_id": 1, "reporter_name": "inspector  gadget "})
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["reporter_id"] == 1
+        assert data["reporter_name"] == "Inspector Gadget"
+        assert data["reporter_suggestions"] == []
+
+    def test_unmatched_name_returns_suggestions(self, client, test_db_with_dependencies):
+        response = client.post("/damage-reports/", json={"gear_id": 1, "reporter_name": "Inspektor Gadget"})
+
+        data = response.json()
+        assert data["reporter_id"] is None
+        assert data["reporter_suggestions"] == ["Inspector Gadget"]
+
+    def test_firefighter_created_through_the_api_is_resolvable(self, client, test_db_with_dependencies):
+        client.post("/damage-reports/", json={"gear_id": 1, "reporter_name": "Inspector Gadget"})
+        new_id = client.post("/firefighters/", json={"name": "Jane Doe"}).json()["id"]
+
+        response = client.post("/damage-reports/", json={"gear_id": 1, "reporter_name": "JANE DOE"})
+
+        assert response.json()["reporter_id"] == new_id
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
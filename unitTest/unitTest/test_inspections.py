@@ -55,7 +55,19 @@ Base Choice Coverage - Selected Characteristics (GET /inspections):
 4. Inspections With Null Optional Fields
    - An inspection exists with inspection_date, inspector_id, inspection_type, condition_notes, and result all set to None
    - Response should correctly return null values for those fields
+
+Filters and Keyset Pagination (GET /inspections):
+1. Filters: gear_id, inspector_id, result, inspection_type, from/to date range
+2. Pages: last page (no X-Next-Cursor) vs more rows (cursor header set),
+   no limit or cursor (every row)
+3. Cursor: valid, malformed, position among undated inspections
+
+Batch Submission (POST /inspections/batch):
+1. Item: valid, unknown gear, unknown inspector
+2. client_id: new, already stored (retry), repeated within the batch
 """
+from datetime import date, timedelta
+
 import pytest
 import models
 
@@ -437,5 +449,133 @@ class TestInspectionGetEndpoint:
         assert data[0]['result'] is None
 
 
+class TestInspectionLogFilters:
+    """Filtered, keyset-paginated GET /inspections"""
+
+    def _add_inspections(self, db, count, **fields):
+        rows = [
+            models.Inspection(
+                gear_id=fields.get("gear_id", 1),
+                inspection_date=fields.get("inspection_date", date(2025, 1, 1) + timedelta(days=i)),
+                inspector_id=fields.get("inspector_id", 1),
+                inspection_type=fields.get("inspection_type", "Annual"),
+                result=fields.get("result", "Passed"),
+            )
+            for i in range(count)
+        ]
+        db.add_all(rows)
+        db.commit()
+        return [row.id for row in rows]
+
+    def _walk(self, client, params):
+        pages, cursor = [], None
+        while True:
+            response = client.get("/inspections/", params=dict(params, **({"cursor": cursor} if cursor else {})))
+            assert response.status_code == 200
+            pages.append([row["id"] for row in response.json()])
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                return pages
+
+    def test_pages_cover_every_row_newest_first(self, client, test_db_with_dependencies):
+        db = test_db_with_dependencies
+        ids = self._add_inspections(db, 7)
+        # Same date as the newest row: the id breaks the tie
+        ids += self._add_inspections(db, 1, inspection_date=date(2025, 1, 7))
+
+        pages = self._walk(client, {"limit": 3})
+
+        assert [len(page) for page in pages] == [3, 3, 2]
+        assert [i for page in pages for i in page] == [ids[7], ids[6]] + ids[5::-1]
+
+    def test_without_limit_or_cursor_every_row_is_returned(self, client, test_db_with_dependencies):
+        ids = self._add_inspections(test_db_with_dependencies, 120)
+
+        response = client.get("/inspections/")
+
+        assert [row["id"] for row in response.json()] == ids[::-1]
+        assert "X-Next-Cursor" not in response.headers
+
+    def test_undated_inspections_come_last(self, client, test_db_with_dependencies):
+        db = test_db_with_dependencies
+        dated = self._add_inspections(db, 2)
+        undated = [
+            self._add_inspections(db, 1, inspection_date=None)[0],
+            self._add_inspections(db, 1, inspection_date=None)[0],
+        ]
+
+        pages = self._walk(client, {"limit": 1})
+
+        assert [i for page in pages for i in page] == dated[::-1] + undated[::-1]
+
+    def test_filters_combine(self, client, test_db_with_dependencies):
+        db = test_db_with_dependencies
+        gear = models.Gear(station_id=1, gear_name="Helmet", serial_number="LOG-2")
+        db.add(gear)
+        db.commit()
+        self._add_inspections(db, 3)
+        failed = self._add_inspections(db, 2, gear_id=gear.id, result="Failed", inspection_type="Monthly")
+        self._add_inspections(db, 1, gear_id=gear.id, inspection_date=date(2024, 6, 1))
+
+        def ids(**params):
+            return sorted(row["id"] for row in client.get("/inspections/", params=params).json())
+
+        assert ids(gear_id=gear.id, result="Failed") == failed
+        assert ids(inspection_type="Monthly") == failed
+        assert len(ids(inspector_id=1)) == 6
+        assert len(ids(**{"from": "2025-01-01", "to": "2025-01-02"})) == 4
+        assert ids(gear_id=gear.id, **{"to": "2024-12-31"}) == [failed[-1] + 1]
+
+    def test_malformed_cursor_is_rejected(self, client, test_db_with_dependencies):
+        response = client.get("/inspections/", params={"cursor": "not-a-cursor"})
+        assert response.status_code == 400
+
+
+class TestInspectionBatchEndpoint:
+    """POST /inspections/batch"""
+
+    def _item(self, client_id, **fields):
+        item = {"client_id": client_id, "gear_id": 1, "inspector_id": 1,
+                "inspection_date": "2025-11-20", "result": "Passed"}
+        item.update(fields)
+        return item
+
+    def test_valid_items_are_created_together(self, client, test_db_with_dependencies):
+        response = client.post("/inspections/batch", json={"items": [self._item("a"), self._item("b")]})
+
+        assert response.status_code == 200
+        results = response.json()["results"]
+        assert [r["status"] for r in results] == ["created", "created"]
+        stored = {row.client_id: row.id for row in test_db_with_dependencies.query(models.Inspection)}
+        assert {r["client_id"]: r["id"] for r in results} == stored
+
+    def test_invalid_items_do_not_block_the_rest(self, client, test_db_with_dependencies):
+        items = [self._item("ok"), self._item("no-gear", gear_id=999), self._item("no-inspector", inspector_id=999)]
+
+        results = client.post("/inspections/batch", json={"items": items}).json()["results"]
+
+        assert [r["status"] for r in results] == ["created", "invalid", "invalid"]
+        assert results[1]["error"] == "Gear with id 999 does not exist"
+        assert results[2]["error"] == "Firefighter with id 999 does not exist"
+        assert test_db_with_dependencies.query(models.Inspection).count() == 1
+
+    def test_retried_batch_is_idempotent(self, client, test_db_with_dependencies):
+        batch = {"items": [self._item("a"), self._item("b")]}
+        first = client.post("/inspections/batch", json=batch).json()["results"]
+
+        retry = client.post("/inspections/batch", json={"items": batch["items"] + [self._item("c")]}).json()["results"]
+
+        assert [r["status"] for r in retry] == ["duplicate", "duplicate", "created"]
+        assert [r["id"] for r in retry[:2]] == [r["id"] for r in first]
+        assert test_db_with_dependencies.query(models.Inspection).count() == 3
+
+    def test_repeated_client_id_in_one_batch_is_inserted_once(self, client, test_db_with_dependencies):
+        results = client.post("/inspections/batch", json={"items": [self._item("a"), self._item("a")]}).json()["results"]
+
+        assert [r["status"] for r in results] == ["created", "duplicate"]
+        assert results[0]["id"] == results[1]["id"]
+        assert test_db_with_dependencies.query(models.Inspection).count() == 1
+
+
 if __name__ == '__main__':
     pytest.main([__file__, '-v'])
@@ -0,0 +1,171 @@
+"""
+Maintenance Slot Planner Tests
+Tests for planner.plan_slots and POST /schedules/plan
+
+Testing Strategy:
+- The assignment algorithm is tested directly on in-memory gears and slots
+- The endpoint is tested with TestClient against the shared test database
+
+Partitions:
+1. Deadline: expiry date, last inspection, none
+2. Capacity: default vs per station, free vs partly booked slots
+3. Fit: every gear placed vs gears left over, on time vs late
+4. Commit: preview vs written through the bulk path
+5. Request: window reversed, starting in the past, weekday out of range
+"""
+import time as clock
+from datetime import date, time, timedelta
+
+import pytest
+
+import models
+from planner import PlanGear, build_slots, plan_slots
+
+MONDAY = date(2030, 1, 7)
+
+
+class TestPlanSlots:
+    """Unit tests for the earliest-deadline-first assignment"""
+
+    def test_earliest_deadline_gets_the_earliest_slot(self):
+        gears = [
+            PlanGear(1, 10, None),
+            PlanGear(2, 10, MONDAY + timedelta(days=5)),
+            PlanGear(3, 10, MONDAY + timedelta(days=1)),
+        ]
+        slots = build_slots(MONDAY, MONDAY + timedelta(days=2), [time(9, 0)])
+
+        assignments, unassigned = plan_slots(gears, slots, {}, 1)
+
+        assert [(a.gear_id, a.scheduled_date) for a in assignments] == [
+            (3, MONDAY), (2, MONDAY + timedelta(days=1)), (1, MONDAY + timedelta(days=2)),
+        ]
+        assert unassigned == []
+
+    def test_capacity_is_per_station_and_slot(self):
+        gears = [PlanGear(i, 10, None) for i in range(3)] + [PlanGear(10 + i, 20, None) for i in range(3)]
+        slots = build_slots(MONDAY, MONDAY, [time(9, 0), time(13, 0)])
+
+        assignments, unassigned = plan_slots(gears, slots, {20: 3}, 2)
+
+        per_slot = {}
+        for a in assignments:
+            per_slot[(a.station_id, a.scheduled_time)] = per_slot.get((a.station_id, a.scheduled_time), 0) + 1
+        assert per_slot == {(10, time(9, 0)): 2, (10, time(13, 0)): 1, (20, time(9, 0)): 3}
+        assert unassigned == []
+
+    def test_booked_slots_reduce_capacity_and_overflow_is_reported(self):
+        gears = [PlanGear(i, 10, MONDAY - timedelta(days=1)) for i in range(3)]
+        slots = build_slots(MONDAY, MONDAY + timedelta(days=1), [time(9, 0)])
+        booked = {(10, MONDAY, time(9, 0)): 1}
+
+        assignments, unassigned = plan_slots(gears, slots, {}, 1, booked)
+
+        assert [a.scheduled_date for a in assignments] == [MONDAY + timedelta(days=1)]
+        assert assignments[0].late
+        assert unassigned == [1, 2]
+
+    def test_weekdays_limit_the_slots(self):
+        slots = build_slots(MONDAY, MONDAY + timedelta(days=6), [time(9, 0)], weekdays=[0, 2, 4])
+        assert [day.weekday() for day, _ in slots] == [0, 2, 4]
+
+    def test_thousands_of_gears_plan_quickly(self):
+        gears = [
+            PlanGear(i, i % 20, MONDAY + timedelta(days=i % 90) if i % 3 else None)
+            for i in range(10000)
+        ]
+        slots = build_slots(MONDAY, MONDAY + timedelta(days=120), [time(8, 0), time(10, 0), time(14, 0)])
+
+        started = clock.perf_counter()
+        assignments, unassigned = plan_slots(gears, slots, {}, 2)
+        elapsed = clock.perf_counter() - started
+
+        assert len(assignments) + len(unassigned) == 10000
+        assert elapsed < 0.5
+
+
+class TestPlanEndpoint:
+    """Integration tests for POST /schedules/plan"""
+
+    def _add_gears(self, db, count, expiry=None):
+        ids = []
+        for i in range(count):
+            serial = f"PLAN-{db.query(models.Gear).count()}"
+            gear = models.Gear(station_id=1, gear_name=f"Gear {i}", serial_number=serial, expiry_date=expiry)
+            db.add(gear)
+            db.flush()
+            ids.append(gear.id)
+        db.commit()
+        return ids
+
+    def test_preview_does_not_write(self, client, test_db_with_dependencies):
+        db = test_db_with_dependencies
+        self._add_gears(db, 3)
+
+        response = client.post("/schedules/plan", json={
+            "station_id": 1,
+            "start_date": str(MONDAY),
+            "end_date": str(MONDAY + timedelta(days=1)),
+            "slot_times": ["09:00"],
+            "capacity": 2,
+        })
+
+        assert response.status_code == 200
+        body = response.json()
+        assert len(body["assignments"]) == 4
+        assert body["unassigned_gear_ids"] == []
+        assert body["committed"] is False
+        assert db.query(models.MaintenanceSchedule).count() == 0
+
+    def test_deadlines_come_from_inspections_and_expiry(self, client, test_db_with_dependencies):
+        db = test_db_with_dependencies
+        expiring = self._add_gears(db, 1, expiry=MONDAY + timedelta(days=3))[0]
+        db.add(models.Inspection(gear_id=1, inspection_date=MONDAY - timedelta(days=364), result="Passed"))
+        db.commit()
+
+        response = client.post("/schedules/plan", json={
+            "gear_ids": [1, expiring],
+            "start_date": str(MONDAY),
+            "end_date": str(MONDAY + timedelta(days=5)),
+        })
+
+        deadlines = {a["gear_id"]: a["deadline"] for a in response.json()["assignments"]}
+        assert deadlines == {1: str(MONDAY + timedelta(days=1)), expiring: str(MONDAY + timedelta(days=3))}
+        assert response.json()["assignments"][0]["gear_id"] == 1
+
+    def test_commit_writes_schedules_and_respects_booked_slots(self, client, test_db_with_dependencies):
+        db = test_db_with_dependencies
+        self._add_gears(db, 2)
+        request = {
+            "station_id": 1,
+            "start_date": str(MONDAY),
+            "end_date": str(MONDAY + timedelta(days=10)),
+            "capacity": 1,
+            "commit": True,
+        }
+
+        first = client.post("/schedules/plan", json=request).json()
+        extra = self._add_gears(db, 1)[0]
+        second = client.post("/schedules/plan", json=dict(request, gear_ids=[extra])).json()
+
+        assert len(first["created"]) == 3
+        assert [a["scheduled_date"] for a in second["assignments"]] == [str(MONDAY + timedelta(days=3))]
+        assert db.query(models.MaintenanceReminder).count() == 4
+
+    @pytest.mark.parametrize("fields", [
+        {"end_date": str(MONDAY - timedelta(days=1))},
+        {"start_date": str(date.today() - timedelta(days=1))},
+        {"weekdays": [0, 7]},
+        {"weekdays": [-1]},
+    ])
+    def test_invalid_window_is_rejected(self, client, test_db_with_dependencies, fields):
+        request = {"station_id": 1, "start_date": str(MONDAY), "end_date": str(MONDAY + timedelta(days=7)), "commit": True}
+
+        response = client.post("/schedules/plan", json=dict(request, **fields))
+
+        assert response.status_code == 400
+        assert test_db_with_dependencies.query(models.MaintenanceSchedule).count() == 0
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
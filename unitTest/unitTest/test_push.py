@@ -0,0 +1,174 @@
+"""
+Real-time Push Tests
+Tests for push.PushBroker, the Server-Sent Events stream and the events
+published by the create routes
+
+Testing Strategy:
+- The broker and stream generator are driven directly on an event loop
+- Router integration is tested with TestClient: a subscriber registered with
+  the app's broker receives the changes made through the API
+- A flush of all entities on the bus resyncs every subscriber, whatever its filter
+"""
+import asyncio
+import time
+from datetime import date
+
+import models
+from invalidation import ALL_ENTITIES
+from push import _RESYNC, PushBroker, broker, event_stream, handle_push
+
+
+def _drain(subscriber):
+    events = []
+    while not subscriber.queue.empty():
+        events.append(subscriber.queue.get_nowait())
+    return events
+
+
+def _wait_for_events(subscriber, count, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while subscriber.queue.qsize() < count and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return _drain(subscriber)
+
+
+class TestPushBroker:
+    """Unit tests for fan-out, filtering and backpressure"""
+
+    def test_events_are_filtered_by_station_and_department(self):
+        async def scenario():
+            push = PushBroker(queue_size=10)
+            push.attach(asyncio.get_running_loop())
+            everyone = push.subscribe()
+            station = push.subscribe(station_id=1)
+            department = push.subscribe(department_id=2)
+
+            push.publish({"entity": "damageReport", "id": 1, "station_id": 1, "department_id": 1})
+            push.publish({"entity": "damageReport", "id": 2, "station_id": 3, "department_id": 2})
+            return _drain(everyone), _drain(station), _drain(department)
+
+        everyone, station, department = asyncio.run(scenario())
+        assert [e["id"] for e in everyone] == [1, 2]
+        assert [e["id"] for e in station] == [1]
+        assert [e["id"] for e in department] == [2]
+
+    def test_publish_from_another_thread_is_delivered_on_the_loop(self):
+        async def scenario():
+            push = PushBroker(queue_size=10)
+            push.attach(asyncio.get_running_loop())
+            subscriber = push.subscribe()
+            await asyncio.to_thread(push.publish, {"entity": "inspection", "id": 7})
+            return await asyncio.wait_for(subscriber.queue.get(), timeout=1)
+
+        assert asyncio.run(scenario())["id"] == 7
+
+    def test_publish_without_a_loop_is_ignored(self):
+        push = PushBroker(queue_size=10)
+        subscriber = push.subscribe()
+        push.publish({"entity": "inspection", "id": 1})
+        assert subscriber.queue.empty()
+
+    def test_slow_consumer_is_told_to_resync(self):
+        async def scenario():
+            push = PushBroker(queue_size=3)
+            push.attach(asyncio.get_running_loop())
+            subscriber = push.subscribe()
+            for i in range(5):
+                push.publish({"entity": "damageReport", "id": i})
+
+            stream = event_stream(subscriber, keepalive=1)
+            return [chunk async for chunk in stream]
+
+        chunks = asyncio.run(scenario())
+        assert chunks[0].startswith("retry:")
+        assert chunks[1:] == ["event: resync\ndata: {}\n\n"]
+
+    def test_flush_of_all_entities_resyncs_every_subscriber(self):
+        async def scenario():
+            push = PushBroker(queue_size=10)
+            push.attach(asyncio.get_running_loop())
+            subscribers = [push.subscribe(), push.subscribe(station_id=1), push.subscribe(department_id=2)]
+            push.publish({"entity": "damageReport", "id": 1, "station_id": 1})
+            push.publish({"entity": ALL_ENTITIES, "id": None})
+
+            return [[chunk async for chunk in event_stream(subscriber, keepalive=1)] for subscriber in subscribers]
+
+        for chunks in asyncio.run(scenario()):
+            assert chunks[1:] == ["event: resync\ndata: {}\n\n"]
+
+    def test_stream_sends_changes_and_keepalives(self):
+        async def scenario():
+            push = PushBroker(queue_size=10)
+            push.attach(asyncio.get_running_loop())
+            subscriber = push.subscribe()
+            push.publish({"entity": "damageReport", "id": 4})
+
+            stream = event_stream(subscriber, keepalive=0.05)
+            chunks = [await stream.__anext__() for _ in range(3)]
+            await stream.aclose()
+            return chunks
+
+        _, change, keepalive = asyncio.run(scenario())
+        assert change.startswith("event: change\ndata: ")
+        assert '"id": 4' in change
+        assert keepalive == ": keep-alive\n\n"
+
+
+class TestPushFromRoutes:
+    """Integration tests: create routes publish scoped events"""
+
+    def test_damage_report_reaches_station_subscriber(self, client, test_db_with_dependencies):
+        gear = test_db_with_dependencies.query(models.Gear).first()
+        station = test_db_with_dependencies.query(models.Station).first()
+        subscriber = broker.subscribe(station_id=station.id)
+        other = broker.subscribe(station_id=station.id + 100)
+        try:
+            response = client.post("/damage-reports/", json={
+                "gear_id": gear.id,
+                "report_date": str(date.today()),
+                "notes": "Torn sleeve",
+                "status": "pending",
+            })
+            assert response.status_code == 200
+
+            events = _wait_for_events(subscriber, 1)
+            assert events[0]["entity"] == "damageReport"
+            assert events[0]["id"] == response.json()["id"]
+            assert events[0]["department_id"] == station.department_id
+            assert other.queue.empty()
+        finally:
+            broker.unsubscribe(subscriber)
+            broker.unsubscribe(other)
+
+    def test_bus_flush_reaches_subscribers(self, client, test_db_with_dependencies):
+        subscriber = broker.subscribe(station_id=1)
+        try:
+            handle_push({"entity": ALL_ENTITIES, "id": None})
+
+            assert _wait_for_events(subscriber, 1) == [_RESYNC]
+        finally:
+            broker.unsubscribe(subscriber)
+
+    def test_schedule_and_inspection_are_pushed(self, client, test_db_with_dependencies):
+        gear = test_db_with_dependencies.query(models.Gear).first()
+        station = test_db_with_dependencies.query(models.Station).first()
+        subscriber = broker.subscribe(department_id=station.department_id)
+        try:
+            client.post("/schedules/", json={
+                "gear_id": gear.id,
+                "scheduled_date": str(date.today()),
+                "scheduled_time": "09:00",
+            })
+            client.post("/inspections/", json={
+                "gear_id": gear.id,
+                "inspection_date": str(date.today()),
+                "inspection_type": "Routine",
+                "result": "Passed",
+            })
+
+            events = _wait_for_events(subscriber, 3)
+            assert [e["entity"] for e in events] == [
+                "maintenanceSchedule", "maintenanceReminder", "inspection",
+            ]
+        finally:
+            broker.unsubscribe(subscriber)
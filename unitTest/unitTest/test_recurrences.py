@@ -0,0 +1,198 @@
+"""
+Recurring Maintenance Tests
+Tests for recurrence.expand, the /recurrences endpoints and reminder
+materialization by the dispatcher
+
+Testing Strategy:
+- Expansion is tested on unsaved MaintenanceRecurrence objects
+- Endpoints are tested with TestClient against the shared test database
+- Materialization runs the dispatcher against a fixed "now"
+
+Partitions:
+1. Frequency: daily, weekly (with weekdays), monthly (short months), yearly
+2. End: open, until_date, count
+3. Window: before, inside and across the series
+4. Bounds: interval and count out of range, walks longer than MAX_PERIODS
+"""
+from datetime import date, datetime, time, timedelta
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+import models
+from recurrence import MAX_PERIODS, expand, next_occurrence
+from reminder_dispatcher import ReminderDispatcher, ReminderSink
+
+
+def _rule(frequency, start, **fields):
+    fields.setdefault("interval", 1)
+    return models.MaintenanceRecurrence(
+        gear_id=1, frequency=frequency, start_date=start, scheduled_time=time(9, 0), **fields
+    )
+
+
+class NullSink(ReminderSink):
+    def deliver(self, reminders):
+        pass
+
+
+class TestExpand:
+    """Unit tests for lazy occurrence expansion"""
+
+    def test_daily_with_interval(self):
+        rule = _rule("daily", date(2025, 1, 1), interval=3)
+        assert list(expand(rule, date(2025, 1, 5), date(2025, 1, 14))) == [
+            date(2025, 1, 7), date(2025, 1, 10), date(2025, 1, 13),
+        ]
+
+    def test_weekly_on_weekdays_every_other_week(self):
+        # 2025-01-06 is a Monday
+        rule = _rule("weekly", date(2025, 1, 8), interval=2, weekdays="0,3")
+        assert list(expand(rule, date(2025, 1, 1), date(2025, 1, 31))) == [
+            date(2025, 1, 9), date(2025, 1, 20), date(2025, 1, 23),
+        ]
+
+    def test_monthly_on_the_31st_falls_on_the_last_day(self):
+        rule = _rule("monthly", date(2025, 1, 31))
+        assert list(expand(rule, date(2025, 1, 1), date(2025, 4, 30))) == [
+            date(2025, 1, 31), date(2025, 2, 28), date(2025, 3, 31), date(2025, 4, 30),
+        ]
+
+    def test_yearly_on_leap_day(self):
+        rule = _rule("yearly", date(2024, 2, 29))
+        assert list(expand(rule, date(2025, 1, 1), date(2028, 12, 31))) == [
+            date(2025, 2, 28), date(2026, 2, 28), date(2027, 2, 28), date(2028, 2, 29),
+        ]
+
+    def test_until_and_count_end_the_series(self):
+        until = _rule("monthly", date(2025, 1, 1), until_date=date(2025, 3, 15))
+        counted = _rule("weekly", date(2025, 1, 6), count=3)
+
+        assert len(list(expand(until, date(2025, 1, 1), date(2025, 12, 31)))) == 3
+        assert list(expand(counted, date(2025, 1, 14), date(2025, 12, 31))) == [date(2025, 1, 20)]
+        assert next_occurrence(counted, date(2025, 1, 21)) is None
+
+    def test_window_before_the_series_is_empty(self):
+        rule = _rule("daily", date(2025, 6, 1))
+        assert list(expand(rule, date(2025, 1, 1), date(2025, 5, 31))) == []
+
+    def test_jumping_to_the_window_matches_walking_from_the_start(self):
+        rule = _rule("weekly", date(2020, 3, 4), interval=3, weekdays="1,4,6")
+        walked = [day for day in expand(rule, rule.start_date, date(2025, 12, 31))]
+
+        window = list(expand(rule, date(2025, 2, 10), date(2025, 3, 31)))
+        assert window == [day for day in walked if date(2025, 2, 10) <= day <= date(2025, 3, 31)]
+
+    def test_walk_stops_after_max_periods(self):
+        rule = _rule("daily", date(1900, 1, 1), count=10**9)
+
+        assert list(expand(rule, date(2025, 1, 1), date(2025, 1, 31))) == []
+        assert len(list(expand(rule, rule.start_date, date(2025, 1, 31)))) == MAX_PERIODS
+
+
+class TestRecurrenceEndpoints:
+    """Integration tests for /recurrences"""
+
+    def test_create_and_list(self, client, test_db_with_dependencies):
+        response = client.post("/recurrences/", json={
+            "gear_id": 1,
+            "frequency": "weekly",
+            "weekdays": [3, 0],
+            "start_date": "2025-01-06",
+            "scheduled_time": "08:30",
+        })
+
+        assert response.status_code == 200
+        assert response.json()["weekdays"] == [0, 3]
+        assert client.get("/recurrences/").json()[0]["frequency"] == "weekly"
+
+    def test_invalid_frequency_is_rejected(self, client, test_db_with_dependencies):
+        response = client.post("/recurrences/", json={
+            "gear_id": 1, "frequency": "hourly", "start_date": "2025-01-06",
+        })
+        assert response.status_code == 422
+
+    @pytest.mark.parametrize("fields", [{"interval": 0}, {"interval": 367}, {"count": 0}, {"count": 10**9}])
+    def test_out_of_range_interval_or_count_is_rejected(self, client, test_db_with_dependencies, fields):
+        response = client.post("/recurrences/", json={
+            "gear_id": 1, "frequency": "daily", "start_date": "2025-01-06", **fields,
+        })
+        assert response.status_code == 422
+
+    def test_unknown_gear_is_rejected(self, client, test_db_with_dependencies):
+        response = client.post("/recurrences/", json={
+            "gear_id": 999, "frequency": "daily", "start_date": "2025-01-06",
+        })
+        assert response.status_code == 400
+
+    def test_active_recurrence_blocks_new_schedule(self, client, test_db_with_dependencies):
+        client.post("/recurrences/", json={
+            "gear_id": 1, "frequency": "monthly", "start_date": str(date.today()),
+        })
+
+        response = client.post("/schedules/", json={
+            "gear_id": 1, "scheduled_date": str(date.today() + timedelta(days=3)),
+        })
+        assert response.status_code == 409
+
+    def test_finished_recurrence_does_not_block(self, client, test_db_with_dependencies):
+        client.post("/recurrences/", json={
+            "gear_id": 1, "frequency": "daily", "start_date": "2024-01-01", "count": 2,
+        })
+
+        response = client.post("/schedules/", json={
+            "gear_id": 1, "scheduled_date": str(date.today() + timedelta(days=3)),
+        })
+        assert response.status_code == 200
+
+    def test_pending_schedule_blocks_new_recurrence(self, client, test_db_with_dependencies):
+        client.post("/schedules/", json={"gear_id": 1, "scheduled_date": str(date.today())})
+
+        response = client.post("/recurrences/", json={
+            "gear_id": 1, "frequency": "daily", "start_date": str(date.today()),
+        })
+        assert response.status_code == 409
+
+    def test_occurrences_in_window(self, client, test_db_with_dependencies):
+        client.post("/recurrences/", json={
+            "gear_id": 1, "frequency": "monthly", "start_date": "2025-01-15", "scheduled_time": "10:00",
+        })
+
+        response = client.get("/recurrences/occurrences", params={"from": "2025-03-01", "to": "2025-05-31"})
+
+        assert response.status_code == 200
+        assert [o["scheduled_date"] for o in response.json()] == ["2025-03-15", "2025-04-15", "2025-05-15"]
+        assert response.json()[0]["scheduled_time"] == "10:00:00"
+
+    def test_occurrence_window_is_limited(self, client, test_db_with_dependencies):
+        response = client.get("/recurrences/occurrences", params={"from": "2025-01-01", "to": "2027-01-01"})
+        assert response.status_code == 400
+
+
+class TestMaterialization:
+    """The dispatcher writes reminders only inside its horizon"""
+
+    def test_reminders_are_created_once_within_the_horizon(self, test_db_with_dependencies):
+        db = test_db_with_dependencies
+        db.add(models.MaintenanceRecurrence(
+            gear_id=1, frequency="daily", interval=1,
+            start_date=date(2025, 10, 1), scheduled_time=time(9, 0),
+        ))
+        db.commit()
+        dispatcher = ReminderDispatcher(
+            sessionmaker(bind=db.get_bind()), sink=NullSink(), horizon=timedelta(days=2),
+        )
+        now = datetime(2025, 10, 20, 8, 0)
+
+        dispatcher.fire_due(now)
+        dispatcher.timers.invalidate()
+        dispatcher.fire_due(now)
+
+        db.expire_all()
+        dates = sorted(r.reminder_date for r in db.query(models.MaintenanceReminder).all())
+        assert dates == [date(2025, 10, 20), date(2025, 10, 21)]
+        assert len(dispatcher.timers) == 2
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,241 @@
+"""
+Reminder Dispatcher Tests
+Tests for reminder_dispatcher.ReminderDispatcher
+
+Testing Strategy:
+- Reminders are inserted directly with the shared test database
+- Dispatch runs against a fixed "now" so due/not-due partitions are exact
+
+Partitions:
+1. Due state: past date, today before now, today after now, future date
+2. Sent state: unsent vs already sent
+3. Batch size: fewer vs more due reminders than one batch
+4. Sink outcome: delivered vs delivery failure
+5. Timer queue: inside vs beyond the loaded horizon, added by event vs by rebuild
+"""
+from datetime import date, datetime, time, timedelta
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+import models
+from invalidation import ALL_ENTITIES, bus
+from reminder_dispatcher import ReminderDispatcher, ReminderSink
+from reminder_timers import ReminderTimerQueue
+
+NOW = datetime(2025, 10, 20, 9, 0)
+
+
+class CollectingSink(ReminderSink):
+    def __init__(self, fail=False):
+        self.batches = []
+        self.fail = fail
+
+    def deliver(self, reminders):
+        if self.fail:
+            raise RuntimeError("push gateway down")
+        self.batches.append([reminder.id for reminder in reminders])
+
+
+def _add_reminder(db, gear_id, day, at, sent=False):
+    reminder = models.MaintenanceReminder(
+        gear_id=gear_id, reminder_date=day, reminder_time=at, message="Check", sent=sent
+    )
+    db.add(reminder)
+    db.commit()
+    return reminder.id
+
+
+def _dispatcher(db, sink, batch_size=100):
+    return ReminderDispatcher(sessionmaker(bind=db.get_bind()), sink=sink, batch_size=batch_size)
+
+
+def _sent_ids(db):
+    db.expire_all()
+    return {r.id for r in db.query(models.MaintenanceReminder).filter(models.MaintenanceReminder.sent == True)}
+
+
+class TestReminderDispatcher:
+
+    def test_sink_must_implement_deliver(self):
+        class IncompleteSink(ReminderSink):
+            pass
+
+        with pytest.raises(TypeError):
+            IncompleteSink()
+
+    def test_only_due_unsent_reminders_are_delivered(self, test_db_with_dependencies):
+        db = test_db_with_dependencies
+        past = _add_reminder(db, 1, date(2025, 10, 19), time(23, 0))
+        earlier_today = _add_reminder(db, 1, date(2025, 10, 20), time(8, 30))
+        later_today = _add_reminder(db, 1, date(2025, 10, 20), time(10, 0))
+        future = _add_reminder(db, 1, date(2025, 10, 21), time(0, 0))
+        already_sent = _add_reminder(db, 1, date(2025, 10, 1), time(8, 0), sent=True)
+        sink = CollectingSink()
+
+        count = _dispatcher(db, sink).dispatch_due(NOW)
+
+        assert count == 2
+        assert sink.batches == [[past, earlier_today]]
+        assert _sent_ids(db) == {past, earlier_today, already_sent}
+        assert later_today not in _sent_ids(db) and future not in _sent_ids(db)
+
+    def test_due_reminders_are_claimed_in_batches(self, test_db_with_dependencies):
+        db = test_db_with_dependencies
+        ids = [_add_reminder(db, 1, date(2025, 10, 1), time(8, i)) for i in range(5)]
+        sink = CollectingSink()
+
+        count = _dispatcher(db, sink, batch_size=2).dispatch_due(NOW)
+
+        assert count == 5
+        assert [len(batch) for batch in sink.batches] == [2, 2, 1]
+        assert _sent_ids(db) == set(ids)
+
+    def test_second_run_sends_nothing(self, test_db_with_dependencies):
+        db = test_db_with_dependencies
+        _add_reminder(db, 1, date(2025, 10, 1), time(8, 0))
+        dispatcher = _dispatcher(db, CollectingSink())
+
+        dispatcher.dispatch_due(NOW)
+
+        assert dispatcher.dispatch_due(NOW) == 0
+
+    def test_failed_delivery_leaves_reminders_unsent(self, test_db_with_dependencies):
+        db = test_db_with_dependencies
+        _add_reminder(db, 1, date(2025, 10, 1), time(8, 0))
+
+        with pytest.raises(RuntimeError):
+            _dispatcher(db, CollectingSink(fail=True)).dispatch_due(NOW)
+
+        assert _sent_ids(db) == set()
+
+
+
+class TestReminderTimerQueue:
+    """Unit tests for the in-memory heap"""
+
+    def test_rebuild_loads_unsent_reminders_within_the_horizon(self, test_db_with_dependencies):
+        db = test_db_with_dependencies
+        overdue = _add_reminder(db, 1, date(2025, 10, 19), time(8, 0))
+        soon = _add_reminder(db, 1, date(2025, 10, 20), time(11, 0))
+        _add_reminder(db, 1, date(2025, 10, 21), time(8, 0))
+        _add_reminder(db, 1, date(2025, 10, 20), time(10, 0), sent=True)
+        timers = ReminderTimerQueue(horizon=timedelta(hours=6))
+
+        assert timers.rebuild(db, NOW) == 2
+        assert timers.next_due() == datetime(2025, 10, 19, 8, 0)
+        assert timers.pop_due(NOW) == [overdue]
+        assert timers.pop_due(NOW + timedelta(hours=2)) == [soon]
+        assert len(timers) == 0
+
+    def test_add_ignores_reminders_beyond_the_horizon(self):
+        timers = ReminderTimerQueue(horizon=timedelta(hours=1))
+        timers.loaded_until = NOW + timedelta(hours=1)
+
+        assert timers.add(1, NOW + timedelta(minutes=30))
+        assert not timers.add(2, NOW + timedelta(hours=2))
+        assert len(timers) == 1
+
+    def test_discarded_and_rescheduled_entries_fire_once(self):
+        timers = ReminderTimerQueue(horizon=timedelta(hours=1))
+        timers.loaded_until = NOW + timedelta(hours=1)
+        timers.add(1, NOW - timedelta(minutes=5))
+        timers.add(2, NOW - timedelta(minutes=4))
+        timers.add(2, NOW - timedelta(minutes=1))
+        timers.discard(1)
+
+        assert timers.pop_due(NOW) == [2]
+        assert timers.next_due() is None
+
+    def test_needs_rebuild_after_half_the_horizon(self):
+        timers = ReminderTimerQueue(horizon=timedelta(hours=2))
+        assert timers.needs_rebuild(NOW)
+        timers.loaded_until = NOW + timedelta(hours=2)
+
+        assert not timers.needs_rebuild(NOW + timedelta(minutes=30))
+        assert timers.needs_rebuild(NOW + timedelta(hours=1))
+
+
+class TestTimerDispatch:
+    """Firing from the timer queue"""
+
+    def test_fire_due_delivers_what_the_queue_holds(self, test_db_with_dependencies):
+        db = test_db_with_dependencies
+        due = _add_reminder(db, 1, date(2025, 10, 20), time(8, 0))
+        later = _add_reminder(db, 1, date(2025, 10, 20), time(12, 0))
+        sink = CollectingSink()
+        dispatcher = _dispatcher(db, sink)
+
+        assert dispatcher.fire_due(NOW) == 1
+        assert dispatcher.fire_due(datetime(2025, 10, 20, 12, 0)) == 1
+
+        assert sink.batches == [[due], [later]]
+        assert _sent_ids(db) == {due, later}
+
+    def test_reminder_sent_by_another_dispatcher_is_skipped(self, test_db_with_dependencies):
+        db = test_db_with_dependencies
+        reminder_id = _add_reminder(db, 1, date(2025, 10, 20), time(8, 0))
+        first, second = CollectingSink(), CollectingSink()
+        one, other = _dispatcher(db, first), _dispatcher(db, second)
+        one.timers.rebuild(db, NOW)
+        other.timers.rebuild(db, NOW)
+
+        one.fire_due(NOW)
+        other.fire_due(NOW)
+
+        assert first.batches == [[reminder_id]]
+        assert second.batches == []
+
+    def test_failed_delivery_is_retried_after_rebuild(self, test_db_with_dependencies):
+        db = test_db_with_dependencies
+        reminder_id = _add_reminder(db, 1, date(2025, 10, 20), time(8, 0))
+        sink = CollectingSink(fail=True)
+        dispatcher = _dispatcher(db, sink)
+
+        with pytest.raises(RuntimeError):
+            dispatcher.fire_due(NOW)
+        sink.fail = False
+        dispatcher.timers.invalidate()
+
+        assert dispatcher.fire_due(NOW) == 1
+        assert sink.batches == [[reminder_id]]
+
+    def test_events_update_the_queue(self, test_db_with_dependencies):
+        db = test_db_with_dependencies
+        dispatcher = _dispatcher(db, CollectingSink())
+        dispatcher.timers.rebuild(db, NOW)
+        due = (NOW + timedelta(minutes=10)).isoformat()
+
+        dispatcher.handle_event({"entity": "maintenanceReminder", "id": 42, "due": due})
+        assert len(dispatcher.timers) == 1
+        dispatcher.handle_event({"entity": "maintenanceReminder", "id": 42})
+        assert len(dispatcher.timers) == 0
+
+        dispatcher.handle_event({"entity": "maintenanceReminder", "id": None, "ids": [7, 8], "due": due})
+        assert len(dispatcher.timers) == 2
+
+        dispatcher.handle_event({"entity": ALL_ENTITIES, "id": None})
+        assert dispatcher.timers.needs_rebuild(NOW)
+
+    def test_created_reminder_reaches_the_queue(self, client, test_db_with_dependencies):
+        db = test_db_with_dependencies
+        dispatcher = _dispatcher(db, CollectingSink())
+        dispatcher.timers.rebuild(db, datetime.now())
+        due = datetime.now() + timedelta(minutes=30)
+        bus.subscribe(dispatcher.handle_event)
+        try:
+            response = client.post("/reminders/", json={
+                "gear_id": 1,
+                "reminder_date": str(due.date()),
+                "reminder_time": due.strftime("%H:%M:%S"),
+                "message": "Check SCBA",
+            })
+        finally:
+            bus.unsubscribe(dispatcher.handle_event)
+
+        assert response.status_code == 200
+        assert dispatcher.timers.pop_due(due + timedelta(seconds=1)) == [response.json()["id"]]
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,103 @@
+"""
+Reminders Router Tests
+Tests for GET /reminders/changes (incremental sync)
+
+Testing Strategy:
+- Each test performs a full sync, changes the table, then syncs from the
+  returned token
+- SYNC_SAFETY_WINDOW is set to zero so tokens advance to the last row seen
+
+Partitions:
+1. Token: missing (full sync), valid, malformed
+2. Changes since token: none, insert, update (reminder marked sent)
+3. Page size: all changes fit vs more changes than ``limit``
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+import routers.reminders
+from reminder_dispatcher import ReminderDispatcher, ReminderSink
+
+
+@pytest.fixture(autouse=True)
+def no_safety_window(monkeypatch):
+    monkeypatch.setattr(routers.reminders, "SYNC_SAFETY_WINDOW", timedelta(0))
+
+
+def _create(client, message):
+    payload = {'gear_id': 1, 'reminder_date': '2025-10-01', 'reminder_time': '08:00:00', 'message': message}
+    return client.post("/reminders/", json=payload).json()['id']
+
+
+class TestReminderChanges:
+
+    def test_full_sync_without_token(self, client, test_db_with_dependencies):
+        ids = [_create(client, f"Check {i}") for i in range(3)]
+
+        response = client.get("/reminders/changes")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert [r['id'] for r in data['reminders']] == ids
+        assert data['has_more'] is False
+        assert data['next_token']
+
+    def test_no_changes_since_token(self, client, test_db_with_dependencies):
+        _create(client, "Check")
+        token = client.get("/reminders/changes").json()['next_token']
+
+        data = client.get("/reminders/changes", params={'since': token}).json()
+
+        assert data['reminders'] == []
+        assert data['next_token'] == token
+
+    def test_only_new_reminders_after_token(self, client, test_db_with_dependencies):
+        _create(client, "Old")
+        token = client.get("/reminders/changes").json()['next_token']
+        new_id = _create(client, "New")
+
+        data = client.get("/reminders/changes", params={'since': token}).json()
+
+        assert [r['id'] for r in data['reminders']] == [new_id]
+
+    def test_reminder_marked_sent_is_a_change(self, client, test_db_with_dependencies):
+        reminder_id = _create(client, "Due")
+        token = client.get("/reminders/changes").json()['next_token']
+
+        class NullSink(ReminderSink):
+            def deliver(self, reminders):
+                pass
+
+        db = test_db_with_dependencies
+        ReminderDispatcher(sessionmaker(bind=db.get_bind()), sink=NullSink()).dispatch_due(
+            datetime(2025, 10, 2)
+        )
+
+        data = client.get("/reminders/changes", params={'since': token}).json()
+        assert [(r['id'], r['sent']) for r in data['reminders']] == [(reminder_id, True)]
+
+    def test_pages_until_has_more_is_false(self, client, test_db_with_dependencies):
+        ids = [_create(client, f"Check {i}") for i in range(5)]
+
+        seen, token, pages = [], None, 0
+        while True:
+            params = {'limit': 2, **({'since': token} if token else {})}
+            data = client.get("/reminders/changes", params=params).json()
+            seen += [r['id'] for r in data['reminders']]
+            token, pages = data['next_token'], pages + 1
+            if not data['has_more']:
+                break
+
+        assert seen == ids
+        assert pages == 3
+
+    def test_malformed_token(self, client, db_session):
+        response = client.get("/reminders/changes", params={'since': 'not-a-token'})
+
+        assert response.status_code == 400
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
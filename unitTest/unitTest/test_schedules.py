@@ -0,0 +1,264 @@
+"""
+Maintenance Schedule Tests
+Tests for the /schedules endpoints beyond basic creation
+
+Testing Strategy:
+- Schedules are created through the API or inserted directly with the
+  shared test database
+- Calendar windows use fixed past dates so caching rules apply
+
+Partitions:
+1. Window: past (cached) vs including today (not cached)
+2. Scope: all stations vs one station
+3. Source: one-off schedules vs recurrence occurrences
+4. Bulk selection: id list vs station filter, free vs busy vs unknown gears
+5. Concurrency: simultaneous requests for one gear vs for different gears
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, time, timedelta
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.orm import sessionmaker
+
+import models
+import schemas
+from cache import calendar_cache
+from routers.schedules import create_schedule
+
+
+def _add_station_with_gear(db, name):
+    station = models.Station(name=name, department_id=1)
+    db.add(station)
+    db.flush()
+    gear = models.Gear(station_id=station.id, gear_name=f"{name} Gear", serial_number=f"SN-{name}")
+    db.add(gear)
+    db.commit()
+    return station.id, gear.id
+
+
+def _add_schedule(db, gear_id, day, at=time(9, 0)):
+    db.add(models.MaintenanceSchedule(gear_id=gear_id, scheduled_date=day, scheduled_time=at))
+    db.commit()
+
+
+class TestScheduleCalendar:
+    """GET /schedules/calendar"""
+
+    def test_schedules_are_bucketed_by_day(self, client, test_db_with_dependencies):
+        db = test_db_with_dependencies
+        _add_schedule(db, 1, date(2025, 3, 4), time(14, 0))
+        _add_schedule(db, 1, date(2025, 3, 4), time(8, 0))
+        _add_schedule(db, 1, date(2025, 3, 20))
+        _add_schedule(db, 1, date(2025, 4, 1))
+
+        response = client.get("/schedules/calendar", params={"from": "2025-03-01", "to": "2025-03-31"})
+
+        assert response.status_code == 200
+        days = response.json()
+        assert [(d["day"], d["count"]) for d in days] == [("2025-03-04", 2), ("2025-03-20", 1)]
+        assert [i["scheduled_time"] for i in days[0]["items"]] == ["08:00:00", "14:00:00"]
+        assert days[0]["items"][0]["gear_name"] == "Test Gear"
+
+    def test_station_filter(self, client, test_db_with_dependencies):
+        db = test_db_with_dependencies
+        other_station, other_gear = _add_station_with_gear(db, "North")
+        _add_schedule(db, 1, date(2025, 3, 4))
+        _add_schedule(db, other_gear, date(2025, 3, 5))
+
+        response = client.get(
+            "/schedules/calendar",
+            params={"from": "2025-03-01", "to": "2025-03-31", "station_id": other_station},
+        )
+
+        assert [d["day"] for d in response.json()] == ["2025-03-05"]
+
+    def test_recurrence_occurrences_are_included(self, client, test_db_with_dependencies):
+        db = test_db_with_dependencies
+        db.add(models.MaintenanceRecurrence(
+            gear_id=1, frequency="weekly", interval=1, weekdays="0",
+            start_date=date(2025, 3, 1), scheduled_time=time(7, 0),
+        ))
+        db.commit()
+
+        response = client.get("/schedules/calendar", params={"from": "2025-03-01", "to": "2025-03-16"})
+
+        days = response.json()
+        assert [d["day"] for d in days] == ["2025-03-03", "2025-03-10"]
+        assert days[0]["items"][0]["recurrence_id"] is not None
+        assert days[0]["items"][0]["schedule_id"] is None
+
+    def test_past_windows_are_cached(self, client, test_db_with_dependencies):
+        db = test_db_with_dependencies
+        _add_schedule(db, 1, date(2025, 3, 4))
+        params = {"from": "2025-03-01", "to": "2025-03-31"}
+
+        first = client.get("/schedules/calendar", params=params)
+        _add_schedule(db, 1, date(2025, 3, 5))
+        second = client.get("/schedules/calendar", params=params)
+
+        assert first.headers["cache-control"] == "no-cache"
+        assert second.json() == first.json()
+        assert calendar_cache.stats()["hits"] == 1
+
+    def test_past_windows_revalidate_with_etag(self, client, test_db_with_dependencies):
+        _add_schedule(test_db_with_dependencies, 1, date(2025, 3, 4))
+        params = {"from": "2025-03-01", "to": "2025-03-31"}
+        etag = client.get("/schedules/calendar", params=params).headers["etag"]
+
+        unchanged = client.get("/schedules/calendar", params=params, headers={"If-None-Match": etag})
+        # A back-dated schedule changes the past window and its tag
+        client.post("/schedules/", json={"gear_id": 1, "scheduled_date": "2025-03-05"})
+        changed = client.get("/schedules/calendar", params=params, headers={"If-None-Match": etag})
+
+        assert unchanged.status_code == 304
+        assert changed.status_code == 200
+        assert changed.headers["etag"] != etag
+
+    def test_new_schedule_invalidates_cached_windows(self, client, test_db_with_dependencies):
+        db = test_db_with_dependencies
+        _add_schedule(db, 1, date(2025, 3, 4))
+        params = {"from": "2025-03-01", "to": "2025-03-31"}
+        client.get("/schedules/calendar", params=params)
+
+        # Any schedule write through the API drops cached calendar windows
+        client.post("/schedules/", json={"gear_id": 1, "scheduled_date": "2025-03-05"})
+
+        assert len(client.get("/schedules/calendar", params=params).json()) == 2
+
+    def test_windows_including_today_are_not_cached(self, client, test_db_with_dependencies):
+        today = date.today()
+        response = client.get(
+            "/schedules/calendar",
+            params={"from": str(today - timedelta(days=3)), "to": str(today + timedelta(days=3))},
+        )
+
+        assert response.headers["cache-control"] == "no-cache"
+        assert calendar_cache.stats()["size"] == 0
+
+    def test_invalid_windows_are_rejected(self, client, test_db_with_dependencies):
+        reversed_window = client.get("/schedules/calendar", params={"from": "2025-03-31", "to": "2025-03-01"})
+        too_long = client.get("/schedules/calendar", params={"from": "2024-01-01", "to": "2025-06-01"})
+
+        assert reversed_window.status_code == 400
+        assert too_long.status_code == 400
+
+
+
+class TestBulkSchedules:
+    """POST /schedules/bulk"""
+
+    def test_station_gears_are_scheduled_with_reminders(self, client, test_db_with_dependencies):
+        db = test_db_with_dependencies
+        station_id, gear_id = _add_station_with_gear(db, "North")
+        db.add(models.Gear(station_id=station_id, gear_name="Hose", serial_number="SN-HOSE"))
+        db.commit()
+
+        response = client.post("/schedules/bulk", json={
+            "station_id": station_id, "scheduled_date": "2030-05-01", "scheduled_time": "08:00",
+        })
+
+        assert response.status_code == 200
+        body = response.json()
+        assert len(body["created"]) == 2
+        assert body["skipped_gear_ids"] == []
+
+        db.expire_all()
+        reminders = db.query(models.MaintenanceReminder).order_by(models.MaintenanceReminder.gear_id).all()
+        assert [r.schedule_id for r in reminders] == [c["id"] for c in body["created"]]
+        assert reminders[0].message == f"Maintenance scheduled for gear {gear_id}"
+        assert reminders[0].reminder_time == time(8, 0)
+        logged = db.query(models.ChangeLog.entity_type).all()
+        assert sorted(entity for (entity,) in logged) == [
+            "maintenanceReminder", "maintenanceReminder", "maintenanceSchedule", "maintenanceSchedule",
+        ]
+
+    def test_busy_and_unknown_gears_are_reported(self, client, test_db_with_dependencies):
+        db = test_db_with_dependencies
+        _, free_gear = _add_station_with_gear(db, "North")
+        client.post("/schedules/", json={"gear_id": 1, "scheduled_date": str(date.today())})
+
+        response = client.post("/schedules/bulk", json={
+            "gear_ids": [1, free_gear, 999], "scheduled_date": "2030-05-01",
+        })
+
+        body = response.json()
+        assert [c["gear_id"] for c in body["created"]] == [free_gear]
+        assert body["skipped_gear_ids"] == [1]
+        assert body["missing_gear_ids"] == [999]
+
+    def test_a_filter_is_required(self, client, test_db_with_dependencies):
+        response = client.post("/schedules/bulk", json={"scheduled_date": "2030-05-01"})
+        assert response.status_code == 400
+
+    def test_bulk_schedules_count_as_active(self, client, test_db_with_dependencies):
+        client.post("/schedules/bulk", json={"gear_ids": [1], "scheduled_date": "2030-05-01"})
+
+        response = client.post("/schedules/", json={"gear_id": 1, "scheduled_date": "2030-06-01"})
+        assert response.status_code == 409
+
+
+
+def _create_concurrently(db, gear_ids):
+    """Call create_schedule from one thread and session per gear id at once"""
+    factory = sessionmaker(bind=db.get_bind())
+    barrier = threading.Barrier(len(gear_ids))
+    scheduled_date = date.today() + timedelta(days=1)
+
+    def attempt(gear_id):
+        session = factory()
+        try:
+            barrier.wait()
+            create_schedule(
+                schemas.MaintenanceScheduleCreate(gear_id=gear_id, scheduled_date=scheduled_date), session
+            )
+            return 200
+        except HTTPException as exc:
+            return exc.status_code
+        finally:
+            session.close()
+
+    with ThreadPoolExecutor(max_workers=len(gear_ids)) as pool:
+        return list(pool.map(attempt, gear_ids))
+
+
+class TestConcurrentScheduling:
+    """Stress tests for the single-active-schedule rule"""
+
+    def test_one_gear_gets_exactly_one_schedule(self, client, test_db_with_dependencies):
+        db = test_db_with_dependencies
+
+        statuses = _create_concurrently(db, [1] * 8)
+
+        assert sorted(statuses) == [200] + [409] * 7
+        db.expire_all()
+        assert db.query(models.MaintenanceSchedule).count() == 1
+        assert db.query(models.MaintenanceReminder).count() == 1
+
+    def test_different_gears_do_not_block_each_other(self, client, test_db_with_dependencies):
+        db = test_db_with_dependencies
+        gear_ids = [1] + [_add_station_with_gear(db, f"S{i}")[1] for i in range(7)]
+
+        statuses = _create_concurrently(db, gear_ids)
+
+        assert statuses == [200] * 8
+        db.expire_all()
+        assert db.query(models.MaintenanceReminder).count() == 8
+
+    def test_past_schedule_no_longer_blocks(self, client, test_db_with_dependencies):
+        db = test_db_with_dependencies
+        db.add(models.MaintenanceSchedule(
+            gear_id=1, scheduled_date=date.today() - timedelta(days=2), scheduled_time=time(9, 0), pending=True,
+        ))
+        db.commit()
+
+        response = client.post("/schedules/", json={"gear_id": 1, "scheduled_date": str(date.today())})
+
+        assert response.status_code == 200
+        db.expire_all()
+        assert db.query(models.MaintenanceSchedule).filter(models.MaintenanceSchedule.pending == True).count() == 1
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
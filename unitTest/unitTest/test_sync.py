@@ -0,0 +1,144 @@
+"""
+Delta Sync Tests
+Tests for the change log (changelog.py) and GET /sync
+
+Testing Strategy:
+- Writes go through the real routers so change rows are produced by the
+  same transactions as the data
+- SYNC_SAFETY_WINDOW is set to zero so next_since advances to the last change
+
+Partitions:
+1. since: 0 (full sync), after previous sync, nothing new
+2. Entity churn: one change per entity vs many changes to one entity
+3. Page size: all changes fit vs more than ``limit``
+4. Safety window: recent changes on the last page vs on a full page
+5. Compaction: superseded rows removed, latest row kept
+"""
+from datetime import timedelta
+
+import pytest
+
+import models
+import routers.sync
+from changelog import compact_change_log, record_change, seed_change_log
+
+
+@pytest.fixture(autouse=True)
+def no_safety_window(monkeypatch):
+    monkeypatch.setattr(routers.sync, "SYNC_SAFETY_WINDOW", timedelta(0))
+
+
+def _create_gear(client, serial):
+    payload = {'station_id': 1, 'gear_name': 'Helmet', 'serial_number': serial}
+    return client.post("/gears/", json=payload).json()['id']
+
+
+class TestSyncEndpoint:
+
+    def test_full_sync_returns_all_entity_types(self, client, test_db_with_dependencies):
+        gear_id = _create_gear(client, 'SN-1')
+        client.post("/inspections/", json={'gear_id': gear_id, 'result': 'Passed'})
+        client.post("/damage-reports/", json={'gear_id': gear_id, 'reporter_name': 'Inspector Gadget'})
+        client.post("/schedules/", json={'gear_id': gear_id, 'scheduled_date': '2099-01-01'})
+
+        data = client.get("/sync/", params={'since': 0}).json()
+
+        assert [g['id'] for g in data['gears']] == [gear_id]
+        assert len(data['inspections']) == 1
+        assert data['damage_reports'][0]['reporter_name'] == 'Inspector Gadget'
+        assert len(data['schedules']) == 1
+        assert len(data['reminders']) == 1
+        assert data['has_more'] is False
+
+    def test_only_changes_after_since(self, client, test_db_with_dependencies):
+        _create_gear(client, 'SN-1')
+        since = client.get("/sync/").json()['next_since']
+        new_gear = _create_gear(client, 'SN-2')
+
+        data = client.get("/sync/", params={'since': since}).json()
+
+        assert [g['id'] for g in data['gears']] == [new_gear]
+        assert data['inspections'] == []
+
+    def test_nothing_new_keeps_since(self, client, test_db_with_dependencies):
+        _create_gear(client, 'SN-1')
+        since = client.get("/sync/").json()['next_since']
+
+        data = client.get("/sync/", params={'since': since}).json()
+
+        assert data['next_since'] == since
+        assert data['gears'] == []
+
+    def test_repeated_changes_are_returned_once(self, client, test_db_with_dependencies):
+        db = test_db_with_dependencies
+        gear_id = _create_gear(client, 'SN-1')
+        for _ in range(5):
+            record_change(db, models.Gear, gear_id)
+        db.commit()
+
+        data = client.get("/sync/").json()
+
+        assert [g['id'] for g in data['gears']] == [gear_id]
+
+    def test_pagination(self, client, test_db_with_dependencies):
+        ids = [_create_gear(client, f'SN-{i}') for i in range(5)]
+
+        seen, since = [], 0
+        while True:
+            data = client.get("/sync/", params={'since': since, 'limit': 2}).json()
+            seen += [g['id'] for g in data['gears']]
+            since = data['next_since']
+            if not data['has_more']:
+                break
+
+        assert seen == ids
+
+    @pytest.mark.parametrize('limit', [2, 5])
+    def test_next_since_stops_before_recent_changes(self, client, test_db_with_dependencies, monkeypatch, limit):
+        db = test_db_with_dependencies
+        ids = [_create_gear(client, f'SN-{i}') for i in range(4)]
+        log = models.ChangeLog
+        gear_seqs = [row.seq for row in db.query(log.seq).filter(log.entity_type == 'gear').order_by(log.seq)]
+        db.query(log).filter(log.seq <= gear_seqs[0]).update(
+            {log.changed_at: models.utcnow() - timedelta(hours=1)}, synchronize_session=False
+        )
+        db.commit()
+        monkeypatch.setattr(routers.sync, "SYNC_SAFETY_WINDOW", timedelta(minutes=5))
+
+        data = client.get("/sync/", params={'limit': limit}).json()
+
+        assert data['next_since'] == gear_seqs[0]
+        assert data['has_more'] is False
+        assert [g['id'] for g in data['gears']] == ids[:limit]
+
+
+class TestChangeLogMaintenance:
+
+    def test_compaction_keeps_latest_row_per_entity(self, client, test_db_with_dependencies):
+        db = test_db_with_dependencies
+        gear_id = _create_gear(client, 'SN-1')
+        for _ in range(3):
+            record_change(db, models.Gear, gear_id)
+        db.commit()
+        latest = db.query(models.ChangeLog.seq).order_by(models.ChangeLog.seq.desc()).first().seq
+
+        removed = compact_change_log(db)
+
+        rows = db.query(models.ChangeLog).filter(models.ChangeLog.entity_type == 'gear').all()
+        assert removed == 3
+        assert [row.seq for row in rows] == [latest]
+
+    def test_seed_logs_rows_created_outside_the_api(self, client, test_db_with_dependencies):
+        db = test_db_with_dependencies
+
+        seeded = seed_change_log(db)
+
+        data = client.get("/sync/").json()
+        assert seeded == 4  # department, station, firefighter, gear
+        assert len(data['gears']) == 1
+        assert len(data['stations']) == 1
+        assert seed_change_log(db) == 0
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,84 @@
+"""
+Foreign Key Validation Tests
+Tests for validation.py and the create routes that rely on FK constraints
+
+Testing Strategy:
+- foreign_keys/missing_reference are tested directly against the test database
+- Each create route is tested with TestClient for an unknown reference,
+  which must come back as the shared 400 message with nothing written
+
+Partitions:
+1. Reference: existing, unknown, None (optional FK)
+2. Route: gears, reminders, damage reports, schedules, recurrences
+3. Other integrity errors: not mistaken for a missing reference
+"""
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+import models
+from validation import foreign_keys, missing_reference
+
+
+class TestMissingReference:
+    """Unit tests for naming the missing reference"""
+
+    def test_foreign_keys_follow_column_order(self):
+        assert foreign_keys(models.Firefighter) == [
+            ("station_id", models.Station), ("department_id", models.Department),
+        ]
+
+    def test_first_missing_reference_is_named(self, test_db_with_dependencies):
+        db = test_db_with_dependencies
+        values = {"station_id": 1, "department_id": 999}
+        assert missing_reference(db, models.Firefighter, values) == "Department with id 999 does not exist"
+        assert missing_reference(db, models.Firefighter, {"station_id": None, "department_id": 1}) is None
+
+
+class TestCreateRoutesRejectUnknownReferences:
+    """Integration tests for the 400 of each create route"""
+
+    def test_gear_with_unknown_station(self, client, test_db_with_dependencies):
+        response = client.post("/gears/", json={"station_id": 999, "gear_name": "Helmet"})
+
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Station with id 999 does not exist"
+        assert test_db_with_dependencies.query(models.Gear).count() == 1
+
+    def test_reminder_with_unknown_gear(self, client, test_db_with_dependencies):
+        response = client.post("/reminders/", json={
+            "gear_id": 999, "reminder_date": "2030-01-01", "reminder_time": "09:00:00",
+        })
+
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Gear with id 999 does not exist"
+        assert test_db_with_dependencies.query(models.MaintenanceReminder).count() == 0
+
+    def test_damage_report_with_unknown_gear(self, client, test_db_with_dependencies):
+        response = client.post("/damage-reports/", json={"gear_id": 999, "notes": "Torn strap"})
+
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Gear with id 999 does not exist"
+        assert test_db_with_dependencies.query(models.DamageReport).count() == 0
+
+    def test_schedule_with_unknown_gear(self, client, test_db_with_dependencies):
+        response = client.post("/schedules/", json={"gear_id": 999, "scheduled_date": "2030-01-01"})
+
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Gear with id 999 does not exist"
+        assert test_db_with_dependencies.query(models.MaintenanceSchedule).count() == 0
+
+    def test_valid_references_are_written(self, client, test_db_with_dependencies):
+        response = client.post("/reminders/", json={
+            "gear_id": 1, "reminder_date": "2030-01-01", "reminder_time": "09:00:00",
+        })
+        assert response.status_code == 200
+
+    def test_other_integrity_errors_are_not_reported_as_missing_references(self, client, test_db_with_dependencies):
+        serial = test_db_with_dependencies.query(models.Gear.serial_number).scalar()
+
+        with pytest.raises(IntegrityError):
+            client.post("/gears/", json={"station_id": 1, "gear_name": "Copy", "serial_number": serial})
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])